@@ -26,6 +26,7 @@ const REGIONS = [
 
 // 全局变量
 let dataIndex = null;         // data_index.json 内容
+let publishedCounts = {};     // data_index.json 中各年份文件的记录数 { year: { region: count } }（loadYearData 会改写 dataIndex）
 let yearCache = {};           // { year: { regionCode: data[] } }
 let allData = [];             // 当前合并后的完整数据（已加载年份）
 let filteredData = [];
@@ -40,6 +41,13 @@ let isSearchMode = false;     // 搜索模式下需要加载所有数据
 let loadingYears = new Set(); // 正在加载的年份
 let historyPreloadStarted = false;
 let historyPreloadObserver = null;
+let searchManifests = {};     // { regionCode: Promise<manifest | null> } 搜索索引清单
+let searchShardCache = {};    // { "region/shard/hash": Promise<shard> }
+let searchHits = null;        // { region, query, dates: Set<YYYYMMDD> } 索引命中的日期；null 表示未使用索引
+let monthView = null;         // 当前区域的按月分片清单；null 表示不可用，退回按年份加载
+let monthViewManifests = {};  // { regionCode: Promise<manifest | null> }
+let monthCache = {};          // { "region/month/hash": Promise<records> }
+let virtualPageItems = null;  // 按月分片模式下当前页的记录
 
 // DOM 元素
 const galleryGrid = document.getElementById('gallery-grid');
@@ -134,8 +142,10 @@ async function init() {
     loadingEl.classList.add('show');
     try {
         await loadIndex();
-        const currentYear = String(dataIndex.currentYear);
-        await loadYearData(currentYear, defRegion);
+        monthView = await loadMonthManifest(defRegion);
+        if (!monthView) {
+            await loadYearData(String(dataIndex.currentYear), defRegion);
+        }
         rebuildAllData();
         computeYearOffsets();
         populateMonthDropdown();
@@ -158,11 +168,16 @@ async function init() {
         yearCache = {};
         loadingEl.classList.add('show');
         try {
-            const currentYear = String(dataIndex.currentYear);
-            await loadYearData(currentYear, newRegion);
+            monthView = await loadMonthManifest(newRegion);
+            if (!monthView) {
+                await loadYearData(String(dataIndex.currentYear), newRegion);
+            }
             rebuildAllData();
             computeYearOffsets();
             populateMonthDropdown();
+            if (currentSearchQuery) {
+                await prepareSearch(currentSearchQuery);
+            }
             await filterData(monthSelect.value, currentSearchQuery, 1);
             resetHistoryPreloadObserver();
         } catch (err) {
@@ -179,7 +194,10 @@ async function init() {
         loadingEl.classList.add('show');
         // 如果选择了某个月份，需要确保那个年份的数据已加载
         try {
-            if (val && val !== 'all') {
+            // 有按月分片时由 filterData 只加载该月（或当前页）的分片
+            if (activeMonthView()) {
+                // 不需要预先加载年份文件
+            } else if (val && val !== 'all') {
                 const targetYear = val.substring(0, 4);
                 if (!isYearLoaded(targetYear)) {
                     await loadYearData(targetYear, currentRegion);
@@ -197,13 +215,17 @@ async function init() {
         }
     });
 
-    // 搜索框获得焦点时，立即后台加载所有年份数据
+    // 搜索框获得焦点时，预先加载搜索索引清单；没有索引时后台加载所有年份数据
     let searchPreloadStarted = false;
     searchInput.addEventListener('focus', () => {
         if (!searchPreloadStarted) {
             searchPreloadStarted = true;
-            console.log('Search focus: preloading all years...');
-            loadAllYearsProgressively();
+            loadSearchManifest(currentRegion).then(manifest => {
+                if (!manifest) {
+                    console.log('Search focus: preloading all years...');
+                    loadAllYearsProgressively();
+                }
+            });
         }
     });
 
@@ -219,9 +241,9 @@ async function init() {
             updateQuery({ search: query || null, page: 1 });
 
             if (query) {
-                // 搜索模式：后台逐步加载所有年份
+                // 搜索模式：用索引只加载命中的年份，没有索引时后台逐步加载所有年份
                 isSearchMode = true;
-                await loadAllYearsProgressively();
+                await prepareSearch(query);
             } else {
                 isSearchMode = false;
             }
@@ -256,11 +278,45 @@ async function loadIndex() {
         res = await fetch(`${ARCHIVE_CONFIG.fallbackBase}data_index.json`);
     }
     dataIndex = await res.json();
+    publishedCounts = Object.fromEntries(
+        Object.entries(dataIndex.years).map(([year, info]) => [year, { ...(info.regions || {}) }])
+    );
 
     // 按年份降序排列
     yearOrder = Object.keys(dataIndex.years).sort((a, b) => b - a);
 }
 
+// 清单 sources 中每个年份文件的记录数与 data_index.json 一致时，生成的索引/分片才与数据文件同步；
+// 不一致（例如生成后数据文件又有更新）时不能使用，否则会漏掉新记录
+function manifestMatchesData(manifest, regionCode) {
+    const sources = manifest.sources || {};
+    const years = new Set(Object.keys(sources));
+    for (const [year, regions] of Object.entries(publishedCounts)) {
+        if (regionCode in regions) years.add(year);
+    }
+    for (const year of years) {
+        const count = (publishedCounts[year] || {})[regionCode];
+        if (!sources[year] || sources[year].records !== count) return false;
+    }
+    return true;
+}
+
+// 读取 bing/ 下生成的 JSON 文件（CDN 失败时使用备用地址）
+async function fetchArchiveJson(path) {
+    let res = await fetch(`${ARCHIVE_CONFIG.cdnBase}${path}`);
+    if (!res.ok) {
+        res = await fetch(`${ARCHIVE_CONFIG.fallbackBase}${path}`);
+    }
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    return res.json();
+}
+
+// data_index.json 的 assets：源路径 -> 带内容哈希的最小化副本（python/publish_assets.py 生成），可长期缓存
+function publishedPath(path) {
+    const asset = dataIndex && dataIndex.assets && dataIndex.assets[path];
+    return asset ? asset.file : null;
+}
+
 // 获取某年某区域的记录数
 function getYearRegionCount(year, regionCode) {
     const yearInfo = dataIndex.years[year];
@@ -272,6 +328,11 @@ function getYearRegionCount(year, regionCode) {
 
 // 计算当前区域的总条目数
 function computeTotalItemCount() {
+    const view = activeMonthView();
+    if (view) {
+        totalItemCount = view.total;
+        return;
+    }
     totalItemCount = 0;
     for (const y of yearOrder) {
         totalItemCount += getYearRegionCount(y, currentRegion);
@@ -342,9 +403,14 @@ async function loadYearData(year, regionCode) {
     loadingYears.add(loadKey);
 
     try {
-        let res = await fetch(`${ARCHIVE_CONFIG.cdnBase}${year}/${effectiveRegion}.json`);
+        const path = `${year}/${effectiveRegion}.json`;
+        const published = publishedPath(path);
+        let res = published ? await fetch(`${ARCHIVE_CONFIG.cdnBase}${published}`).catch(() => null) : null;
+        if (!res || !res.ok) {
+            res = await fetch(`${ARCHIVE_CONFIG.cdnBase}${path}`);
+        }
         if (!res.ok) {
-            res = await fetch(`${ARCHIVE_CONFIG.fallbackBase}${year}/${effectiveRegion}.json`);
+            res = await fetch(`${ARCHIVE_CONFIG.fallbackBase}${path}`);
         }
         let data = await res.json();
 
@@ -411,6 +477,221 @@ function rebuildAllData() {
     allData.sort((a, b) => b.date.localeCompare(a.date));
 }
 
+// ============ 按月分片视图 ============
+// python/month_views.py 生成：bing/months/{region}/index.json（每月记录数、分页表）+ {YYYYMM}.json。
+// 默认分页和按月筛选只下载要显示的月份；清单不可用或落后于 data_index.json 时退回按年份加载。
+
+const MONTH_VIEW_VERSION = 2;
+
+function loadMonthManifest(regionCode) {
+    if (!monthViewManifests[regionCode]) {
+        monthViewManifests[regionCode] = fetchArchiveJson(`months/${regionCode}/index.json`)
+            .then(manifest => {
+                if (manifest.version !== MONTH_VIEW_VERSION || manifest.itemsPerPage !== ARCHIVE_CONFIG.itemsPerPage) {
+                    return null;
+                }
+                if (!manifestMatchesData(manifest, regionCode)) {
+                    console.warn(`Month views for ${regionCode} are out of date, loading the year files`);
+                    return null;
+                }
+                return manifest;
+            })
+            .catch(err => {
+                console.warn(`Month views unavailable for ${regionCode}:`, err);
+                return null;
+            });
+    }
+    return monthViewManifests[regionCode];
+}
+
+function activeMonthView() {
+    return monthView && monthView.region === currentRegion ? monthView : null;
+}
+
+function loadMonthRecords(regionCode, month) {
+    const info = monthView.months[month];
+    if (!info) return Promise.resolve([]);
+    const key = `${regionCode}/${month}/${info.hash}`;
+    if (!monthCache[key]) {
+        monthCache[key] = fetchArchiveJson(`months/${regionCode}/${month}.json?v=${info.hash}`).catch(err => {
+            delete monthCache[key];
+            throw err;
+        });
+    }
+    return monthCache[key];
+}
+
+// 按分页表取出某页涉及的月份片段
+async function loadMonthPage(pageNum) {
+    const region = currentRegion;
+    const segments = monthView.pages[pageNum - 1] || [];
+    const chunks = await Promise.all(segments.map(([month, offset, count]) =>
+        loadMonthRecords(region, month).then(records => records.slice(offset, offset + count))
+    ));
+    return chunks.flat();
+}
+
+// 分片加载失败时停用按月视图，之后按年份加载
+function disableMonthView(err) {
+    console.warn('Month view failed, falling back to yearly files:', err);
+    monthView = null;
+    computeYearOffsets();
+}
+
+// ============ 搜索索引 ============
+// python/search_index.py 生成的倒排索引：bing/search/{region}/index.json + 按词前两个字符分片的 {n}.json。
+// 分片中每个词对应记录序号（距 manifest.base 的天数）的差分列表。切词和分片规则必须与 Python 端一致。
+// manifest.recent 不为空时，recent.days 这些天以 recent.json 为准，忽略分片中这些天的旧结果。
+
+const SEARCH_INDEX_VERSION = 3;
+const SEARCH_NGRAM = 3;
+
+function isCjkChar(ch) {
+    return ch.codePointAt(0) >= 0x2E80;
+}
+
+function tokenizeSearch(text) {
+    const tokens = [];
+    for (const word of text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []) {
+        const chars = Array.from(word);
+        let runStart = 0;
+        for (let i = 1; i <= chars.length; i++) {
+            if (i < chars.length && isCjkChar(chars[i]) === isCjkChar(chars[runStart])) continue;
+            const run = chars.slice(runStart, i);
+            if (isCjkChar(run[0])) {
+                tokens.push(...run);
+                for (let j = 0; j < run.length - 1; j++) tokens.push(run[j] + run[j + 1]);
+            } else {
+                for (let j = 0; j + SEARCH_NGRAM <= run.length; j++) tokens.push(run.slice(j, j + SEARCH_NGRAM).join(''));
+            }
+            runStart = i;
+        }
+    }
+    return tokens;
+}
+
+function decodeSearchOrdinals(deltas) {
+    const ordinals = [];
+    let ordinal = 0;
+    for (const delta of deltas) {
+        ordinal += delta;
+        ordinals.push(ordinal);
+    }
+    return ordinals;
+}
+
+function searchShardOf(token, shardCount) {
+    const chars = Array.from(token);
+    const second = chars.length > 1 ? chars[1].codePointAt(0) : 0;
+    return (chars[0].codePointAt(0) * 31 + second) % shardCount;
+}
+
+function searchOrdinalToDate(base, ordinal) {
+    const start = Date.UTC(Number(base.substring(0, 4)), Number(base.substring(4, 6)) - 1, Number(base.substring(6, 8)));
+    return new Date(start + ordinal * 86400000).toISOString().substring(0, 10).replace(/-/g, '');
+}
+
+function loadSearchManifest(regionCode) {
+    if (!searchManifests[regionCode]) {
+        searchManifests[regionCode] = fetchArchiveJson(`search/${regionCode}/index.json`)
+            .then(manifest => {
+                if (manifest.version !== SEARCH_INDEX_VERSION) return null;
+                if (!manifestMatchesData(manifest, regionCode)) {
+                    console.warn(`Search index for ${regionCode} is out of date, searching the year files`);
+                    return null;
+                }
+                return manifest;
+            })
+            .catch(err => {
+                console.warn(`Search index unavailable for ${regionCode}:`, err);
+                return null;
+            });
+    }
+    return searchManifests[regionCode];
+}
+
+function loadSearchShard(regionCode, manifest, shard) {
+    const hash = manifest.shards[shard];
+    if (!hash) return Promise.resolve({});
+    const key = `${regionCode}/${shard}/${hash}`;
+    if (!searchShardCache[key]) {
+        // 文件名不变，用内容哈希作为查询参数避免取到缓存中的旧分片
+        searchShardCache[key] = fetchArchiveJson(`search/${regionCode}/${shard}.json?v=${hash}`).catch(err => {
+            delete searchShardCache[key];
+            throw err;
+        });
+    }
+    return searchShardCache[key];
+}
+
+function loadSearchRecent(regionCode, manifest) {
+    if (!manifest.recent) return Promise.resolve({});
+    const key = `${regionCode}/recent/${manifest.recent.hash}`;
+    if (!searchShardCache[key]) {
+        searchShardCache[key] = fetchArchiveJson(`search/${regionCode}/recent.json?v=${manifest.recent.hash}`).catch(err => {
+            delete searchShardCache[key];
+            throw err;
+        });
+    }
+    return searchShardCache[key];
+}
+
+// 在索引中查找同时包含所有查询词的记录日期；索引不可用或查询无法用索引回答时返回 null
+async function searchIndexDates(query, regionCode) {
+    const manifest = await loadSearchManifest(regionCode);
+    if (!manifest) return null;
+
+    // 查询词的 trigram 都是索引中的词，精确查找即可找到包含查询词的记录；
+    // 少于三个字母的词没有 trigram，只能交给子串核对
+    const tokens = [...new Set(tokenizeSearch(query))];
+    if (tokens.length === 0) return null;
+
+    try {
+        const [recent, ...shards] = await Promise.all([
+            loadSearchRecent(regionCode, manifest),
+            ...tokens.map(t => loadSearchShard(regionCode, manifest, searchShardOf(t, manifest.shardCount)))
+        ]);
+        const recentDays = new Set(manifest.recent ? decodeSearchOrdinals(manifest.recent.days) : []);
+        let hits = null;
+        tokens.forEach((token, i) => {
+            const ordinals = new Set(decodeSearchOrdinals(shards[i][token] || []).filter(o => !recentDays.has(o)));
+            for (const o of decodeSearchOrdinals(recent[token] || [])) ordinals.add(o);
+            hits = hits ? new Set([...hits].filter(o => ordinals.has(o))) : ordinals;
+        });
+        return new Set([...hits].map(o => searchOrdinalToDate(manifest.base, o)));
+    } catch (err) {
+        console.warn('Search index lookup failed:', err);
+        return null;
+    }
+}
+
+// 准备搜索数据：有索引时只加载命中的年份，否则逐步加载所有年份
+async function prepareSearch(query, options = {}) {
+    const region = currentRegion;
+    const dates = await searchIndexDates(query, region);
+    if (query !== currentSearchQuery || region !== currentRegion) return;
+
+    if (!dates) {
+        searchHits = null;
+        await loadAllYearsProgressively(options);
+        return;
+    }
+    searchHits = { region, query, dates };
+    const years = new Set([...dates].map(d => d.substring(0, 4)));
+    let loadedAny = false;
+    for (const y of yearOrder) {
+        if (years.has(y) && !isYearLoaded(y)) {
+            await loadYearData(y, region);
+            loadedAny = true;
+        }
+    }
+    if (loadedAny) {
+        rebuildAllData();
+        computeYearOffsets();
+        populateMonthDropdown();
+    }
+}
+
 // ============ 状态管理 ============
 
 async function applyStateFromURL() {
@@ -422,8 +703,10 @@ async function applyStateFromURL() {
         currentRegion = regionParam;
         setRegion(regionParam);
         yearCache = {};
-        const currentYear = String(dataIndex.currentYear);
-        await loadYearData(currentYear, regionParam);
+        monthView = await loadMonthManifest(regionParam);
+        if (!monthView) {
+            await loadYearData(String(dataIndex.currentYear), regionParam);
+        }
         rebuildAllData();
         computeYearOffsets();
     }
@@ -437,10 +720,11 @@ async function applyStateFromURL() {
 
     if (searchParam) {
         isSearchMode = true;
+        await prepareSearch(searchParam, { render: false });
     }
 
     const pageParam = parseInt(params.get('page')) || 1;
-    if (shouldEagerLoadAllYears(params)) {
+    if (!activeMonthView() && shouldEagerLoadAllYears(params)) {
         await loadAllYearsProgressively({ render: false });
     }
 
@@ -622,14 +906,13 @@ function getResUrl(item, type) {
 }
 
 function shouldEagerLoadAllYears(params) {
+    // 搜索由 prepareSearch 负责加载数据（有索引时只加载命中的年份）
     const dateParam = params.get('date');
-    const searchParam = params.get('search');
     const photoParam = params.get('photo');
     const pageParam = parseInt(params.get('page')) || 1;
 
     return Boolean(
         dateParam !== null ||
-        searchParam ||
         photoParam ||
         pageParam > 1
     );
@@ -651,9 +934,11 @@ function populateMonthDropdown() {
         if (item.date && item.date.length >= 6) months.add(item.date.substring(0, 6));
     });
 
-    // 从索引推断未加载年份的月份
+    // 有按月分片清单时直接使用其中的月份，否则从索引推断未加载年份的月份
+    const view = activeMonthView();
+    if (view) Object.keys(view.months).forEach(m => months.add(m));
     for (const y of yearOrder) {
-        if (!isYearLoaded(y)) {
+        if (!view && !isYearLoaded(y)) {
             // 只有该年份有当前区域（或回退区域）的数据时，才生成月份
             const yearInfo = dataIndex.years[y];
             const effectiveRegion = getEffectiveRegion(y, currentRegion);
@@ -691,7 +976,8 @@ function setupHistoryPreloadObserver() {
     if (!paginationEl || historyPreloadObserver) return;
 
     historyPreloadObserver = new IntersectionObserver((entries) => {
-        if (!entries.some(entry => entry.isIntersecting) || historyPreloadStarted) return;
+        // 按月分片模式下翻页只加载对应月份，不需要预加载所有年份
+        if (!entries.some(entry => entry.isIntersecting) || historyPreloadStarted || activeMonthView()) return;
         historyPreloadStarted = true;
         loadAllYearsProgressively();
         historyPreloadObserver.disconnect();
@@ -717,11 +1003,27 @@ function resetHistoryPreloadObserver() {
 
 async function filterData(monthVal, searchQuery, page) {
     currentPage = page || 1;
+    virtualPageItems = null;
 
     // 虚拟分页模式：非搜索、非月份过滤时，确保目标页的年份已加载
     // 需要加载从最新年份到目标页所涉及的最早年份之间的所有年份，
     // 因为 allData 是连续排列的，不能有间隔
     const isVirtualMode = !isSearchMode && (!monthVal || monthVal === 'all') && !searchQuery;
+    if (isVirtualMode && activeMonthView()) {
+        clampCurrentPage(getVirtualTotalPages());
+        const requestedPage = currentPage;
+        try {
+            const items = await loadMonthPage(requestedPage);
+            if (requestedPage !== currentPage) return; // 加载期间已切换到其它页
+            virtualPageItems = items;
+            filteredData = items;
+            renderGallery();
+            renderPagination();
+            return;
+        } catch (err) {
+            disableMonthView(err);
+        }
+    }
     if (isVirtualMode) {
         clampCurrentPage(getVirtualTotalPages());
 
@@ -754,10 +1056,28 @@ async function filterData(monthVal, searchQuery, page) {
 
     let data = allData;
     if (monthVal && monthVal !== 'all') {
-        data = data.filter(item => item.date.startsWith(monthVal));
+        let monthData = null;
+        if (activeMonthView() && !searchQuery) {
+            try {
+                monthData = await loadMonthRecords(currentRegion, monthVal);
+            } catch (err) {
+                disableMonthView(err);
+                const targetYear = monthVal.substring(0, 4);
+                if (!isYearLoaded(targetYear)) {
+                    await loadYearData(targetYear, currentRegion);
+                    rebuildAllData();
+                }
+                data = allData;
+            }
+        }
+        data = monthData || data.filter(item => item.date.startsWith(monthVal));
     }
 
     if (searchQuery) {
+        // 索引命中的日期先缩小范围，再用子串规则逐条核对
+        if (searchHits && searchHits.query === searchQuery && searchHits.region === currentRegion) {
+            data = data.filter(item => searchHits.dates.has(item.date));
+        }
         const query = searchQuery.toLowerCase();
         data = data.filter(item => {
             const title = (item.copyrightKeyword || item.copyright || '').toLowerCase();
@@ -795,7 +1115,7 @@ function renderGallery() {
 
     const start = (currentPage - 1) * ARCHIVE_CONFIG.itemsPerPage;
     const end = start + ARCHIVE_CONFIG.itemsPerPage;
-    const pageItems = filteredData.slice(start, end);
+    const pageItems = virtualPageItems || filteredData.slice(start, end);
 
     if (pageItems.length === 0) {
         galleryGrid.innerHTML = '<p style="color:#888;">No data</p>';
@@ -3,12 +3,14 @@ const CONFIG = {
   normal: {
     cdnBase: "bing/",
     fallbackBase: "https://testingcf.jsdelivr.net/gh/zigou23/Bing-Daily-Wallpaper@main/bing/",
+    assetPrefix: "",
     itemsPerPage: 31,
     enableFeatured: true
   },
   archive: {
     cdnBase: "bing/old-2408/",
     fallbackBase: "https://testingcf.jsdelivr.net/gh/zigou23/Bing-Daily-Wallpaper@main/bing/old-2408/",
+    assetPrefix: "old-2408/",
     itemsPerPage: 31,
     enableFeatured: false
   }
@@ -409,10 +411,32 @@ function getResUrl(item, type) {
   return `${item.urlbase}${suffix}`;
 }
 
+// data_index.json 的 assets：源路径 -> 带内容哈希的最小化副本（python/publish_assets.py 生成），可长期缓存。
+// 没有发布时为空对象，直接读取原文件。
+const DATA_BASE = "bing/";
+let publishedAssets = null;
+
+async function loadPublishedAssets() {
+  if (publishedAssets === null) {
+    try {
+      const res = await fetch(`${DATA_BASE}data_index.json`);
+      publishedAssets = res.ok ? ((await res.json()).assets || {}) : {};
+    } catch (err) {
+      publishedAssets = {};
+    }
+  }
+  return publishedAssets;
+}
+
 async function loadData(regionCode) {
   loadingEl.classList.add('show');
   try {
-    let res = await fetch(`${config.cdnBase}${regionCode}.json`);
+    const assets = await loadPublishedAssets();
+    const asset = assets[`${config.assetPrefix}${regionCode}.json`];
+    let res = asset ? await fetch(`${DATA_BASE}${asset.file}`).catch(() => null) : null;
+    if (!res || !res.ok) {
+      res = await fetch(`${config.cdnBase}${regionCode}.json`);
+    }
     if (!res.ok) {
       console.log('Local failed, trying CDN...');
       res = await fetch(`${config.fallbackBase}${regionCode}.json`);
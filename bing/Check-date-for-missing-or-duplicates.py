@@ -1,60 +1,240 @@
 # Check if `date` are missing or duplicated.
+#
+# 检查每个存档文件的日期：缺失的日期（按区间合并）、重复的日期、无效日期，以及每年的覆盖率。
+# 日期统一转换为整数天数（1970-01-01 起），安装了 NumPy 时所有文件一次批量计算，否则逐个文件计算，
+# 两种方式的结果相同。
+#
+# 用法（可在任意目录执行）:
+#   python bing/Check-date-for-missing-or-duplicates.py                  # 主目录和年份目录中的所有文件
+#   python bing/Check-date-for-missing-or-duplicates.py --scope root --end-date 20240814
+#   python bing/Check-date-for-missing-or-duplicates.py --out date_report.json --fail-on-gaps
 
-# Note: This file must be executed in the ./bing folder.
-# 注意：此文件必须在 ./bing 文件夹执行
-
+import argparse
 import json
-from datetime import datetime, timedelta
-
-# 从文件中读取 JSON 数据
-def load_json_from_file(filename):
-    with open(filename, 'r') as file:
-        return json.load(file)
-
-# 生成日期范围内的日期
-def generate_date_range(start_date, end_date):
-    start = datetime.strptime(start_date, "%Y%m%d")
-    end = datetime.strptime(end_date, "%Y%m%d")
-    dates = []
-    while start <= end:
-        dates.append(start.strftime("%Y%m%d"))
-        start += timedelta(days=1)
-    return dates
-
-# 查找缺失和重复的日期
-def find_dates_issues(data, start_date, end_date):
-    all_dates = set(generate_date_range(start_date, end_date))
-    present_dates = set()
-    duplicate_dates = set()
-    
+import os
+import sys
+from datetime import date as Date
+
+# 使用 python/archive_io.py 读取存档文件
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python'))
+import archive_io
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EPOCH = Date(1970, 1, 1).toordinal()
+
+
+# ====== 文件和日期 ======
+def archive_files(scope):
+    """返回 [(相对路径, 绝对路径)]；scope: root / years / all"""
+    paths = []
+    if scope in ('root', 'all'):
+        paths.extend(sorted(name for name in os.listdir(BASE_DIR) if name.startswith('bing_') and name.endswith('.json')))
+    if scope in ('years', 'all'):
+        for year in sorted(name for name in os.listdir(BASE_DIR) if name.isdigit()):
+            year_dir = os.path.join(BASE_DIR, year)
+            paths.extend(f'{year}/{name}' for name in sorted(os.listdir(year_dir))
+                         if name.startswith('bing_') and name.endswith('.json'))
+    return [(path, os.path.join(BASE_DIR, path)) for path in paths]
+
+
+def date_ints(data):
+    """记录中的 date 字段 -> YYYYMMDD 整数列表，以及无法解析的原始值"""
+    values, invalid = [], []
     for item in data:
-        date = item['date']
-        if date in present_dates:
-            duplicate_dates.add(date)
-        present_dates.add(date)
-    
-    missing_dates = sorted(all_dates - present_dates)
-    return missing_dates, sorted(duplicate_dates)
-
-# 获取文件中的第一个日期作为 start_date
-def get_start_date_from_data(data):
-    # 提取所有日期并排序，第一个日期即为 start_date
-    dates = sorted(item['date'] for item in data)
-    return dates[0] if dates else None
-
-languages = ['ROW', 'en-US', 'en-CA', 'en-GB', 'en-IN', 'es-ES', 'fr-FR', 'fr-CA', 'it-IT', 'ja-JP', 'pt-BR', 'de-DE', 'zh-CN']  # 可以添加其他语言代码
-
-for lang in languages:
-    # 文件名和日期范围
-    filename = f'bing_{lang}.json'
-    end_date = "20240814"
-    # end_date = "20240814"
-
-    # 读取 JSON 数据并查找缺失和重复的日期
-    data = load_json_from_file(filename)
-    start_date = get_start_date_from_data(data)
-
-    missing_dates, duplicate_dates = find_dates_issues(data, start_date, end_date)
-
-    print(f'{lang} {start_date}-{end_date} Missing dates:', missing_dates)
-    print(f'{lang} {start_date}-{end_date} Duplicate dates:', duplicate_dates)
+        date = item.get('date')
+        if isinstance(date, str) and len(date) == 8 and date.isdigit():
+            values.append(int(date))
+        elif date:
+            invalid.append(date)
+    return values, invalid
+
+
+def day_to_str(day):
+    return Date.fromordinal(int(day) + EPOCH).strftime('%Y%m%d')
+
+
+def str_to_day(value):
+    return Date(int(value[:4]), int(value[4:6]), int(value[6:8])).toordinal() - EPOCH
+
+
+def year_bounds(year):
+    return str_to_day(f'{year}0101'), str_to_day(f'{year}1231')
+
+
+def file_range(name, days, end_date):
+    """检查范围：从文件中最早的日期到 end_date（默认为文件中最晚的日期）；年份文件不超出该年"""
+    if not days:
+        return None
+    start, end = min(days), max(days)
+    if end_date:
+        end = str_to_day(end_date)
+    year = name.split('/')[0]
+    if year.isdigit():
+        first, last = year_bounds(year)
+        start, end = max(start, first), min(end, last)
+    return (start, end) if start <= end else None
+
+
+# ====== 计算：纯 Python ======
+def to_days_python(values):
+    days, invalid = [], []
+    for value in values:
+        try:
+            days.append(Date(value // 10000, value // 100 % 100, value % 100).toordinal() - EPOCH)
+        except ValueError:
+            invalid.append(str(value))
+    return days, invalid
+
+
+def analyze_python(series):
+    """series: [(days, (start, end) | None)] -> [(重复 [(day, count)], 缺失 [(start, end)], 每年 {year: present})]"""
+    results = []
+    for days, bounds in series:
+        counts = {}
+        for day in days:
+            counts[day] = counts.get(day, 0) + 1
+        duplicates = sorted((day, count) for day, count in counts.items() if count > 1)
+        missing, present = [], {}
+        if bounds:
+            start, end = bounds
+            in_range = sorted(day for day in counts if start <= day <= end)
+            for previous, current in zip([start - 1] + in_range, in_range + [end + 1]):
+                if current - previous > 1:
+                    missing.append((previous + 1, current - 1))
+            for day in in_range:
+                year = Date.fromordinal(day + EPOCH).year
+                present[year] = present.get(year, 0) + 1
+        results.append((duplicates, missing, present))
+    return results
+
+
+# ====== 计算：NumPy（所有文件一次批量处理） ======
+def to_days_numpy(values):
+    ints = np.asarray(values, dtype=np.int64)
+    year, month, day = ints // 10000, ints // 100 % 100, ints % 100
+    valid = (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0)
+    month_start = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    month_end = (months + 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    valid &= day <= month_end - month_start
+    days = month_start + day - 1
+    return days[valid].tolist(), [str(v) for v in ints[~valid].tolist()]
+
+
+def analyze_numpy(series):
+    n = len(series)
+    lengths = np.array([len(days) for days, _ in series], dtype=np.int64)
+    ids = np.repeat(np.arange(n, dtype=np.int64), lengths)
+    days = np.concatenate([np.asarray(d, dtype=np.int64) for d, _ in series]) if lengths.sum() else np.zeros(0, np.int64)
+    offset = 1 << 32  # (文件编号, 天数) 合并为一个整数键，天数加偏移后保持为正数
+    keys, counts = np.unique(ids * (offset * 2) + days + offset, return_counts=True)
+    key_ids, key_days = keys // (offset * 2), keys % (offset * 2) - offset
+
+    # 重复：同一文件中出现多次的天数
+    dup = counts > 1
+    dup_ids, dup_days, dup_counts = key_ids[dup], key_days[dup], counts[dup]
+
+    # 缺失：在每个文件的检查范围两端各加一个边界点，相邻点相差超过 1 天即为缺口
+    has_range = np.array([bounds is not None for _, bounds in series], dtype=bool)
+    starts = np.array([b[0] if b else 0 for _, b in series], dtype=np.int64)
+    ends = np.array([b[1] if b else -1 for _, b in series], dtype=np.int64)
+    in_range = has_range[key_ids] & (key_days >= starts[key_ids]) & (key_days <= ends[key_ids])
+    range_ids = np.flatnonzero(has_range)
+    point_ids = np.concatenate([key_ids[in_range], range_ids, range_ids])
+    point_days = np.concatenate([key_days[in_range], starts[range_ids] - 1, ends[range_ids] + 1])
+    order = np.lexsort((point_days, point_ids))
+    point_ids, point_days = point_ids[order], point_days[order]
+    gap = (point_ids[1:] == point_ids[:-1]) & (np.diff(point_days) > 1)
+    gap_ids = point_ids[:-1][gap]
+    gap_starts, gap_ends = point_days[:-1][gap] + 1, point_days[1:][gap] - 1
+
+    # 每年的覆盖：检查范围内每个文件每年出现的天数
+    years = key_days[in_range].astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+    year_keys, year_counts = np.unique(key_ids[in_range] * 10000 + years, return_counts=True)
+
+    results = [([], [], {}) for _ in range(n)]
+    for i, day, count in zip(dup_ids.tolist(), dup_days.tolist(), dup_counts.tolist()):
+        results[i][0].append((day, count))
+    for i, start, end in zip(gap_ids.tolist(), gap_starts.tolist(), gap_ends.tolist()):
+        results[i][1].append((start, end))
+    for key, count in zip(year_keys.tolist(), year_counts.tolist()):
+        results[key // 10000][2][key % 10000] = count
+    return results
+
+
+# ====== 报告 ======
+def build_report(scope='all', end_date=None, backend=None):
+    backend = backend or ('numpy' if np is not None else 'python')
+    to_days, analyze = (to_days_numpy, analyze_numpy) if backend == 'numpy' else (to_days_python, analyze_python)
+
+    entries, series = [], []
+    for name, path in archive_files(scope):
+        data = archive_io.load_json(path)
+        values, invalid = date_ints(data)
+        days, bad_values = to_days(values) if values else ([], [])
+        bounds = file_range(name, days, end_date)
+        entries.append({'name': name, 'records': len(data), 'days': days,
+                        'invalid': invalid + bad_values, 'bounds': bounds})
+        series.append((days, bounds))
+
+    files = []
+    for entry, (duplicates, missing, present) in zip(entries, analyze(series)):
+        bounds = entry['bounds']
+        coverage = {}
+        if bounds:
+            for year, count in sorted(present.items()):
+                first, last = year_bounds(year)
+                expected = min(last, bounds[1]) - max(first, bounds[0]) + 1
+                coverage[str(year)] = {'present': count, 'expected': expected, 'ratio': round(count / expected, 4)}
+        files.append({
+            'file': entry['name'],
+            'region': os.path.basename(entry['name'])[len('bing_'):-len('.json')],
+            'records': entry['records'],
+            'start_date': day_to_str(bounds[0]) if bounds else None,
+            'end_date': day_to_str(bounds[1]) if bounds else None,
+            'duplicate_dates': [{'date': day_to_str(day), 'count': count} for day, count in duplicates],
+            'missing_ranges': [{'start': day_to_str(s), 'end': day_to_str(e), 'days': e - s + 1} for s, e in missing],
+            'missing_days': sum(e - s + 1 for s, e in missing),
+            'invalid_dates': entry['invalid'],
+            'coverage': coverage,
+        })
+    return {'backend': backend, 'scope': scope, 'end_date': end_date, 'files': files}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check archive files for missing or duplicated dates.')
+    parser.add_argument('--scope', choices=['root', 'years', 'all'], default='all')
+    parser.add_argument('--end-date', help='check up to this date (YYYYMMDD); default: last date in each file')
+    parser.add_argument('--backend', choices=['numpy', 'python'], help='default: numpy when installed')
+    parser.add_argument('--out', help='write the report as JSON to this file')
+    parser.add_argument('--fail-on-gaps', action='store_true', help='also exit non-zero when dates are missing')
+    args = parser.parse_args()
+    if args.backend == 'numpy' and np is None:
+        parser.error('NumPy is not installed')
+
+    report = build_report(args.scope, args.end_date, args.backend)
+    failed = False
+    for info in report['files']:
+        missing = ', '.join(r['start'] if r['days'] == 1 else f"{r['start']}-{r['end']}" for r in info['missing_ranges'])
+        duplicates = ', '.join(f"{d['date']}(x{d['count']})" for d in info['duplicate_dates'])
+        print(f"{info['file']} {info['start_date']}-{info['end_date']} "
+              f"Missing dates ({info['missing_days']}): [{missing}] Duplicate dates: [{duplicates}]")
+        if info['invalid_dates']:
+            print(f"  Invalid dates: {info['invalid_dates']}")
+        failed |= bool(info['duplicate_dates'] or info['invalid_dates'] or (args.fail_on_gaps and info['missing_days']))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f'Report written to {args.out} (backend: {report["backend"]})')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
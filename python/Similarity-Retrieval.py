@@ -1,6 +1,7 @@
-import json
 import os
-import re
+
+import archive_io
+import coverage_matrix
 
 # 设置文件夹路径
 folder_path = "../bing/"
@@ -22,27 +23,18 @@ files = [
     "bing_zh-CN.json"
 ]
 
-def extract_image_theme(urlbase):
-    """提取 urlbase 中的图片主题部分 (OHR.XXX)"""
-    match = re.search(r'OHR\.([^_]+)', urlbase)
-    return match.group(0) if match else None
-
 data = {}
 for file in files:
     file_path = os.path.join(folder_path, file)
-    with open(file_path, 'r', encoding='utf-8') as f:
-        locale = file.replace('bing_', '').replace('.json', '')
-        data[locale] = json.load(f)
+    locale = file.replace('bing_', '').replace('.json', '')
+    data[locale] = archive_io.load_json(file_path)
 
-# 提取 ROW 的所有图片主题
-row_themes = set()
-for item in data['ROW']:
-    theme = extract_image_theme(item['urlbase'])
-    if theme:
-        row_themes.add(theme)
+# 所有地区的图片主题编码为位集矩阵，一次完成与 ROW 的比较（详见 coverage_matrix.py）
+matrix = coverage_matrix.CoverageMatrix(data)
+row_bits = matrix.bits['ROW']
 
 print("=" * 80)
-print(f"ROW 总共有 {len(row_themes)} 张不同的图片")
+print(f"ROW 总共有 {coverage_matrix.popcount(row_bits)} 张不同的图片")
 print("=" * 80)
 print()
 
@@ -51,29 +43,12 @@ results = {}
 for locale in sorted(data.keys()):
     if locale == 'ROW':
         continue
-    
-    # 提取该地区的所有图片主题
-    locale_themes = set()
-    for item in data[locale]:
-        theme = extract_image_theme(item['urlbase'])
-        if theme:
-            locale_themes.add(theme)
-    
-    # 计算缺失的图片（ROW 有但该地区没有的）
-    missing = row_themes - locale_themes
-    
-    # 计算额外的图片（该地区有但 ROW 没有的）
-    extra = locale_themes - row_themes
-    
-    # 计算匹配率
-    match_rate = len(locale_themes & row_themes) / len(row_themes) * 100 if row_themes else 0
-    
-    results[locale] = {
-        'total': len(locale_themes),
-        'missing': missing,
-        'extra': extra,
-        'match_rate': match_rate
-    }
+
+    locale_bits = matrix.bits[locale]
+    results[locale] = matrix.compare(locale, 'ROW')
+    # 缺失的图片（ROW 有但该地区没有的）和额外的图片（该地区有但 ROW 没有的）
+    results[locale]['missing'] = matrix.ids(row_bits & ~locale_bits)
+    results[locale]['extra'] = matrix.ids(locale_bits & ~row_bits)
 
 # 输出结果
 for locale in sorted(results.keys()):
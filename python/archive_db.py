@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import bing_url
+import json_codec
+from data_index import BASE_DIR
+from image_store import market_of, view_names
+
+# 本地 SQLite 数据库：把所有 bing_*.json（主目录、年份目录、weekly、old-2408）的记录导入带索引的表，
+# 回答 "en-GB 2025 年 3 月的记录"、"哪些市场出现过 OHR.X" 这类问题时不再需要完整解析所有 JSON 文件。
+#
+#   files        每个源文件的大小、修改时间和 SHA-1，同步时只重新导入有变化的文件
+#   items        每个市场内容不同的记录只存一行（与 image_store.py 相同的去重）：
+#                市场、日期、图片ID (OHR.XXX)、hsh、文字字段和原始 JSON；
+#                索引：(market, date)、date、image_id、hsh
+#   placements   记录在各文件中的位置 (文件, 序号) -> items.id，按文件类型 (kind) 限定查询范围
+#   items_fts    FTS5 全文索引（copyright, description），trigram 分词，可按子串搜索中日文；
+#                由触发器与 items 保持一致
+#
+# JSON 文件仍是数据来源，数据库随时可以删除重建（表结构版本变化时会自动重建），不提交到仓库。
+# 日常运行设置 BING_ARCHIVE_DB=路径 时，生成索引后同步到该数据库。
+#
+# 用法（在仓库根目录执行）:
+#   python python/archive_db.py sync [--force]
+#   python python/archive_db.py records --market en-GB --month 202503
+#   python python/archive_db.py image OHR.JulierPass
+#   python python/archive_db.py hsh 5f1e...
+#   python python/archive_db.py search "Peak District" --market en-GB
+#   python python/archive_db.py sql "SELECT market, COUNT(*) FROM items GROUP BY market"
+DB_PATH = Path("archive.db")
+SCHEMA_VERSION = 1
+SCOPES = ("years", "root", "weekly", "old-2408", "all")
+FTS_MIN_TERM = 3  # trigram 分词：更短的词无法使用全文索引，改为逐条比较
+TABLES = ("items_fts", "placements", "items", "files")
+
+SCHEMA = """
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    market TEXT NOT NULL,
+    date TEXT,
+    fullstartdate TEXT,
+    image_id TEXT,
+    hsh TEXT,
+    copyright TEXT,
+    description TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX items_market_date ON items (market, date);
+CREATE INDEX items_date ON items (date);
+CREATE INDEX items_image_id ON items (image_id);
+CREATE INDEX items_hsh ON items (hsh);
+CREATE TABLE placements (
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    PRIMARY KEY (file, position)
+) WITHOUT ROWID;
+CREATE INDEX placements_item ON placements (item_id, kind);
+CREATE VIRTUAL TABLE items_fts USING fts5 (
+    copyright, description, content='items', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, copyright, description) VALUES (new.id, new.copyright, new.description);
+END;
+CREATE TRIGGER items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, copyright, description)
+    VALUES ('delete', old.id, old.copyright, old.description);
+END;
+"""
+
+COLUMNS = ("key", "market", "date", "fullstartdate", "image_id", "hsh", "copyright", "description", "data")
+
+
+# ====== 连接和同步 ======
+def connect(db_path=DB_PATH, readonly=False):
+    """打开数据库；表结构版本不一致时（包括新建的数据库）删除旧表重建"""
+    if readonly:
+        conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        with conn:
+            for table in TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def file_kind(name):
+    parent = Path(name).parent.name
+    if not parent:
+        return "root"
+    return "years" if parent.isdigit() else parent
+
+
+def item_row(market, item):
+    data = json.dumps(item, ensure_ascii=False)
+    values = {
+        "date": item.get("date"),
+        "fullstartdate": item.get("fullstartdate"),
+        "image_id": bing_url.ohr_id(item.get("urlbase") or item.get("url") or ""),
+        "hsh": item.get("hsh"),
+        "copyright": item.get("copyright"),
+        "description": item.get("description"),
+    }
+    # 字段类型不对的记录也能导入（原样保存在 data 中），索引列只接受字符串
+    values = [value if isinstance(value, str) else None for value in values.values()]
+    key = hashlib.sha1(f"{market}\n{data}".encode("utf-8")).hexdigest()
+    return (key, market, *values, data)
+
+
+def import_file(conn, name, stat, digest, data):
+    """
+    重新导入一个文件：替换它的 placements，新出现的记录加入 items。
+    返回 (没有 fullstartdate 和 date 的记录数, 不是对象而跳过的元素数)
+    """
+    market = market_of(name)
+    kind = file_kind(name)
+    items = json_codec.loads(data.decode("utf-8"))
+    rows = [item_row(market, item) for item in items if isinstance(item, dict)]
+    conn.executemany(
+        f"INSERT OR IGNORE INTO items ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows
+    )
+    conn.execute("DELETE FROM placements WHERE file = ?", (name,))
+    conn.executemany(
+        "INSERT INTO placements (file, position, kind, item_id) "
+        "SELECT ?, ?, ?, id FROM items WHERE key = ?",
+        ((name, position, kind, row[0]) for position, row in enumerate(rows)),
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+        (name, stat.st_size, stat.st_mtime_ns, digest),
+    )
+    undated = sum(1 for row in rows if not (row[3] or row[2]))
+    return undated, len(items) - len(rows)
+
+
+def sync(db_path=DB_PATH, base_dir=BASE_DIR, force=False):
+    """
+    把有变化的 JSON 文件导入数据库，删除已不存在的文件，
+    返回 (重新导入的文件数, 删除的文件数, 导入文件中没有日期的记录数, 跳过的元素数)。
+    大小和修改时间不变的文件直接跳过；只有修改时间变化（例如重新检出）时比较 SHA-1，内容相同不重新导入。
+    不再被任何文件引用的记录最后一起删除
+    """
+    base_dir = Path(base_dir)
+    conn = connect(db_path)
+    try:
+        with conn:
+            known = {row["path"]: row for row in conn.execute("SELECT * FROM files")}
+            names = view_names(base_dir)
+            imported = undated = skipped = 0
+            for name in names:
+                path = base_dir / name
+                stat = path.stat()
+                row = known.get(name)
+                if not force and row and row["size"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                data = path.read_bytes()
+                digest = hashlib.sha1(data).hexdigest()
+                if not force and row and row["sha1"] == digest:
+                    conn.execute("UPDATE files SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, name))
+                    continue
+                file_undated, file_skipped = import_file(conn, name, stat, digest, data)
+                undated += file_undated
+                skipped += file_skipped
+                imported += 1
+            removed = sorted(set(known) - set(names))
+            for name in removed:
+                conn.execute("DELETE FROM placements WHERE file = ?", (name,))
+                conn.execute("DELETE FROM files WHERE path = ?", (name,))
+            if imported or removed:
+                conn.execute("DELETE FROM items WHERE id NOT IN (SELECT item_id FROM placements)")
+    finally:
+        conn.close()
+    return imported, len(removed), undated, skipped
+
+
+# ====== 查询 ======
+def _select(conn, clause, params, scope, newest_first=False):
+    """
+    查询 items；scope 不是 "all" 时只包含出现在该类文件中的记录。
+    同一市场同一天 (fullstartdate/date) 内容不同的记录只保留第一条；
+    两个日期都没有的记录无法按天去重，按各自的内容 (key) 全部保留
+    """
+    if scope != "all":
+        clause += " AND EXISTS (SELECT 1 FROM placements WHERE item_id = items.id AND kind = ?)"
+        params = [*params, scope]
+    order = "date DESC" if newest_first else "date"
+    seen = set()
+    rows = []
+    for row in conn.execute(f"SELECT * FROM items WHERE {clause} ORDER BY {order}, market, id", params):
+        day = row["fullstartdate"] or row["date"]
+        key = (row["market"], day) if day else row["key"]
+        if key not in seen:
+            seen.add(key)
+            rows.append(row)
+    return rows
+
+
+def find_records(conn, market=None, start=None, end=None, scope="years"):
+    """按市场和日期范围（YYYYMMDD，包含两端）查询，按日期从新到旧、市场排序"""
+    clause, params = "1", []
+    if market:
+        clause += " AND market = ?"
+        params.append(market)
+    if start:
+        clause += " AND date >= ?"
+        params.append(start)
+    if end:
+        clause += " AND date <= ?"
+        params.append(end)
+    return _select(conn, clause, params, scope, newest_first=True)
+
+
+def find_image(conn, image_id, scope="all"):
+    """出现过该图片的所有记录，按日期从旧到新"""
+    return _select(conn, "image_id = ?", [image_id], scope)
+
+
+def find_hsh(conn, hsh, scope="all"):
+    return _select(conn, "hsh = ?", [hsh], scope)
+
+
+def search(conn, text, market=None, scope="years", limit=50):
+    """
+    在 copyright 和 description 中搜索，多个词之间为 AND，每个词按子串匹配（不区分大小写）。
+    三个字符以上的词使用全文索引，更短的词在索引结果（全部是短词时为所有记录）中逐条比较
+    """
+    terms = text.split()
+    long_terms = [term for term in terms if len(term) >= FTS_MIN_TERM]
+    clause, params = "1", []
+    if long_terms:
+        clause += " AND id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)"
+        params.append(" ".join('"' + term.replace('"', '""') + '"' for term in long_terms))
+    for term in terms:
+        if len(term) < FTS_MIN_TERM:
+            clause += " AND (instr(lower(copyright), ?) OR instr(lower(description), ?))"
+            params.extend([term.lower()] * 2)
+    if market:
+        clause += " AND market = ?"
+        params.append(market)
+    rows = _select(conn, clause, params, scope, newest_first=True)
+    return rows[:limit] if limit else rows
+
+
+def month_range(month):
+    """YYYYMM -> (YYYYMM01, YYYYMM31)；日期按字符串比较，31 可以覆盖所有月份"""
+    return f"{month}01", f"{month}31"
+
+
+# ====== 命令行 ======
+def print_rows(rows, as_json):
+    if as_json:
+        print(json.dumps([json.loads(row["data"]) for row in rows], ensure_ascii=False, indent=2))
+        return
+    for row in rows:
+        print(f"  {row['date'] or '-':<8} {row['market']:<6} {row['image_id'] or '-':<32} {row['copyright'] or ''}")
+
+
+def print_sync_warnings(undated, skipped):
+    if undated:
+        print(f"  Warning: {undated} imported record(s) have neither fullstartdate nor date")
+    if skipped:
+        print(f"  Warning: {skipped} array element(s) skipped because they are not objects")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SQLite database of the archive JSON files.")
+    parser.add_argument("--db", default=str(DB_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sync_p = sub.add_parser("sync", help="import changed JSON files into the database")
+    sync_p.add_argument("--force", action="store_true", help="re-import every file")
+
+    def add_query(p, scope):
+        p.add_argument("--scope", choices=SCOPES, default=scope, help=f"which files to read (default: {scope})")
+        p.add_argument("--json", action="store_true", help="print the original records as JSON")
+
+    records_p = sub.add_parser("records", help="records by market and date")
+    records_p.add_argument("--market")
+    records_p.add_argument("--month", help="YYYYMM")
+    records_p.add_argument("--from", dest="start", help="YYYYMMDD")
+    records_p.add_argument("--to", dest="end", help="YYYYMMDD")
+    add_query(records_p, "years")
+
+    image_p = sub.add_parser("image", help="markets and dates that showed an image")
+    image_p.add_argument("image_id", help="OHR ID, e.g. OHR.JulierPass")
+    add_query(image_p, "all")
+
+    hsh_p = sub.add_parser("hsh", help="records with this hsh")
+    hsh_p.add_argument("hsh")
+    add_query(hsh_p, "all")
+
+    search_p = sub.add_parser("search", help="full-text search in copyright and description")
+    search_p.add_argument("text")
+    search_p.add_argument("--market")
+    search_p.add_argument("--limit", type=int, default=50, help="0 for no limit")
+    add_query(search_p, "years")
+
+    sql_p = sub.add_parser("sql", help="run a read-only SQL query")
+    sql_p.add_argument("query")
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.command == "sync":
+        imported, removed, undated, skipped = sync(args.db, force=args.force)
+        print(f"✓ Synced {args.db}: {imported} file(s) imported, {removed} removed in {time.perf_counter() - start:.2f}s")
+        print_sync_warnings(undated, skipped)
+        return 0
+
+    if not Path(args.db).exists():
+        print(f"{args.db} not found, run `python python/archive_db.py sync` first")
+        return 1
+    conn = connect(args.db, readonly=True)
+    if args.command == "sql":
+        rows = conn.execute(args.query).fetchall()
+        for row in rows:
+            print("\t".join("" if value is None else str(value) for value in row))
+    elif args.command == "records":
+        first, last = month_range(args.month) if args.month else (args.start, args.end)
+        rows = find_records(conn, args.market, first, last, args.scope)
+        print_rows(rows, args.json)
+    elif args.command == "image":
+        rows = find_image(conn, args.image_id, args.scope)
+        if not args.json:
+            markets = sorted({row["market"] for row in rows})
+            print(f"{args.image_id}: {len(markets)} market(s) {', '.join(markets)}")
+        print_rows(rows, args.json)
+    elif args.command == "hsh":
+        rows = find_hsh(conn, args.hsh, args.scope)
+        print_rows(rows, args.json)
+    else:
+        rows = search(conn, args.text, args.market, args.scope, args.limit)
+        print_rows(rows, args.json)
+    conn.close()
+    print(f"{len(rows)} row(s) in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
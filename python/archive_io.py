@@ -0,0 +1,183 @@
+import sys
+from pathlib import Path
+
+import json_codec
+
+# 存档文件的统一读写入口。
+# 同一次运行中，每个文件按 路径 + mtime 缓存解析结果，修改后只标记为 dirty，
+# 最后调用 flush() 统一写回，这样每个文件最多解析一次、写入一次。
+# 设置 compact_mirror = (源目录, 目标目录) 后，写入源目录下的文件时
+# 还会在目标目录写一份最小化的副本，供前端等机器读取。
+# load_many() / flush() 可以传入 concurrent.futures 的进程池，
+# 把解析和序列化分散到多个核心上（批量修复等一次处理大量文件的场景）。
+
+
+def _read_file(path):
+    """读取并解析一个文件，返回 (mtime, data, 是否以换行结尾)；文件不存在时返回 None"""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    text = path.read_text(encoding="utf-8")
+    return mtime, json_codec.loads(text), text.endswith("\n")
+
+
+def _write_file(path, data, indent, newline, compact_path):
+    """序列化并写入一个文件（以及可选的最小化副本），返回写入后的 mtime"""
+    text = json_codec.dumps_pretty(data, indent=indent)
+    # 保持文件原有的结尾换行习惯，避免无意义的 diff
+    if newline:
+        text += "\n"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    if compact_path is not None:
+        compact_path.parent.mkdir(parents=True, exist_ok=True)
+        compact_path.write_text(json_codec.dumps_compact(data), encoding="utf-8")
+    return path.stat().st_mtime_ns
+
+
+class ArchiveFiles:
+    def __init__(self, indent=4, compact_mirror=None):
+        self.indent = indent
+        self.compact_mirror = compact_mirror
+        self._entries = {}  # path -> {"mtime": int | None, "data": ..., "newline": bool}
+        self._dirty = {}    # path -> None，按标记顺序写回
+
+    def load(self, path, default=list):
+        """
+        读取并缓存 JSON 文件；文件不存在时返回 default() 并缓存这个对象，
+        之后对它的修改在 mark_dirty 后同样会被写回。
+        """
+        path = Path(path)
+        entry = self._entries.get(path)
+        if entry is not None and path in self._dirty:
+            return entry["data"]
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            if entry is not None and entry["mtime"] is None:
+                return entry["data"]
+            data = default()
+            self._entries[path] = {"mtime": None, "data": data, "newline": False}
+            return data
+        if entry is not None and entry["mtime"] == mtime:
+            return entry["data"]
+
+        text = path.read_text(encoding="utf-8")
+        data = json_codec.loads(text)
+        self._entries[path] = {"mtime": mtime, "data": data, "newline": text.endswith("\n")}
+        return data
+
+    def _is_fresh(self, path):
+        entry = self._entries.get(path)
+        if entry is None:
+            return False
+        if path in self._dirty:
+            return True
+        try:
+            return entry["mtime"] == path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return entry["mtime"] is None
+
+    def load_many(self, paths, executor=None, default=list):
+        """
+        读取多个文件，返回 {path: data}。
+        传入 executor 时，缓存中没有的文件在 executor 中并行读取和解析。
+        """
+        paths = [Path(p) for p in paths]
+        if executor is not None:
+            todo = [path for path in paths if not self._is_fresh(path)]
+            for path, result in zip(todo, executor.map(_read_file, todo)):
+                if result is not None:
+                    mtime, data, newline = result
+                    self._entries[path] = {"mtime": mtime, "data": data, "newline": newline}
+        return {path: self.load(path, default) for path in paths}
+
+    def mark_dirty(self, path, data=None):
+        """标记文件需要写回；传入 data 时替换缓存中的内容"""
+        path = Path(path)
+        entry = self._entries.setdefault(path, {"mtime": None, "data": data, "newline": False})
+        if data is not None:
+            entry["data"] = data
+        self._dirty[path] = None
+
+    def is_dirty(self, path):
+        return Path(path) in self._dirty
+
+    def dumps(self, path):
+        entry = self._entries[Path(path)]
+        text = json_codec.dumps_pretty(entry["data"], indent=self.indent)
+        # 保持文件原有的结尾换行习惯，避免无意义的 diff
+        return text + "\n" if entry["newline"] else text
+
+    def _write_args(self, path):
+        entry = self._entries[path]
+        return path, entry["data"], self.indent, entry["newline"], self.compact_path(path)
+
+    def compact_path(self, path):
+        """返回 path 对应的最小化副本路径；未设置镜像或不在源目录下时返回 None"""
+        if self.compact_mirror is None:
+            return None
+        src_root, dst_root = (Path(p) for p in self.compact_mirror)
+        try:
+            return dst_root / Path(path).relative_to(src_root)
+        except ValueError:
+            return None
+
+    def write(self, path, data=None):
+        """立即写入单个文件（不等待 flush）"""
+        path = Path(path)
+        self.mark_dirty(path, data)
+        self._entries[path]["mtime"] = _write_file(*self._write_args(path))
+        del self._dirty[path]
+
+    def flush(self, executor=None, paths=None):
+        """
+        按标记顺序写回所有 dirty 文件，返回写入的路径列表。
+        传入 executor 时在 executor 中并行序列化和写入；传入 paths 时只写回其中 dirty 的文件。
+        """
+        written = list(self._dirty)
+        if paths is not None:
+            paths = {Path(p) for p in paths}
+            written = [path for path in written if path in paths]
+        if executor is None:
+            for path in written:
+                self.write(path)
+            return written
+        futures = [executor.submit(_write_file, *self._write_args(path)) for path in written]
+        for path, future in zip(written, futures):
+            self._entries[path]["mtime"] = future.result()
+            del self._dirty[path]
+        return written
+
+
+# 默认的共享实例
+files = ArchiveFiles()
+
+
+def load_json(path, default=list):
+    return files.load(path, default)
+
+
+def write_json(path, data):
+    files.write(path, data)
+
+
+def export_compact(src_root, dst_root):
+    """把 src_root 下所有 JSON 文件写成最小化副本到 dst_root（保持相对路径），返回文件数"""
+    src_root, dst_root = Path(src_root), Path(dst_root)
+    count = 0
+    for path in sorted(src_root.rglob("*.json")):
+        if dst_root in path.parents:
+            continue
+        target = dst_root / path.relative_to(src_root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json_codec.dumps_compact(files.load(path)), encoding="utf-8")
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    # 用法: python python/archive_io.py bing bing/min   （生成全部文件的最小化副本）
+    src, dst = sys.argv[1:3]
+    print(f"Wrote {export_compact(src, dst)} compact file(s) to {dst} (codec: {json_codec.BACKEND})")
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import archive_io
+
+# 追加式日志存储：主目录的 bing_{lang}.json（index.html 读取）每天照常更新，
+# 年份文件的新记录以一行一个 JSON 对象的形式追加到 bing/journal/bing_{lang}.ndjson，
+# 年份文件在压缩(compact)时才统一更新。
+JOURNAL_DIR = Path("bing/journal")
+
+# 单个市场的日志累计到这么多条记录时自动压缩
+COMPACT_THRESHOLD = int(os.environ.get("BING_JOURNAL_COMPACT_THRESHOLD", 31))
+
+
+def journal_path(file_lang):
+    return JOURNAL_DIR / f"bing_{file_lang}.ndjson"
+
+
+def append_records(file_lang, records):
+    """把新记录追加到日志末尾，返回日志中的记录总数"""
+    path = journal_path(file_lang)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(read_journal(file_lang))
+
+
+def read_journal(file_lang):
+    path = journal_path(file_lang)
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            # 中断的写入可能留下半行，跳过即可（下次抓取会重新追加）
+            print(f"  Warning: skipping malformed line in {path}")
+    return records
+
+
+def journal_langs():
+    if not JOURNAL_DIR.exists():
+        return []
+    return sorted(p.stem[len("bing_"):] for p in JOURNAL_DIR.glob("bing_*.ndjson"))
+
+
+def compact(file_lang, merge=None):
+    """
+    把日志中的记录合并进年份 JSON 文件（主目录文件通常已有这些记录，已有的不会重复添加），
+    然后删除日志，返回合并的记录数。先写 JSON 再删日志，中途失败时重复合并会被去重，不会丢数据。
+    只立即写回这次合并涉及的文件，其它 dirty 文件仍由调用方最后统一 flush。
+
+    merge 是合并函数 merge_into_archive(file_lang, records)，返回它涉及的文件路径。
+    日常运行时 bing_260204.py 作为 __main__ 执行，必须传入它自己的 merge_into_archive：
+    在这里 import bing_260204 会得到模块的第二份副本，合并产生的 index_deltas 记在副本中，
+    data_index.json 的增量更新就会漏掉这些记录。不传时（单独执行本脚本）才导入 bing_260204。
+    """
+    if merge is None:
+        # 延迟导入，避免与 bing_260204 循环引用
+        from bing_260204 import merge_into_archive as merge
+
+    records = read_journal(file_lang)
+    if records:
+        print(f"Compacting {len(records)} journal record(s) for {file_lang}...")
+        paths = merge(file_lang, records)
+        archive_io.files.flush(paths=paths)
+    journal_path(file_lang).unlink(missing_ok=True)
+    return len(records)
+
+
+def main():
+    # 用法: python python/archive_journal.py [lang ...]   （在仓库根目录执行，不带参数时压缩全部日志）
+    langs = sys.argv[1:] or journal_langs()
+    merged = sum(compact(lang) for lang in langs)
+    print(f"Compacted {len(langs)} journal(s), {merged} record(s) merged.")
+    if merged:
+        from bing_260204 import generate_data_index
+        generate_data_index()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import os
+import random
+import runpy
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 存档流水线的基准测试：在临时目录中按现有记录格式生成指定规模的合成存档
+# （市场数 × 年数），分别测量各阶段的耗时和峰值内存。
+#
+# 用法（在仓库根目录执行）:
+#   python python/benchmark_archive.py --markets 13 --years 2
+#   python python/benchmark_archive.py --markets 60 --years 30 --stages merge,index_full --out bench.json
+#   python python/benchmark_archive.py --baseline bench.json --tolerance 1.5   # 变慢超过 1.5 倍时返回非零
+
+PYTHON_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(PYTHON_DIR))
+
+import archive_io  # noqa: E402
+import data_index  # noqa: E402
+import json_codec  # noqa: E402
+
+REAL_MARKETS = ["ROW", "de-DE", "en-CA", "en-GB", "en-IN", "en-US", "es-ES",
+                "fr-CA", "fr-FR", "it-IT", "ja-JP", "pt-BR", "zh-CN"]
+STAGES = ["merge", "daily_write", "index_full", "index_incremental", "repair", "repair_parallel",
+          "similarity", "pipeline"]
+WORDS = ["Lake", "Valley", "Canyon", "Island", "Forest", "Harbor", "Glacier", "Desert",
+         "Castle", "Bridge", "Coast", "Meadow", "Summit", "River", "Aurora", "Reef"]
+
+
+def market_codes(count):
+    codes = REAL_MARKETS[:count]
+    codes.extend(f"x{i:02d}-XX" for i in range(count - len(codes)))
+    return codes
+
+
+def make_record(day, market, name, rng):
+    date = day.strftime("%Y%m%d")
+    suffix = market.replace("-", "").upper()[:4]
+    urlbase = f"https://www.bing.com/th?id=OHR.{name}_{suffix}{rng.randrange(10**9, 10**10)}"
+    place = " ".join(rng.choice(WORDS) for _ in range(3))
+    record = {
+        "fullstartdate": (day - timedelta(days=1)).strftime("%Y%m%d") + "0800",
+        "date": date,
+        "url": urlbase + "_1920x1080.jpg",
+        "urlbase": urlbase,
+        "copyright": f"{place}, Somewhere (© Photographer/Getty Images)",
+        "copyrightKeyword": place,
+        "hsh": hashlib.md5(f"{name}{market}".encode("utf-8")).hexdigest(),
+        "description": " ".join(rng.choice(WORDS).lower() for _ in range(60)),
+    }
+    if rng.random() < 0.7:
+        record["maplink"] = f"{rng.uniform(-60, 60):.6f},{rng.uniform(-180, 180):.6f}"
+    return record
+
+
+def generate_archive(root, markets, years, end_date, seed=0):
+    """生成 root/bing/ 下的主目录文件、年份文件和 weekly 文件，返回记录总数"""
+    rng = random.Random(seed)
+    end = datetime.strptime(end_date, "%Y%m%d")
+    start = datetime(end.year - years + 1, 1, 1)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    # 大部分市场共用当天的 ROW 图片，少数市场使用独立图片
+    shared = [f"{rng.choice(WORDS)}{rng.choice(WORDS)}{i}" for i in range(len(days))]
+
+    base = Path(root) / "bing"
+    total = 0
+    for index, market in enumerate(market_codes(markets)):
+        independent = index % 7 == 6
+        records = []
+        for i, day in enumerate(reversed(days)):
+            name = shared[len(days) - 1 - i]
+            if independent or rng.random() < 0.1:
+                name = f"{name}{market[:2].upper()}"
+            records.append(make_record(day, market, name, rng))
+        total += len(records)
+
+        by_year = {}
+        for record in records:
+            by_year.setdefault(record["date"][:4], []).append(record)
+        for year, year_records in by_year.items():
+            _dump(base / year / f"bing_{market}.json", year_records)
+        _dump(base / f"bing_{market}.json", records)
+        _dump(base / "weekly" / f"bing_{market}.json", records[:8])
+    (Path(root) / "python").mkdir(exist_ok=True)
+    return total
+
+
+def _dump(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json_codec.dumps_pretty(data), encoding="utf-8")
+
+
+def next_batch(work, market):
+    """模拟一次日常抓取：最近 7 条已有记录 + 1 条新记录"""
+    recent = json.loads((work / "bing" / "weekly" / f"bing_{market}.json").read_text(encoding="utf-8"))
+    newest = datetime.strptime(recent[0]["date"], "%Y%m%d") + timedelta(days=1)
+    rng = random.Random(market)
+    return [make_record(newest, market, f"NewImage{market[:2].upper()}", rng)] + recent[:7]
+
+
+# ====== 各阶段 ======
+# 每个阶段接收工作目录（已切换为当前目录）和市场列表；setup 在计时之外执行
+
+def stage_merge(work, markets):
+    from bing_260204 import update_and_merge_images
+    inputs = []
+    for market in markets:
+        existing = json.loads((work / "bing" / f"bing_{market}.json").read_text(encoding="utf-8"))
+        inputs.append((existing, next_batch(work, market)))
+
+    def run():
+        for existing, batch in inputs:
+            update_and_merge_images(list(existing), copy.deepcopy(batch))
+    return run
+
+
+def stage_daily_write(work, markets):
+    import bing_260204
+    # index_deltas 是模块级的计数器，不清空时每次重复运行都会叠加上一次的增量
+    bing_260204.index_deltas.clear()
+    batches = {market: next_batch(work, market) for market in markets}
+
+    def run():
+        previous_index = data_index.load_verified_index()
+        for market, batch in batches.items():
+            bing_260204.merge_into_archive(market, batch)
+        archive_io.files.flush()
+        bing_260204.generate_data_index(previous_index)
+    return run
+
+
+def stage_index_full(work, markets):
+    return lambda: data_index.rebuild(datetime.now().year)
+
+
+def stage_index_incremental(work, markets):
+    data_index.rebuild(datetime.now().year)
+    deltas = {(str(datetime.now().year), f"bing_{market}"): 1 for market in markets}
+
+    def run():
+        index = data_index.load_verified_index()
+        data_index.write_index(data_index.apply_deltas(index, deltas, datetime.now().year))
+    return run
+
+
+def stage_repair(work, markets):
+    import repair_archive_data
+    return repair_archive_data.main
+
+
+def stage_repair_parallel(work, markets):
+    # 不受 PARALLEL_MIN_FILES / PARALLEL_MIN_BYTES 限制，始终使用进程池，与 repair 阶段对比来调整阈值
+    import repair_archive_data
+
+    def run():
+        with ProcessPoolExecutor() as executor:
+            repair_archive_data.repair(executor)
+    return run
+
+
+def stage_similarity(work, markets):
+    script = str(PYTHON_DIR / "Similarity-Retrieval.py")
+
+    def run():
+        # 脚本使用相对路径 ../bing/，需要在 python/ 目录下执行
+        os.chdir(work / "python")
+        try:
+            runpy.run_path(script, run_name="__main__")
+        finally:
+            os.chdir(work)
+    return run
+
+
+def stage_pipeline(work, markets):
+    # 端到端: 本地回放服务器 -> 抓取 -> 匹配描述 -> 合并 -> 写入
+    import replay_server
+    from bing_260204 import languages
+    records = {}
+    for lang in languages:
+        file_lang = "ROW" if lang == "zh-TW" else lang
+        if file_lang in markets:
+            records[lang] = next_batch(work, file_lang)
+    replay_server.write_fixtures(work / "fixtures", records)
+
+    def run():
+        server = replay_server.start_server(work / "fixtures")
+        try:
+            replay_server.run_pipeline(server.base_url)
+        finally:
+            server.shutdown()
+    return run
+
+
+STAGE_FUNCS = {
+    "merge": stage_merge,
+    "daily_write": stage_daily_write,
+    "index_full": stage_index_full,
+    "index_incremental": stage_index_incremental,
+    "repair": stage_repair,
+    "repair_parallel": stage_repair_parallel,
+    "similarity": stage_similarity,
+    "pipeline": stage_pipeline,
+}
+
+
+def run_stage(name, pristine, scratch, markets, repeat):
+    times = []
+    peak = 0
+    cwd = os.getcwd()
+    # 最后一次额外运行用于测量峰值内存（tracemalloc 会拖慢速度，不计入耗时）
+    for attempt in range(repeat + 1):
+        work = scratch / name
+        if work.exists():
+            shutil.rmtree(work)
+        shutil.copytree(pristine, work)
+        os.chdir(work)
+        archive_io.files = archive_io.ArchiveFiles()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run = STAGE_FUNCS[name](work, markets)
+                if attempt < repeat:
+                    start = time.perf_counter()
+                    run()
+                    times.append(time.perf_counter() - start)
+                else:
+                    tracemalloc.start()
+                    run()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+        finally:
+            os.chdir(cwd)
+    return {
+        "best_s": round(min(times), 4),
+        "median_s": round(statistics.median(times), 4),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    regressions = []
+    for name, result in results["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if old and old["best_s"] > 0 and result["best_s"] > old["best_s"] * tolerance:
+            regressions.append(f"{name}: {old['best_s']}s -> {result['best_s']}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the archive pipeline on a synthetic archive.")
+    parser.add_argument("--markets", type=int, default=13)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--end-date", default="20260821")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --out file")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGE_FUNCS)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    for name in ("similarity", "pipeline"):
+        if name in stages and args.markets < len(REAL_MARKETS):
+            # Similarity-Retrieval.py 和 bing_260204.py 固定使用 13 个真实市场
+            print(f"Skipping {name}: needs at least {len(REAL_MARKETS)} markets")
+            stages.remove(name)
+
+    with tempfile.TemporaryDirectory(prefix="bing-bench-") as tmp:
+        tmp = Path(tmp)
+        pristine = tmp / "pristine"
+        start = time.perf_counter()
+        total = generate_archive(pristine, args.markets, args.years, args.end_date, args.seed)
+        print(f"Synthetic archive: {args.markets} markets x {args.years} years, "
+              f"{total} records ({time.perf_counter() - start:.1f}s to generate)")
+
+        markets = market_codes(args.markets)
+        results = {
+            "markets": args.markets,
+            "years": args.years,
+            "records": total,
+            "codec": json_codec.BACKEND,
+            "stages": {},
+        }
+        print(f"{'stage':<20}{'best (s)':>10}{'median (s)':>12}{'peak (MB)':>12}")
+        for name in stages:
+            result = run_stage(name, pristine, tmp / "work", markets, args.repeat)
+            results["stages"][name] = result
+            print(f"{name:<20}{result['best_s']:>10.4f}{result['median_s']:>12.4f}{result['peak_mb']:>12.2f}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {args.out}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("Regressions (> x{:.2f}):".format(args.tolerance))
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,22 @@
-import requests
-import json
 import os
+from collections import Counter
 from datetime import datetime, timezone, timedelta
-import urllib.parse
-import time
-import re
-
-print("Starts time: ", datetime.now(timezone.utc))
-
-# --- NEW: Helper function for retrying failed requests ---
-def fetch_with_retry(url, retries=3, delay=5, timeout=10):
-    """Tries to fetch a URL with a specified number of retries."""
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status() # Will raise an error for bad status codes
-            return response.json() # Return JSON data on success
-        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-            print(f"  Attempt {attempt + 1}/{retries} failed for {url}: {e}")
-            if attempt < retries - 1:
-                print(f"  Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                print(f"  Failed to fetch {url} after {retries} attempts.")
-                return None # Return None on final failure
+
+import archive_db
+import archive_io
+import archive_journal
+import bing_url
+import data_index
+import image_store
+import month_views
+import publish_assets
+import search_index
+from bing_fetch import MAX_WORKERS, HOST_MIN_INTERVAL, UNCHANGED, HttpCache, fetch_markets
 
 # --- NEW: Extract coordinates from MapLink URL ---
 def extract_maplink_coordinates(url_string):
     """从MapLink URL中提取pp参数的坐标值"""
-    if not url_string:
-        return None
-    # 使用正则表达式匹配 pp=坐标 的模式
-    match = re.search(r'[&?]pp=([0-9.-]+,[0-9.-]+)', url_string)
-    if match:
-        return match.group(1)
-    return None
+    return bing_url.maplink_coordinates(url_string)
 
 # --- NEW: Date adjustment function ---
 def adjust_date(date_str, subtract_day=False):
@@ -55,42 +37,82 @@ def adjust_date(date_str, subtract_day=False):
         print(f"  Error adjusting date {date_str}: {e}")
         return date_str
 
+# 在按日期倒序排列的列表中查找插入位置（排在相同日期的记录之后，与稳定排序结果一致）
+def descending_insert_index(images, date, date_field='date'):
+    lo, hi = 0, len(images)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (images[mid].get(date_field) or '') >= date:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
 # --- NEW: Updated merge function to fill missing descriptions ---
 def update_and_merge_images(existing_images, new_images, date_field='date', unique_field='fullstartdate'):
     """
     Merges new images into an existing list,
     updating only stable metadata for existing images. Optional fields such as
     description/maplink are left as-is when missing.
+    Returns (images, add_count); the list is only re-sorted when something was added.
+
+    The archive is normally already sorted by date (descending), so new images are
+    inserted in place with a binary search on the raw YYYYMMDD strings; an unsorted
+    list falls back to a full sort.
     """
-    # Create a set of existing unique IDs for quick lookup
-    existing_ids = {img[unique_field] for img in existing_images if unique_field in img}
+    # 一次遍历建立索引：unique_field 集合、日期集合，并检查是否已按日期倒序排列
+    existing_ids = set()
+    existing_dates = set()
+    is_sorted = True
+    previous_date = None
+    for img in existing_images:
+        if unique_field in img:
+            existing_ids.add(img[unique_field])
+        date = img.get(date_field) or ''
+        if date:
+            existing_dates.add(date)
+        if previous_date is not None and date > previous_date:
+            is_sorted = False
+        previous_date = date
 
     # Existing images are kept stable. Do not backfill description/maplink:
     # some regions or images intentionally do not expose those fields.
 
     # 2. Add new images
-    add_count = 0
+    added = []
     for new_img in new_images:
         # Check by unique_field if available
         if unique_field and unique_field in new_img:
-            if new_img[unique_field] not in existing_ids:
-                existing_images.append(new_img)
-                existing_ids.add(new_img[unique_field])
-                add_count += 1
+            if new_img[unique_field] in existing_ids:
+                continue
+            existing_ids.add(new_img[unique_field])
         # Fallback for old data that might not have unique_field
         elif date_field in new_img:
-            existing_dates = {img[date_field] for img in existing_images if date_field in img}
-            if new_img[date_field] not in existing_dates:
-                 existing_images.append(new_img)
-                 add_count += 1
-    
-    if add_count > 0:
-        print(f"  Added {add_count} new image(s).")
-
-
-    # 按日期倒序排序
-    existing_images.sort(key=lambda x: datetime.strptime(x[date_field], '%Y%m%d'), reverse=True)
-    return existing_images
+            if new_img[date_field] in existing_dates:
+                continue
+        else:
+            continue
+        if new_img.get(date_field):
+            existing_dates.add(new_img[date_field])
+        added.append(new_img)
+
+    add_count = len(added)
+    if add_count == 0:
+        # 没有新增记录时原列表已是有序的,无需重新排序
+        return existing_images, add_count
+
+    print(f"  Added {add_count} new image(s).")
+
+    if is_sorted:
+        # 按日期倒序插入到对应位置
+        for new_img in added:
+            index = descending_insert_index(existing_images, new_img.get(date_field) or '', date_field)
+            existing_images.insert(index, new_img)
+    else:
+        # 原数据无序时退回到整体排序
+        existing_images.extend(added)
+        existing_images.sort(key=lambda x: x.get(date_field) or '', reverse=True)
+    return existing_images, add_count
 # --- END of NEW functions ---
 
 
@@ -101,14 +123,46 @@ languages = ['zh-TW', 'en-US', 'en-CA', 'en-GB', 'en-IN', 'es-ES', 'fr-FR', 'fr-
 # UK summer-time wallpapers at 23:00 UTC, making startdate one day early.
 USE_STARTDATE_LANGUAGES = ['en-CA', 'en-US', 'fr-CA', 'pt-BR', 'zh-TW']
 
+# 并发抓取配置，可通过环境变量覆盖
+FETCH_WORKERS = int(os.environ.get('BING_FETCH_WORKERS', MAX_WORKERS))
+FETCH_HOST_INTERVAL = float(os.environ.get('BING_FETCH_HOST_INTERVAL', HOST_MIN_INTERVAL))
+# 失败的请求每一轮结束后统一等待这么多秒再重试（在主线程中等待，不占用抓取线程）
+FETCH_RETRY_DELAY = float(os.environ.get('BING_FETCH_RETRY_DELAY', 5))
+
+# 接口地址前缀，可指向本地回放服务器 (python/replay_server.py)
+API_BASE = os.environ.get('BING_API_BASE', 'https://www.bing.com')
+
+# 设置后把每个接口的原始响应保存为回放夹具
+RECORD_DIR = os.environ.get('BING_RECORD_DIR')
+
+# 存储方式: "json" 直接读改写 JSON 文件; "journal" 主目录 bing_{lang}.json（index.html 读取）每次照常更新,
+# 年份文件的新记录追加到 bing/journal/*.ndjson, 日志达到阈值或手动执行 archive_journal.py 时再合并进年份文件
+# （因此日志模式下年份文件和 data_index.json 最多落后 COMPACT_THRESHOLD 天）
+STORAGE_BACKEND = os.environ.get('BING_STORAGE_BACKEND', 'json')
+
 # 获取当前年份（用于清理逻辑）
 current_year = datetime.now().year
 
 # 基础目录
 base_directories = ['./bing', './bing/weekly']
-for directory in base_directories:
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+
+# 本次运行对年份文件记录数的增减 {(year, region): delta}，用于增量更新 data_index.json
+index_deltas = Counter()
+
+# 设置后强制完整重建 data_index.json
+REBUILD_INDEX = os.environ.get('BING_REBUILD_INDEX') == '1'
+
+# 设置后，每次写入 bing/ 下的文件时同时在该目录写一份最小化副本（例如 bing/min）
+COMPACT_DIR = os.environ.get('BING_COMPACT_DIR')
+
+# 设置为 1 时，生成索引后发布带内容哈希的最小化副本和预压缩文件（bing/dist，见 publish_assets.py）
+PUBLISH_ASSETS = os.environ.get('BING_PUBLISH') == '1'
+
+# 设置为 1 时，生成索引后把有变化的 JSON 文件同步到规范化存储 image_store.json.gz（不提交到仓库，见 image_store.py）
+IMAGE_STORE = os.environ.get('BING_IMAGE_STORE') == '1'
+
+# 设置后，生成索引后把有变化的 JSON 文件同步到该路径的 SQLite 数据库（见 archive_db.py，例如 archive.db）
+ARCHIVE_DB = os.environ.get('BING_ARCHIVE_DB')
 
 # 辅助函数：根据 date 字段获取年份
 def get_year_from_date(date_str):
@@ -122,21 +176,167 @@ def get_year_from_date(date_str):
 # ====== 提取图片ID的辅助函数 ======
 def get_image_id_from_url(url_string):
     """从URL中提取唯一的图片ID (例如 'OHR.ShenandoahTrail')"""
-    if not url_string:
-        return None
-    # 正则表达式匹配 'id=' 和 '_' 之间的部分 (例如 OHR.ShenandoahTrail)
-    match = re.search(r'id=([A-Za-z0-9\.]+)_', url_string)
-    if match:
-        return match.group(1)
-    return None
-
-# 遍历每种语言
-for lang in languages:
-    print(f"\n========== Processing language: {lang} ==========")
+    return bing_url.image_id(url_string)
+
+# 描述接口中依次查找的列表 (优先使用 MediaContents)
+MEDIA_SOURCES = ('MediaContents', 'PreloadMediaContents')
+
+def match_descriptions(images_info, data_description):
+    """
+    按图片ID把描述接口中的 Description / MapLink 坐标填入 images_info。
+    先用 images_info 建立 {图片ID: 记录} 的索引，再一次遍历所有来源的条目，
+    每个条目只需一次字典查找。
+    返回 (匹配数量, {来源名: [条目中的图片ID, ...]})
+    """
+    by_id = {}
+    for image_info in images_info:
+        image_id = image_info.get('_image_id')
+        if image_id:
+            # 同一 ID 出现多次时只匹配第一条
+            by_id.setdefault(image_id, image_info)
+
+    matched_count = 0
+    ids_by_source = {}
+    for source_name in MEDIA_SOURCES:
+        if source_name not in data_description:
+            continue
+        media_list = data_description[source_name]
+        available_ids = ids_by_source[source_name] = []
+        if not isinstance(media_list, list): # Safety check
+            continue
+
+        for media_item in media_list:
+            try:
+                # 检查必要字段
+                content = media_item.get('ImageContent')
+                if not content or 'Description' not in content or \
+                   'Url' not in (content.get('Image') or {}):
+                    continue
+
+                # ====== 关键修改:从 model API 提取图片 ID ======
+                model_image_id = get_image_id_from_url(content['Image']['Url'])
+                if not model_image_id:
+                    continue
+                available_ids.append(model_image_id)
+
+                image_info = by_id.get(model_image_id)
+                # 只在还没有描述时添加
+                if image_info is None or 'description' in image_info:
+                    continue
+                image_info['description'] = content['Description']
+
+                # ====== 新增:提取 MapLink 坐标 ======
+                maplink_url = (content.get('MapLink') or {}).get('Url')
+                maplink_coordinates = extract_maplink_coordinates(maplink_url)
+                if maplink_coordinates:
+                    print(f"  Found MapLink coordinates: {maplink_coordinates} for {model_image_id}")
+                    image_info['maplink'] = maplink_coordinates
+
+                matched_count += 1
+                print(f"  ✓ [{source_name}] Matched: {model_image_id}")
+            except Exception as e:
+                print(f"  Error processing item from {source_name}: {e}")
+                continue
+
+    return matched_count, ids_by_source
+
+# 把新记录合并进主目录文件和对应年份文件，没有新增时不改写文件
+# 合并进主目录文件和年份文件，返回涉及的文件路径
+def merge_into_archive(file_lang, new_images):
+    return [merge_into_current(file_lang, new_images), *merge_into_yearly(file_lang, new_images)]
+
+# 合并进主目录文件 bing_{lang}.json（index.html 读取），返回文件路径
+def merge_into_current(file_lang, new_images):
+    file_path_current = f'./bing/bing_{file_lang}.json'
+
+    # 读取并更新主目录数据
+    print(f"\nReading existing data...")
+    existing_images_info_current = archive_io.load_json(file_path_current)
+    
+    print(f"Updating {file_path_current}...")
+    existing_images_info_current, add_count = update_and_merge_images(existing_images_info_current, new_images, date_field='date', unique_field='fullstartdate')
+    
+    if add_count > 0:
+        print(f"Writing updates back to {file_path_current}...")
+        archive_io.files.mark_dirty(file_path_current, existing_images_info_current)
+    else:
+        print(f"No changes for {file_path_current}, not rewriting.")
+    return file_path_current
+
+# 按年份分组合并进年份文件，返回涉及的年份文件路径
+def merge_into_yearly(file_lang, new_images):
+    # ====== 收集所有涉及的年份 ======
+    years_involved = set()
+    for img in new_images:
+        year = get_year_from_date(img.get('date', ''))
+        years_involved.add(year)
+    
+    print(f"Years involved in this batch: {sorted(years_involved)}")
     
-    # 定义API URL,使用不同的语言代码
-    api_url = f"https://www.bing.com/HPImageArchive.aspx?format=js&idx=0&n=8&mkt={lang}"
-    api_description = f"https://www.bing.com/hp/api/model?toWww=1&mkt={lang}"
+    # 确保所有涉及年份的目录存在
+    for year in years_involved:
+        year_dir = f'./bing/{year}'
+        if not os.path.exists(year_dir):
+            os.makedirs(year_dir)
+            print(f"Created directory: {year_dir}")
+
+    # ====== 按年份分组写入对应年份文件夹 ======
+    paths = []
+    for year in years_involved:
+        file_path_yearly = f'./bing/{year}/bing_{file_lang}.json'
+        
+        # 筛选出属于该年份的数据
+        year_images = [img for img in new_images if get_year_from_date(img.get('date', '')) == year]
+        
+        if year_images:
+            paths.append(file_path_yearly)
+            existing_yearly = archive_io.load_json(file_path_yearly)
+            print(f"Updating {file_path_yearly} with {len(year_images)} image(s)...")
+            existing_yearly, add_count = update_and_merge_images(existing_yearly, year_images, date_field='date', unique_field='fullstartdate')
+            if add_count > 0:
+                archive_io.files.mark_dirty(file_path_yearly, existing_yearly)
+                index_deltas[(year, f'bing_{file_lang}')] += add_count
+    return paths
+
+# 返回 (主目录文件中没有的记录, 年份文件中没有的记录)
+def missing_images(file_lang, images):
+    """
+    与主目录和年份文件本身的 fullstartdate 比较，而不是上次的 weekly 文件：
+    weekly 最后写入，写完主目录后中断、手工修改或修复删除了记录时，weekly 中仍有它们。
+    这些文件经 archive_io 缓存，需要合并时不会再次解析。
+    日志模式下年份文件只在压缩时更新，日志中尚未压缩的记录算作已在年份文件中。
+    """
+    pending = set()
+    if STORAGE_BACKEND == 'journal':
+        pending = {record.get('fullstartdate') for record in archive_journal.read_journal(file_lang)}
+    current_ids = {img.get('fullstartdate') for img in archive_io.load_json(f'./bing/bing_{file_lang}.json')}
+    yearly_ids = {}
+    missing_current = []
+    missing_yearly = []
+    for img in images:
+        fullstartdate = img['fullstartdate']
+        if fullstartdate not in current_ids:
+            missing_current.append(img)
+        if fullstartdate in pending:
+            continue
+        year = get_year_from_date(img.get('date', ''))
+        if year not in yearly_ids:
+            yearly = archive_io.load_json(f'./bing/{year}/bing_{file_lang}.json')
+            yearly_ids[year] = {item.get('fullstartdate') for item in yearly}
+        if fullstartdate not in yearly_ids[year]:
+            missing_yearly.append(img)
+    return missing_current, missing_yearly
+
+# ====== 每种语言对应的接口地址 ======
+def market_urls(lang):
+    """返回 (HPImageArchive 接口, 描述接口) 两个 URL"""
+    api_url = f"{API_BASE}/HPImageArchive.aspx?format=js&idx=0&n=8&mkt={lang}"
+    api_description = f"{API_BASE}/hp/api/model?toWww=1&mkt={lang}"
+    return api_url, api_description
+
+# 处理单个语言已抓取到的数据并写入文件，返回是否完成了处理
+def process_language(lang, data, data_description):
+    print(f"\n========== Processing language: {lang} ==========")
     
     # 语言不支持,会使用通用 ROW 数据(仅用于文件命名)
     original_lang = lang
@@ -149,23 +349,17 @@ for lang in languages:
     if use_startdate:
         print(f"Note: Will use startdate instead of enddate for {lang}")
 
-    try:
-        # --- MODIFIED: Use fetch_with_retry ---
-        print(f"Fetching main API: {api_url}")
-        data = fetch_with_retry(api_url)
-        
-        # 添加短暂延迟
-        time.sleep(0.5)
-        
-        print(f"Fetching description API: {api_description}")
-        data_description = fetch_with_retry(api_description)
+    # 如果任一请求失败,则跳过此语言
+    if data is None or data_description is None:
+        print(f"Skipping {original_lang} due to fetch failure.")
+        return False
 
-        # 如果任一请求失败,则跳过此语言
-        if data is None or data_description is None:
-            print(f"Skipping {original_lang} due to fetch failure.")
-            continue
-        # --- END of MODIFIED block ---
-        
+    # 两个接口的内容都与上次相同,无需读写任何存档文件
+    if data is UNCHANGED and data_description is UNCHANGED:
+        print(f"No changes for {original_lang} since last run, skipping.")
+        return True
+
+    try:
         # 调试信息
         main_images_count = len(data.get('images', []))
         print(f"Main API returned {main_images_count} images")
@@ -184,19 +378,14 @@ for lang in languages:
             preload_contents_count = len(data_description['PreloadMediaContents'])
             print(f"PreloadMediaContents found with {preload_contents_count} items")
 
-    # --- REMOVED old request/json error handling, fetch_with_retry does it ---
     except Exception as e: # Catch any other unexpected error
         print(f"An unexpected error occurred for {original_lang}: {e}")
-        continue
+        return False
 
     # 提取所需数据并格式化
     images_info = []
     for image in data.get('images', []):
         urlbase = f"https://www.bing.com{image['urlbase']}"
-        tempkey = image['copyrightlink'].replace("https://www.bing.com/search?q=", "")
-        tempkey = tempkey.split('&')[0]
-        copyrightlink = tempkey.replace('+', ' ')
-        
         # ====== 关键修改:提取图片ID用于匹配 ======
         image_id = get_image_id_from_url(image['urlbase'])
         
@@ -213,7 +402,7 @@ for lang in languages:
             'url': f"https://www.bing.com{image['urlbase']}_1920x1080.jpg",
             'urlbase': urlbase,
             'copyright': image['copyright'],
-            'copyrightKeyword': urllib.parse.unquote(copyrightlink),
+            'copyrightKeyword': bing_url.copyright_keyword(image['copyrightlink']),
             'hsh': image['hsh'],
             '_image_id': image_id  # 添加图片ID用于匹配
         }
@@ -222,85 +411,11 @@ for lang in languages:
     print(f"\nMain API image IDs: {[img['_image_id'] for img in images_info if img.get('_image_id')]}")
     
     # ====== 改进的描述匹配逻辑 ======
-    # 创建一个函数来处理描述数据
-    def process_media_contents(media_list, source_name):
-        matched_count = 0
-        available_ids = []
-        
-        if not isinstance(media_list, list): # Safety check
-            return 0, []
-
-        for media_item in media_list:
-            try:
-                # 检查必要字段
-                if 'ImageContent' not in media_item or \
-                   'Description' not in media_item['ImageContent'] or \
-                   'Image' not in media_item['ImageContent'] or \
-                   'Url' not in media_item['ImageContent']['Image']:
-                    continue
-
-                # ====== 关键修改:从 model API 提取图片 ID ======
-                model_image_url = media_item['ImageContent']['Image']['Url']
-                model_image_id = get_image_id_from_url(model_image_url)
-                
-                if not model_image_id:
-                    continue
-                    
-                available_ids.append(model_image_id)
-                description = media_item['ImageContent']['Description']
-                
-                # ====== 新增:提取 MapLink 坐标 ======
-                maplink_coordinates = None
-                if 'MapLink' in media_item['ImageContent'] and 'Url' in media_item['ImageContent']['MapLink']:
-                    maplink_url = media_item['ImageContent']['MapLink']['Url']
-                    maplink_coordinates = extract_maplink_coordinates(maplink_url)
-                    if maplink_coordinates:
-                        print(f"  Found MapLink coordinates: {maplink_coordinates} for {model_image_id}")
-                
-                # 匹配并添加描述
-                for image_info in images_info:
-                    # ====== 关键修改:使用图片ID进行匹配 ======
-                    if image_info.get('_image_id') == model_image_id:
-                        # 只在还没有描述时添加(优先使用 MediaContents)
-                        if 'description' not in image_info:
-                            image_info['description'] = description
-                            
-                            # 如果有 MapLink 坐标,也添加进去
-                            if maplink_coordinates:
-                                image_info['maplink'] = maplink_coordinates
-                            
-                            # 根据你的要求,注释掉 title 和 headline
-                            # if 'Title' in media_item['ImageContent']:
-                            #     image_info['title'] = media_item['ImageContent']['Title']
-                            # if 'Headline' in media_item['ImageContent']:
-                            #     image_info['headline'] = media_item['ImageContent']['Headline']
-                            
-                            matched_count += 1
-                            print(f"  ✓ [{source_name}] Matched: {model_image_id}")
-                        break
-                        
-            except Exception as e:
-                print(f"  Error processing item from {source_name}: {e}")
-                continue
-        
-        return matched_count, available_ids
-    
-    # 首先处理 MediaContents
-    description_count = 0
+    description_count, ids_by_source = match_descriptions(images_info, data_description)
     all_available_ids = []
-    
-    if 'MediaContents' in data_description:
-        count, ids = process_media_contents(data_description['MediaContents'], "MediaContents")
-        description_count += count
-        all_available_ids.extend(ids)
-        print(f"\nMediaContents IDs: {ids}")
-    
-    # 然后处理 PreloadMediaContents
-    if 'PreloadMediaContents' in data_description:
-        count, ids = process_media_contents(data_description['PreloadMediaContents'], "PreloadMediaContents")
-        description_count += count
+    for source_name, ids in ids_by_source.items():
         all_available_ids.extend(ids)
-        print(f"PreloadMediaContents IDs: {ids}")
+        print(f"{source_name} IDs: {ids}")
     
     # ====== 诊断信息 ======
     print(f"\n--- Summary for {original_lang} ---")
@@ -319,66 +434,39 @@ for lang in languages:
         if '_image_id' in img:
             del img['_image_id']
 
-    # 定义与语言代码相关的文件路径
-    file_path_current = f'./bing/bing_{file_lang}.json'
-
-    # 函数读写数据
-    def read_json(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
-
-    def write_json(file_path, data):
-        with open(file_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-
-    # ====== 收集所有涉及的年份 ======
-    years_involved = set()
-    for img in images_info:
-        year = get_year_from_date(img.get('date', ''))
-        years_involved.add(year)
-    
-    print(f"\nYears involved in this batch: {sorted(years_involved)}")
-    
-    # 确保所有涉及年份的目录存在
-    for year in years_involved:
-        year_dir = f'./bing/{year}'
-        if not os.path.exists(year_dir):
-            os.makedirs(year_dir)
-            print(f"Created directory: {year_dir}")
-
-    # 读取并更新主目录数据
-    print(f"\nReading existing data...")
-    existing_images_info_current = read_json(file_path_current)
-    
-    print(f"Updating {file_path_current}...")
-    existing_images_info_current = update_and_merge_images(existing_images_info_current, images_info, date_field='date', unique_field='fullstartdate')
-    
-    print(f"Writing updates back to {file_path_current}...")
-    write_json(file_path_current, existing_images_info_current)
-
-    # ====== 按年份分组写入对应年份文件夹 ======
-    for year in years_involved:
-        file_path_yearly = f'./bing/{year}/bing_{file_lang}.json'
-        
-        # 筛选出属于该年份的数据
-        year_images = [img for img in images_info if get_year_from_date(img.get('date', '')) == year]
-        
-        if year_images:
-            existing_yearly = read_json(file_path_yearly)
-            print(f"Updating {file_path_yearly} with {len(year_images)} image(s)...")
-            existing_yearly = update_and_merge_images(existing_yearly, year_images, date_field='date', unique_field='fullstartdate')
-            write_json(file_path_yearly, existing_yearly)
+    # ====== 跳过已合并的记录 ======
+    # 只合并主目录或年份文件中还没有的记录(中断、手工修改或修复后缺少的记录也会补回)
+    weekly_file_path = f'./bing/weekly/bing_{file_lang}.json'
+    previous_weekly = archive_io.load_json(weekly_file_path)
+    missing_current, missing_yearly = missing_images(file_lang, images_info)
+    missing_ids = {img['fullstartdate'] for img in missing_current + missing_yearly}
+    new_images = [img for img in images_info if img['fullstartdate'] in missing_ids]
+    print(f"\nNew images since last run: {len(new_images)}/{len(images_info)}")
+
+    if not new_images:
+        print(f"Nothing new for {original_lang}, archive files left untouched.")
+    elif STORAGE_BACKEND == 'journal':
+        # 主目录文件（index.html 读取）每次都更新；年份文件的新记录只追加到日志，压缩时再改写
+        merge_into_current(file_lang, missing_current)
+        if missing_yearly:
+            journal_size = archive_journal.append_records(file_lang, missing_yearly)
+            print(f"Appended {len(missing_yearly)} record(s) to {archive_journal.journal_path(file_lang)} ({journal_size} pending)")
+            if journal_size >= archive_journal.COMPACT_THRESHOLD:
+                # 传入本模块的合并函数，使压缩产生的记录数增减计入本模块的 index_deltas
+                archive_journal.compact(file_lang, merge_into_archive)
+    else:
+        merge_into_archive(file_lang, new_images)
 
     # 将数据写入以语言代码命名的每周JSON文件
-    weekly_file_path = f'./bing/weekly/bing_{file_lang}.json'
     # 按日期倒序排序每周数据
-    images_info.sort(key=lambda x: datetime.strptime(x['date'], '%Y%m%d'), reverse=True)
-    write_json(weekly_file_path, images_info)
+    images_info.sort(key=lambda x: x['date'], reverse=True)
+    if images_info == previous_weekly:
+        print(f"○ '{weekly_file_path}' unchanged")
+        return True
+    archive_io.files.mark_dirty(weekly_file_path, images_info)
 
     print(f"✓ Data saved to '{weekly_file_path}'")
+    return True
 
 # ====== 新增：在 1 月 7 日或 8 日清理年份文件夹中的上一年数据 ======
 def cleanup_previous_year_data():
@@ -407,8 +495,7 @@ def cleanup_previous_year_data():
         if filename.endswith('.json'):
             filepath = os.path.join(yearly_dir, filename)
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = archive_io.load_json(filepath)
                 
                 original_count = len(data)
                 # 过滤掉 date 字段以上一年开头的记录
@@ -416,8 +503,8 @@ def cleanup_previous_year_data():
                 removed_count = original_count - len(cleaned_data)
                 
                 if removed_count > 0:
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(cleaned_data, f, ensure_ascii=False, indent=4)
+                    archive_io.files.mark_dirty(filepath, cleaned_data)
+                    index_deltas[(str(current_year), filename[:-len('.json')])] -= removed_count
                     print(f"  ✓ {filename}: removed {removed_count} items from {previous_year}")
                 else:
                     print(f"  ○ {filename}: no {previous_year} data to remove")
@@ -426,49 +513,95 @@ def cleanup_previous_year_data():
     
     print("========== Cleanup completed ==========")
 
-# 执行清理
-cleanup_previous_year_data()
-
 # ====== 新增：自动生成 data_index.json ======
-def generate_data_index():
+def generate_data_index(previous_index=None):
     """
-    扫描 bing/ 下所有年份目录，统计每个区域的 JSON 文件记录数，
     生成 data_index.json 供 archive.html 使用。
+    previous_index 是运行开始时读取并校验过的索引：存在时只把本次合并/清理的
+    增减数量 (index_deltas) 应用上去；否则扫描所有年份目录完整重建。
     """
     print("\n========== Generating data_index.json ==========")
-    base_dir = './bing'
-    result = {}
-    
-    for y in sorted(os.listdir(base_dir)):
-        year_dir = os.path.join(base_dir, y)
-        if not (y.isdigit() and os.path.isdir(year_dir)):
-            continue
-        json_files = [f for f in os.listdir(year_dir) if f.endswith('.json')]
-        if not json_files:
-            continue
-        
-        regions = {}
-        for f in sorted(json_files):
-            region_code = f.replace('.json', '')
-            try:
-                with open(os.path.join(year_dir, f), 'r', encoding='utf-8') as fp:
-                    data = json.load(fp)
-                regions[region_code] = len(data)
-            except Exception as e:
-                print(f"  Warning: Failed to read {year_dir}/{f}: {e}")
-                continue
-        
-        result[y] = {"regions": regions}
-        print(f"  {y}: {regions}")
-    
-    index = {"years": result, "currentYear": current_year}
-    out_path = os.path.join(base_dir, 'data_index.json')
-    with open(out_path, 'w', encoding='utf-8') as f:
-        json.dump(index, f, indent=2, ensure_ascii=False)
+    if previous_index is None or REBUILD_INDEX:
+        print("  Full rebuild (no verified index or rebuild requested)")
+        index, out_path = data_index.rebuild(current_year)
+        for y, info in index["years"].items():
+            print(f"  {y}: {info['regions']}")
+    else:
+        print(f"  Incremental update: {dict(index_deltas)}")
+        index = data_index.apply_deltas(previous_index, index_deltas, current_year)
+        out_path = data_index.write_index(index)
     print(f"✓ Wrote {out_path}")
 
-# 执行生成索引
-generate_data_index()
-
-print("\n========== All languages processed ==========")
-print("Ends time: ", datetime.now(timezone.utc))
+    # archive.html 的搜索索引（已生成过或 BING_SEARCH_INDEX=1 时），只重新切词内容有变化的年份文件
+    if search_index.enabled():
+        updated = search_index.update()
+        print(f"✓ Search index updated for {len(updated)} region(s) in {search_index.SEARCH_DIR}")
+
+    # 按月分片和分页表（已生成过或 BING_MONTH_VIEWS=1 时），只重新生成内容有变化的月份
+    if month_views.enabled():
+        updated = month_views.update()
+        print(f"✓ Month views updated for {len(updated)} region(s) in {month_views.MONTHS_DIR}")
+
+    if IMAGE_STORE:
+        synced = image_store.update()
+        print(f"✓ Synced {synced} file(s) to {image_store.STORE_PATH}")
+
+    if ARCHIVE_DB:
+        imported, removed, undated, skipped = archive_db.sync(ARCHIVE_DB)
+        print(f"✓ Synced {ARCHIVE_DB}: {imported} file(s) imported, {removed} removed")
+        archive_db.print_sync_warnings(undated, skipped)
+
+    if PUBLISH_ASSETS:
+        generated, removed = publish_assets.publish()
+        print(f"✓ Published {generated} asset(s) to {publish_assets.DIST_DIR}, removed {removed} stale file(s)")
+
+def main():
+    print("Starts time: ", datetime.now(timezone.utc))
+
+    for directory in base_directories:
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    if COMPACT_DIR:
+        archive_io.files.compact_mirror = ('./bing', COMPACT_DIR)
+
+    # 在写入任何文件之前校验现有索引，确认可以增量更新
+    previous_index = data_index.load_verified_index()
+
+    # 并发抓取所有语言的两个接口，然后按原顺序逐个处理
+    print(f"Fetching {len(languages)} markets (workers={FETCH_WORKERS}, host interval={FETCH_HOST_INTERVAL}s)...")
+    http_cache = HttpCache()
+    urls = {lang: market_urls(lang) for lang in languages}
+    results = fetch_markets(
+        urls,
+        max_workers=FETCH_WORKERS,
+        min_interval=FETCH_HOST_INTERVAL,
+        cache=http_cache,
+        retry_delay=FETCH_RETRY_DELAY,
+        record_dir=RECORD_DIR,
+    )
+    print("Fetch finished: ", datetime.now(timezone.utc))
+
+    for lang in languages:
+        data, data_description = results[lang]
+        # 只有处理成功的市场才记录缓存,失败的市场下次会重新处理
+        if process_language(lang, data, data_description):
+            http_cache.confirm(urls[lang])
+
+    # 执行清理
+    cleanup_previous_year_data()
+
+    # 统一写回本次修改过的文件，写完之后才保存 HTTP 缓存
+    written = archive_io.files.flush()
+    print(f"\nWrote {len(written)} file(s)")
+    http_cache.save()
+
+    # 执行生成索引
+    generate_data_index(previous_index)
+
+    print("\n========== All languages processed ==========")
+    print("Ends time: ", datetime.now(timezone.utc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 并发抓取的默认配置
+MAX_WORKERS = 8           # 同时进行的请求数上限
+HOST_MIN_INTERVAL = 0.1   # 同一主机两次请求开始之间的最小间隔(秒)
+
+# 持久化的 HTTP 缓存（ETag / Last-Modified / 内容哈希），不提交到仓库（.gitignore），工作流用 actions/cache 保留
+HTTP_CACHE_PATH = Path("python/http_cache.json")
+
+# 接口内容与上次成功处理时相同（304 或内容哈希一致）时返回的标记，用 is 比较；
+# 使用唯一的对象，接口返回的数据不可能与它相同
+UNCHANGED = object()
+
+# urllib3 只有在安装了 brotli 时才能解码 br
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """返回共享的 requests.Session（连接池 + keep-alive），首次调用时创建"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+            _session = session
+        return _session
+
+
+class HttpCache:
+    """
+    按 URL 记录 ETag、Last-Modified 和响应内容的 sha256。
+    新响应先放入 pending，只有调用 confirm() 后才会在 save() 时写入磁盘，
+    这样处理失败的市场下次运行时不会被误判为“未变化”。
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.pending = {}
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def request_headers(self, url):
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url, digest):
+        return self.entries.get(url, {}).get("sha256") == digest
+
+    def record(self, url, response, digest):
+        entry = {"sha256": digest}
+        if response.headers.get("ETag"):
+            entry["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            entry["last_modified"] = response.headers["Last-Modified"]
+        with self._lock:
+            self.pending[url] = entry
+
+    def confirm(self, urls):
+        with self._lock:
+            for url in urls:
+                if url in self.pending:
+                    self.entries[url] = self.pending.pop(url)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(self.entries, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+
+
+class HostRateLimiter:
+    """按主机限速：同一主机的请求开始时间至少间隔 min_interval 秒（线程安全）"""
+
+    def __init__(self, min_interval=HOST_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def fixture_path(fixture_dir, url):
+    """录制/回放时 URL 对应的夹具文件: {dir}/{mkt}/{接口名}.json，例如 en-US/HPImageArchive.json"""
+    parts = urlsplit(url)
+    mkt = parse_qs(parts.query).get("mkt", ["default"])[0]
+    name = parts.path.rstrip("/").rsplit("/", 1)[-1].split(".", 1)[0]
+    return Path(fixture_dir) / mkt / f"{name}.json"
+
+
+def record_response(record_dir, url, content):
+    path = fixture_path(record_dir, url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+FETCH_ERRORS = (requests.exceptions.RequestException, json.JSONDecodeError)
+
+
+def fetch_once(url, timeout=10, limiter=None, cache=None, record_dir=None):
+    """
+    Fetches a URL once and returns its JSON data; raises one of FETCH_ERRORS on failure.
+    With a cache, returns UNCHANGED for a 304 or a body identical to the last processed one.
+    With record_dir, the raw body of every successful response is saved as a replay fixture.
+    """
+    if limiter is not None:
+        limiter.wait(url)
+    headers = cache.request_headers(url) if cache is not None else None
+    response = get_session().get(url, timeout=timeout, headers=headers)
+    if cache is not None and response.status_code == 304:
+        return UNCHANGED
+    response.raise_for_status() # Will raise an error for bad status codes
+    if record_dir is not None:
+        record_response(record_dir, url, response.content)
+    if cache is not None:
+        # 在 JSON 解码之前比较内容哈希
+        digest = hashlib.sha256(response.content).hexdigest()
+        if cache.is_unchanged(url, digest):
+            return UNCHANGED
+        data = response.json()
+        cache.record(url, response, digest)
+        return data
+    return response.json() # Return JSON data on success
+
+
+def fetch_all(pool, urls, retries=3, delay=5, **options):
+    """
+    在线程池中抓取 {key: url}，返回 {key: data}，多次尝试后仍失败的为 None。
+    每一轮只请求一次，失败的请求在这一轮全部结束后由调用线程等待 delay 秒再统一重试，
+    重试等待不占用线程池中的线程，其它市场的请求不会因此排队。
+    """
+    results = {}
+    pending = dict(urls)
+    for attempt in range(retries):
+        futures = {key: pool.submit(fetch_once, url, **options) for key, url in pending.items()}
+        failed = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except FETCH_ERRORS as e:
+                print(f"  Attempt {attempt + 1}/{retries} failed for {pending[key]}: {e}")
+                failed[key] = pending[key]
+        pending = failed
+        if pending and attempt < retries - 1:
+            print(f"  Retrying {len(pending)} request(s) in {delay} seconds...")
+            time.sleep(delay)
+    for key, url in pending.items():
+        print(f"  Failed to fetch {url} after {retries} attempts.")
+        results[key] = None # None on final failure
+    return results
+
+
+def fetch_markets(market_urls, max_workers=MAX_WORKERS, min_interval=HOST_MIN_INTERVAL, cache=None,
+                  retry_delay=5, record_dir=None):
+    """
+    并发抓取所有市场的接口数据。
+    market_urls: {lang: (url1, url2, ...)}
+    返回 {lang: (data1, data2, ...)}，顺序与传入的 URL 一致，失败的请求为 None。
+    使用 cache 时，只有当某市场的所有接口都未变化时才返回 UNCHANGED；
+    部分变化的市场会无条件重新请求未变化的接口，以便拿到完整数据。
+    """
+    limiter = HostRateLimiter(min_interval)
+    options = {"delay": retry_delay, "limiter": limiter, "record_dir": record_dir}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        fetched = fetch_all(
+            pool,
+            {(lang, index): url for lang, urls in market_urls.items() for index, url in enumerate(urls)},
+            cache=cache,
+            **options,
+        )
+        results = {
+            lang: [fetched[lang, index] for index in range(len(urls))]
+            for lang, urls in market_urls.items()
+        }
+
+        refetch = {
+            (lang, index): market_urls[lang][index]
+            for lang, values in results.items()
+            if UNCHANGED in values and any(value is not UNCHANGED for value in values)
+            for index, value in enumerate(values)
+            if value is UNCHANGED
+        }
+        for (lang, index), data in fetch_all(pool, refetch, **options).items():
+            results[lang][index] = data
+
+    return {lang: tuple(values) for lang, values in results.items()}
@@ -0,0 +1,77 @@
+import re
+import urllib.parse
+from collections import namedtuple
+from functools import lru_cache
+
+# Bing 图片 URL 的统一解析（预编译正则 + LRU 缓存）。
+# 存档中同一个 urlbase 会出现在主目录、年份和 weekly 文件里，批量工具遍历时
+# 每个字符串只解析一次。
+#
+#   https://www.bing.com/th?id=OHR.CanadaNE_FR-CA5981626201_1920x1080.jpg
+#                             ^^^^^^^^^^^ ^^^^^^^^^^^^^^^^^ ^^^^^^^^^
+#                             image_id    market + hash     resolution
+CACHE_SIZE = 65536
+
+ImageUrl = namedtuple("ImageUrl", ["image_id", "ohr_id", "market", "hash", "resolution"])
+
+# id= 和第一个 '_' 之间的部分 (例如 OHR.ShenandoahTrail)
+IMAGE_ID_PATTERN = re.compile(r"id=([A-Za-z0-9.]+)_")
+# 图片 ID 之后的 市场后缀 + 数字哈希，以及可选的分辨率
+SUFFIX_PATTERN = re.compile(r"([A-Za-z]+(?:-[A-Za-z]+)?)(\d+)(?:_(\d+x\d+))?")
+# MapLink 中 pp=纬度,经度
+MAPLINK_PATTERN = re.compile(r"[&?]pp=([0-9.-]+,[0-9.-]+)")
+SEARCH_PREFIX = "https://www.bing.com/search?q="
+
+_EMPTY = ImageUrl(None, None, None, None, None)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_image_url(url):
+    """解析 url / urlbase，返回 ImageUrl；无法识别的部分为 None"""
+    if not url:
+        return _EMPTY
+    image_id = None
+    market = digest = resolution = None
+    match = IMAGE_ID_PATTERN.search(url)
+    if match:
+        image_id = match.group(1)
+        suffix = SUFFIX_PATTERN.match(url, match.end())
+        if suffix:
+            market, digest, resolution = suffix.groups()
+    return ImageUrl(image_id, ohr_id(url), market, digest, resolution)
+
+
+def image_id(url):
+    """'id=' 和 '_' 之间的图片 ID (例如 'OHR.ShenandoahTrail')"""
+    return parse_image_url(url).image_id
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def ohr_id(url):
+    """'OHR.' 开头的图片名称；不是 OHR 图片时返回 None"""
+    # 只取名称部分（遇到 '_' 或 '.' 结束），与 repair_archive_data.py 原有规则一致
+    if not url or "OHR." not in url:
+        return None
+    tail = url.split("OHR.", 1)[1]
+    return "OHR." + tail.split("_", 1)[0].split(".", 1)[0]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def maplink_coordinates(url):
+    """从 MapLink URL 中提取 pp 参数的坐标值"""
+    if not url:
+        return None
+    match = MAPLINK_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def copyright_keyword(copyrightlink):
+    """从 copyrightlink 的搜索地址中取出关键词 (q 参数，'+' 还原为空格)"""
+    keyword = copyrightlink.replace(SEARCH_PREFIX, "").split("&")[0]
+    return urllib.parse.unquote(keyword.replace("+", " "))
+
+
+def clear_caches():
+    for func in (parse_image_url, ohr_id, maplink_coordinates, copyright_keyword):
+        func.cache_clear()
@@ -0,0 +1,230 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date as Date
+from pathlib import Path
+
+import archive_io
+import bing_url
+
+# 跨市场覆盖矩阵：给每个图片ID (OHR.XXX) 分配一个位序号，每个市场用一个 Python 整数作为位集，
+# 交集/并集/差集都是整数位运算，计数用 int.bit_count()。在此基础上一次计算：
+# - 所有市场两两之间的 Jaccard 相似度；
+# - 每个月各市场与参照市场 (默认 ROW) 的重合情况；
+# - 与参照市场共有的图片在各市场首次出现的时间差（天）。
+#
+# 用法（在仓库根目录执行）:
+#   python python/coverage_matrix.py                          # 主目录文件 bing/bing_*.json
+#   python python/coverage_matrix.py --source years --since 20220101 --out coverage.json
+REFERENCE = "ROW"
+
+
+def popcount(bits):
+    return bits.bit_count()
+
+
+def bitset(positions, size):
+    """由位序号列表构造位集（先写入 bytearray，避免反复对大整数做或运算）"""
+    buf = bytearray((size + 7) // 8)
+    for position in positions:
+        buf[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buf, "little")
+
+
+def day_number(date):
+    return Date(int(date[:4]), int(date[4:6]), int(date[6:8])).toordinal()
+
+
+class CoverageMatrix:
+    def __init__(self, records_by_market):
+        """records_by_market: {市场: [记录, ...]}；没有 OHR 图片ID 或日期的记录会被忽略"""
+        self.markets = sorted(records_by_market)
+        self.image_ids = []  # 位序号 -> 图片ID
+        positions = {}       # 图片ID -> 位序号
+        days = {}            # 日期字符串 -> 天数序号（缓存）
+
+        first_seen = {}      # 市场 -> {位序号: 首次出现的天数序号}
+        month_positions = {} # 月份 YYYYMM -> 市场 -> [位序号]
+        for market in self.markets:
+            seen = first_seen[market] = {}
+            for item in records_by_market[market]:
+                image_id = bing_url.ohr_id(item.get("urlbase") or item.get("url") or "")
+                date = item.get("date") or ""
+                if not image_id or len(date) != 8:
+                    continue
+                position = positions.get(image_id)
+                if position is None:
+                    position = positions[image_id] = len(self.image_ids)
+                    self.image_ids.append(image_id)
+                day = days.get(date)
+                if day is None:
+                    day = days[date] = day_number(date)
+                if seen.get(position, day + 1) > day:
+                    seen[position] = day
+                month_positions.setdefault(date[:6], {}).setdefault(market, []).append(position)
+
+        size = len(self.image_ids)
+        self.first_seen = first_seen
+        self.bits = {market: bitset(first_seen[market], size) for market in self.markets}
+        self.month_bits = {
+            month: {market: bitset(month_positions[month].get(market, ()), size) for market in self.markets}
+            for month in sorted(month_positions)
+        }
+
+    def ids(self, bits):
+        """位集 -> 图片ID 集合"""
+        return {self.image_ids[i] for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"}
+
+    def compare(self, market, reference=REFERENCE):
+        """market 相对 reference：图片总数、缺失数（reference 有而 market 没有）、独有数、匹配率 (%)"""
+        bits, ref = self.bits[market], self.bits[reference]
+        ref_total = popcount(ref)
+        return {
+            "total": popcount(bits),
+            "missing": popcount(ref & ~bits),
+            "extra": popcount(bits & ~ref),
+            "match_rate": popcount(bits & ref) / ref_total * 100 if ref_total else 0,
+        }
+
+    def jaccard(self):
+        """{市场: {市场: |A∩B| / |A∪B|}}"""
+        counts = {market: popcount(self.bits[market]) for market in self.markets}
+        matrix = {market: {} for market in self.markets}
+        for i, a in enumerate(self.markets):
+            matrix[a][a] = 1.0 if counts[a] else 0.0
+            for b in self.markets[i + 1:]:
+                shared = popcount(self.bits[a] & self.bits[b])
+                union = counts[a] + counts[b] - shared
+                matrix[a][b] = matrix[b][a] = shared / union if union else 0.0
+        return matrix
+
+    def month_overlap(self, reference=REFERENCE):
+        """{月份: {市场: {"images", "shared", "jaccard"}}}，与 reference 同月的图片比较"""
+        result = {}
+        for month, month_bits in self.month_bits.items():
+            ref = month_bits[reference]
+            row = result[month] = {}
+            for market in self.markets:
+                bits = month_bits[market]
+                shared = popcount(bits & ref)
+                union = popcount(bits | ref)
+                row[market] = {
+                    "images": popcount(bits),
+                    "shared": shared,
+                    "jaccard": round(shared / union, 4) if union else 0.0,
+                }
+        return result
+
+    def first_appearance_lag(self, reference=REFERENCE):
+        """
+        与 reference 共有的图片，在各市场首次出现的日期减去在 reference 首次出现的日期（天）。
+        返回 {市场: {"shared", "same_day", "mean", "median", "min", "max"}}
+        """
+        ref_seen = self.first_seen[reference]
+        result = {}
+        for market in self.markets:
+            seen = self.first_seen[market]
+            lags = [seen[position] - ref_seen[position] for position in seen if position in ref_seen]
+            result[market] = {
+                "shared": len(lags),
+                "same_day": sum(1 for lag in lags if lag == 0),
+                "mean": round(statistics.fmean(lags), 3) if lags else None,
+                "median": statistics.median(lags) if lags else None,
+                "min": min(lags) if lags else None,
+                "max": max(lags) if lags else None,
+            }
+        return result
+
+    def report(self, reference=REFERENCE):
+        return {
+            "reference": reference,
+            "markets": self.markets,
+            "images": len(self.image_ids),
+            "compare": {market: self.compare(market, reference) for market in self.markets},
+            "jaccard": {a: {b: round(v, 4) for b, v in row.items()} for a, row in self.jaccard().items()},
+            "month_overlap": self.month_overlap(reference),
+            "first_appearance_lag": self.first_appearance_lag(reference),
+        }
+
+
+# ====== 读取存档 ======
+def load_root(base_dir):
+    """主目录 bing_*.json -> {市场: 记录}"""
+    return {
+        path.stem[len("bing_"):]: archive_io.load_json(path)
+        for path in sorted(Path(base_dir).glob("bing_*.json"))
+    }
+
+
+def load_years(base_dir, since=None, until=None):
+    """合并所有年份目录中的同名文件 -> {市场: 记录}，可按年份范围筛选目录"""
+    records = {}
+    for year_dir in sorted(Path(base_dir).iterdir()):
+        if not (year_dir.is_dir() and year_dir.name.isdigit()):
+            continue
+        if (since and year_dir.name < since[:4]) or (until and year_dir.name > until[:4]):
+            continue
+        for path in sorted(year_dir.glob("bing_*.json")):
+            records.setdefault(path.stem[len("bing_"):], []).extend(archive_io.load_json(path))
+    return records
+
+
+def filter_dates(records_by_market, since=None, until=None):
+    if not since and not until:
+        return records_by_market
+    return {
+        market: [
+            item for item in records
+            if (not since or (item.get("date") or "") >= since) and (not until or (item.get("date") or "") <= until)
+        ]
+        for market, records in records_by_market.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-market image coverage matrix.")
+    parser.add_argument("--dir", default="bing")
+    parser.add_argument("--source", choices=["root", "years"], default="root",
+                        help="root files (bing/bing_*.json) or all year directories merged per market")
+    parser.add_argument("--reference", default=REFERENCE)
+    parser.add_argument("--since", help="YYYYMMDD")
+    parser.add_argument("--until", help="YYYYMMDD")
+    parser.add_argument("--out", help="write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.source == "root":
+        records = load_root(args.dir)
+    else:
+        records = load_years(args.dir, args.since, args.until)
+    records = filter_dates(records, args.since, args.until)
+    loaded = time.perf_counter()
+    if args.reference not in records:
+        parser.error(f"reference market {args.reference} not found in {args.dir}")
+
+    matrix = CoverageMatrix(records)
+    report = matrix.report(args.reference)
+    done = time.perf_counter()
+
+    markets = matrix.markets
+    print(f"{len(markets)} markets, {len(matrix.image_ids)} images, {len(matrix.month_bits)} months "
+          f"(load {loaded - start:.2f}s, compute {done - loaded:.2f}s)")
+    width = max(len(m) for m in markets)
+    print(" " * width + "".join(f"{m[:6]:>7}" for m in markets))
+    for a in markets:
+        print(f"{a:<{width}}" + "".join(f"{report['jaccard'][a][b]:>7.2f}" for b in markets))
+    print(f"\nFirst appearance vs {args.reference} (days):")
+    for market, lag in report["first_appearance_lag"].items():
+        if market != args.reference and lag["shared"]:
+            print(f"  {market:<{width}} shared {lag['shared']:>5}, same day {lag['same_day']:>5}, "
+                  f"median {lag['median']}, range {lag['min']}..{lag['max']}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
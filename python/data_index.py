@@ -0,0 +1,127 @@
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+import archive_io
+
+# data_index.json 供 archive.html 使用：{"years": {年份: {"regions": {区域: 记录数}}}, "currentYear": 年份}
+# 日常运行时根据合并结果增量更新记录数，只在需要时才完整扫描所有年份文件。
+BASE_DIR = Path("bing")
+INDEX_PATH = BASE_DIR / "data_index.json"
+
+
+def year_files(base_dir=BASE_DIR):
+    """返回所有年份目录下的 JSON 文件路径"""
+    paths = []
+    for child in sorted(Path(base_dir).iterdir()):
+        if child.is_dir() and child.name.isdigit():
+            paths.extend(sorted(child.glob("*.json")))
+    return paths
+
+
+def region_files(base_dir=BASE_DIR):
+    """{区域: [各年份目录中该区域的文件路径]}"""
+    regions = {}
+    for path in year_files(base_dir):
+        regions.setdefault(path.stem, []).append(path)
+    return regions
+
+
+def write_text_if_changed(path, text):
+    """内容不变时不重写文件（保持修改时间，也避免无意义的提交），返回是否写入"""
+    path = Path(path)
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
+def files_checksum(base_dir=BASE_DIR):
+    """只根据文件名和大小计算校验值（不读取文件内容），用于发现流水线之外的改动"""
+    digest = hashlib.sha1()
+    for path in year_files(base_dir):
+        digest.update(f"{path.parent.name}/{path.name}:{path.stat().st_size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def count_records(base_dir=BASE_DIR):
+    """完整扫描：读取每个年份文件统计记录数，返回 {(year, region): count}"""
+    counts = {}
+    for path in year_files(base_dir):
+        try:
+            counts[(path.parent.name, path.stem)] = len(archive_io.load_json(path))
+        except Exception as e:
+            print(f"  Warning: Failed to read {path}: {e}")
+    return counts
+
+
+def build_index(counts, current_year):
+    years = {}
+    for (year, region), count in counts.items():
+        years.setdefault(year, {}).setdefault("regions", {})[region] = count
+    for year in years:
+        years[year]["regions"] = dict(sorted(years[year]["regions"].items()))
+    return {"years": dict(sorted(years.items())), "currentYear": current_year}
+
+
+def index_counts(index):
+    return {
+        (year, region): count
+        for year, info in index.get("years", {}).items()
+        for region, count in info.get("regions", {}).items()
+    }
+
+
+def write_index(index, base_dir=BASE_DIR, checksum=None):
+    """checksum 为 None 时按当前文件计算；只修改索引中其它部分时传入原值，避免掩盖流水线之外的改动"""
+    index = dict(index, checksum=checksum or files_checksum(base_dir))
+    out_path = Path(base_dir) / INDEX_PATH.name
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return out_path
+
+
+def load_verified_index(base_dir=BASE_DIR):
+    """
+    读取现有索引，并确认年份文件自上次写索引后没有被其他方式修改。
+    校验值不一致或索引不存在时返回 None，此时应完整重建。
+    """
+    try:
+        with open(Path(base_dir) / INDEX_PATH.name, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if index.get("checksum") != files_checksum(base_dir):
+        return None
+    return index
+
+
+def apply_deltas(index, deltas, current_year):
+    """把 {(year, region): 增减数量} 应用到索引上"""
+    counts = index_counts(index)
+    for key, delta in deltas.items():
+        if delta:
+            counts[key] = counts.get(key, 0) + delta
+    return build_index(counts, current_year)
+
+
+def rebuild(current_year, base_dir=BASE_DIR, counts=None):
+    """完整重建索引；counts 已知（例如已加载全部文件）时可直接传入，避免再次解析"""
+    if counts is None:
+        counts = count_records(base_dir)
+    index = build_index(counts, current_year)
+    return index, write_index(index, base_dir)
+
+
+def main():
+    # 用法: python python/data_index.py   （在仓库根目录执行，强制完整重建）
+    _, out_path = rebuild(datetime.now().year)
+    print(f"✓ Rebuilt {out_path}")
+
+
+if __name__ == "__main__":
+    main()
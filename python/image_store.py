@@ -0,0 +1,450 @@
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import bing_url
+import json_codec
+from data_index import BASE_DIR, write_text_if_changed
+
+# 规范化存储：同一张壁纸出现在最多 13 个市场文件中，每个市场的记录又同时出现在主目录、年份目录和 weekly 中。
+# 这里把所有 bing_*.json 合并为一个 gzip 压缩的文件 image_store.json.gz（仓库根目录，不提交到仓库）：
+#
+#   images   图片表，按 OHR ID（例如 OHR.JulierPass）排列，每张图片一项
+#   rows     每个市场的一条记录只存一次：[图片序号, 市场序号, 字段表序号, 字段值...]
+#   shapes   字段表（记录的键及顺序），字段名后缀表示值的编码方式：
+#              "url~"      不存值，url = urlbase + URL_SUFFIX
+#              "urlbase~"  只存市场后缀，urlbase = URL_PREFIX + 图片ID + "_" + 值
+#              "text#"     值是 strings 表中的序号（多条记录共用的 copyright / description 等文字）
+#   files    每个 JSON 文件对应的记录序号（按 [起始, 数量] 区间压缩）、缩进、文件末尾是否有换行和内容 SHA-1；
+#            格式无法由 json.dumps 重现的文件（手工编辑过的缩进等）另外原样保存文本 "text"
+#
+# 存储是由 JSON 文件派生的副本，JSON 文件仍是唯一的数据源：bing_260204.py 和修复脚本直接写 JSON 文件，
+# index.html / archive.html 也直接读取它们，所以这些文件必须留在仓库中。
+# 存储是整个存档的紧凑备份（约 4.5MB，而所有 JSON 文件约 30MB），render 能由它逐字节还原每个 JSON 文件；
+# 也用于跨市场的分析（near_duplicates.py --store）。它和 archive.db 一样放在 bing/ 之外并被 .gitignore 忽略，
+# 不会让仓库变大。路径以 .gz 结尾时读写 gzip 压缩的文件，否则为普通 JSON。
+# 日常运行设置 BING_IMAGE_STORE=1 时，生成索引后用 update() 把内容有变化的文件同步到存储：
+# 只编码这些文件中新出现的记录，其它行保持不变；增量更新后的存储比完整生成 (build) 稍大
+# （已有行中的文字不会再放入 strings 表），定期运行 build 可以重新整理。
+#
+# 用法（在仓库根目录执行）:
+#   python python/image_store.py build          # 由现有 JSON 文件生成存储
+#   python python/image_store.py update         # 只同步有变化的 JSON 文件
+#   python python/image_store.py verify         # 检查存储生成的视图与现有文件逐字节相同
+#   python python/image_store.py render [--out DIR]   # 由存储重新生成 JSON 文件
+STORE_PATH = Path("image_store.json.gz")
+VERSION = 1
+URL_PREFIX = "https://www.bing.com/th?id="
+URL_SUFFIX = "_1920x1080.jpg"
+TEXT_FIELDS = ("copyright", "copyrightKeyword", "description", "title")
+DERIVED = "~"
+INTERNED = "#"
+INDENT = 4
+
+
+def view_names(base_dir=BASE_DIR):
+    """存储包含的 JSON 文件（相对 base_dir 的路径）：主目录、old-2408、年份目录和 weekly"""
+    base_dir = Path(base_dir)
+    paths = sorted(base_dir.glob("bing_*.json"))
+    for child in sorted(base_dir.iterdir()):
+        if child.is_dir() and (child.name.isdigit() or child.name in ("old-2408", "weekly")):
+            paths.extend(sorted(child.glob("bing_*.json")))
+    return [path.relative_to(base_dir).as_posix() for path in paths]
+
+
+def market_of(name):
+    return Path(name).stem[len("bing_"):]
+
+
+def to_ranges(ids):
+    ranges = []
+    for row_id in ids:
+        if ranges and ranges[-1][0] + ranges[-1][1] == row_id:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([row_id, 1])
+    return ranges
+
+
+def from_ranges(ranges):
+    return [start + i for start, count in ranges for i in range(count)]
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _read_text(path):
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.decompress(path.read_bytes()).decode("utf-8")
+    return path.read_text(encoding="utf-8")
+
+
+def _read_view(path):
+    """返回 (记录, 格式, 原文)；格式记录缩进和末尾换行，用于逐字节还原文件"""
+    text = Path(path).read_text(encoding="utf-8")
+    match = re.match(r"\[\n( +)", text)
+    layout = {"indent": len(match.group(1)) if match else INDENT, "newline": text.endswith("\n")}
+    return json_codec.loads(text), layout, text
+
+
+class ImageStore:
+    def __init__(self, data=None):
+        data = data or {}
+        self.images = list(data.get("images", []))
+        self.markets = list(data.get("markets", []))
+        self.shapes = [tuple(shape) for shape in data.get("shapes", [])]
+        self.strings = list(data.get("strings", []))
+        self.rows = [list(row) for row in data.get("rows", [])]
+        self.files = {
+            name: {**info, "rows": from_ranges(info["rows"])}
+            for name, info in data.get("files", {}).items()
+        }
+        self._image_index = {image: i for i, image in enumerate(self.images)}
+        self._market_index = {market: i for i, market in enumerate(self.markets)}
+        self._shape_index = {shape: i for i, shape in enumerate(self.shapes)}
+        self._string_index = {text: i for i, text in enumerate(self.strings)}
+        self._row_index = {self._row_key(row): i for i, row in enumerate(self.rows)}
+
+    # ====== 编码 ======
+    @staticmethod
+    def _row_key(row):
+        return json.dumps(row, ensure_ascii=False)
+
+    def _index(self, table, index, value):
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(table)
+            table.append(value)
+        return position
+
+    def encode(self, market, item):
+        """记录 -> 行；同一市场中内容相同的记录得到相同的行"""
+        image = bing_url.ohr_id(item.get("urlbase") or item.get("url") or "")
+        urlbase = item.get("urlbase")
+        spec = []
+        values = []
+        for field, value in item.items():
+            if field == "url" and isinstance(urlbase, str) and value == urlbase + URL_SUFFIX:
+                spec.append(field + DERIVED)
+                continue
+            if field == "urlbase" and image and isinstance(value, str) and value.startswith(f"{URL_PREFIX}{image}_"):
+                spec.append(field + DERIVED)
+                values.append(value[len(URL_PREFIX) + len(image) + 1:])
+                continue
+            if field in TEXT_FIELDS and isinstance(value, str) and value in self._string_index:
+                spec.append(field + INTERNED)
+                values.append(self._string_index[value])
+                continue
+            spec.append(field)
+            values.append(value)
+        return [
+            self._index(self.images, self._image_index, image) if image else -1,
+            self._index(self.markets, self._market_index, market),
+            self._index(self.shapes, self._shape_index, tuple(spec)),
+            *values,
+        ]
+
+    def add(self, market, item):
+        """添加一条记录（已存在时复用），返回行序号"""
+        row = self.encode(market, item)
+        key = self._row_key(row)
+        row_id = self._row_index.get(key)
+        if row_id is None:
+            row_id = self._row_index[key] = len(self.rows)
+            self.rows.append(row)
+        return row_id
+
+    def decode(self, row):
+        image, _, shape, *values = row
+        values = iter(values)
+        item = {}
+        derived_url = False
+        for spec in self.shapes[shape]:
+            if spec.endswith(DERIVED):
+                field = spec[:-1]
+                if field == "url":
+                    derived_url = True
+                    item[field] = None  # 先占位保持键的顺序，urlbase 解码后再填入
+                else:
+                    item[field] = f"{URL_PREFIX}{self.images[image]}_{next(values)}"
+            elif spec.endswith(INTERNED):
+                item[spec[:-1]] = self.strings[next(values)]
+            else:
+                item[spec] = next(values)
+        if derived_url:
+            item["url"] = item["urlbase"] + URL_SUFFIX
+        return item
+
+    # ====== 文件 ======
+    def set_file(self, name, records, layout=None, text=None):
+        """设置文件内容；给出原文 text 时检查能否逐字节还原，不能时原样保存"""
+        market = market_of(name)
+        layout = {field: value for field, value in (layout or {"indent": INDENT, "newline": True}).items()
+                  if field in ("indent", "newline")}
+        self.files[name] = {"rows": [self.add(market, item) for item in records], **layout}
+        if text is not None:
+            if self.render(name) != text:
+                self.files[name]["text"] = text
+            self.files[name]["sha1"] = _digest(text)
+
+    def unchanged(self, name, text):
+        """文件内容与存储中的相同；旧存储没有记录 SHA-1 时比较 render 的结果"""
+        info = self.files.get(name)
+        if info is None:
+            return False
+        if "sha1" in info:
+            return info["sha1"] == _digest(text)
+        return self.render(name) == text
+
+    def records(self, name):
+        return [self.decode(self.rows[row_id]) for row_id in self.files[name]["rows"]]
+
+    def render(self, name):
+        info = self.files[name]
+        if "text" in info:
+            return info["text"]
+        text = json_codec.dumps_pretty(self.records(name), indent=info["indent"])
+        return text + "\n" if info["newline"] else text
+
+    def unique_records(self, names=None):
+        """
+        逐条返回 (市场, 记录)，同一市场的相同记录只返回一次（不区分主目录、年份和 weekly）；
+        names 限定只包含这些文件中的记录，按文件顺序返回
+        """
+        if names is None:
+            row_ids = range(len(self.rows))
+        else:
+            row_ids = dict.fromkeys(row_id for name in names for row_id in self.files.get(name, {}).get("rows", ()))
+        for row_id in row_ids:
+            row = self.rows[row_id]
+            yield self.markets[row[1]], self.decode(row)
+
+    def image_markets(self):
+        """{OHR ID: 出现过的市场集合}"""
+        result = {}
+        for row in self.rows:
+            if row[0] >= 0:
+                result.setdefault(self.images[row[0]], set()).add(self.markets[row[1]])
+        return result
+
+    # ====== 整理和保存 ======
+    def share_texts(self, row_ids):
+        """把在这些行中出现多次、尚未共用的文字加入 strings 表，并重新编码这些行"""
+        row_ids = list(row_ids)
+        items = {row_id: self.decode(self.rows[row_id]) for row_id in row_ids}
+        texts = Counter(
+            item[field] for item in items.values()
+            for field in TEXT_FIELDS if isinstance(item.get(field), str)
+        )
+        shared = sorted(text for text, count in texts.items() if count > 1 and text not in self._string_index)
+        if not shared:
+            return
+        for text in shared:
+            self._index(self.strings, self._string_index, text)
+        for row_id, item in items.items():
+            row = self.encode(self.markets[self.rows[row_id][1]], item)
+            del self._row_index[self._row_key(self.rows[row_id])]
+            self._row_index[self._row_key(row)] = row_id
+            self.rows[row_id] = row
+
+    def drop_unused_rows(self):
+        """删除不再被任何文件引用的行，其它行只调整序号，不重新编码"""
+        used = sorted({row_id for info in self.files.values() for row_id in info["rows"]})
+        if len(used) == len(self.rows):
+            return
+        remap = {old: new for new, old in enumerate(used)}
+        self.rows = [self.rows[old] for old in used]
+        self._row_index = {key: remap[old] for key, old in self._row_index.items() if old in remap}
+        for info in self.files.values():
+            info["rows"] = [remap[row_id] for row_id in info["rows"]]
+
+    def compact(self):
+        """
+        重新编码所有行：删除不再被文件引用的行、图片和字段表，
+        并把出现在多行中的文字放入 strings 表。按文件名顺序编码，结果只取决于文件内容（build 使用）；
+        增量同步只用 share_texts 和 drop_unused_rows 处理变化的部分
+        """
+        files = {
+            name: (self.records(name), {field: value for field, value in info.items() if field != "rows"})
+            for name, info in sorted(self.files.items())
+        }
+        texts = Counter()
+        seen_rows = set()
+        for name, (records, _) in files.items():
+            for item in records:
+                key = (market_of(name), json.dumps(item, ensure_ascii=False))
+                if key in seen_rows:
+                    continue
+                seen_rows.add(key)
+                texts.update(item[field] for field in TEXT_FIELDS if isinstance(item.get(field), str))
+        fresh = ImageStore()
+        fresh.strings = sorted(text for text, count in texts.items() if count > 1)
+        fresh._string_index = {text: i for i, text in enumerate(fresh.strings)}
+        for name, (records, info) in files.items():
+            fresh.set_file(name, records, info)
+            fresh.files[name].update({field: info[field] for field in ("text", "sha1") if field in info})
+        self.__dict__.update(fresh.__dict__)
+
+    def to_json(self):
+        return {
+            "version": VERSION,
+            "images": self.images,
+            "markets": self.markets,
+            "shapes": [list(shape) for shape in self.shapes],
+            "strings": self.strings,
+            "rows": self.rows,
+            "files": {
+                name: {**info, "rows": to_ranges(info["rows"])}
+                for name, info in sorted(self.files.items())
+            },
+        }
+
+    def save(self, path=STORE_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = json_codec.dumps_compact(self.to_json()) + "\n"
+        if path.suffix != ".gz":
+            return write_text_if_changed(path, text)
+        try:
+            if _read_text(path) == text:
+                return False
+        except FileNotFoundError:
+            pass
+        # mtime=0：内容相同时压缩结果也相同
+        path.write_bytes(gzip.compress(text.encode("utf-8"), compresslevel=6, mtime=0))
+        return True
+
+    @classmethod
+    def load(cls, path=STORE_PATH):
+        data = json_codec.loads(_read_text(path))
+        if data.get("version") != VERSION:
+            raise ValueError(f"{path}: unsupported store version {data.get('version')}")
+        return cls(data)
+
+    @classmethod
+    def from_files(cls, base_dir=BASE_DIR, names=None):
+        store = cls()
+        for name in names or view_names(base_dir):
+            store.set_file(name, *_read_view(Path(base_dir) / name))
+        store.compact()
+        return store
+
+
+# ====== 与 JSON 视图同步 ======
+def update(base_dir=BASE_DIR, store_path=None):
+    """
+    把与存储生成结果不一致的 JSON 文件同步到存储（已删除的文件从存储中移除，存储不存在时完整生成），
+    返回同步的文件数；store_path 默认为 STORE_PATH
+    """
+    base_dir = Path(base_dir)
+    store_path = STORE_PATH if store_path is None else Path(store_path)
+    if not store_path.exists():
+        store = ImageStore.from_files(base_dir)
+        store.save(store_path)
+        return len(store.files)
+    store = ImageStore.load(store_path)
+    names = set(view_names(base_dir))
+    first_new_row = len(store.rows)
+    count = 0
+    for name in sorted(names | set(store.files)):
+        if name not in names:
+            del store.files[name]
+        else:
+            text = (base_dir / name).read_text(encoding="utf-8")
+            if store.unchanged(name, text):
+                continue
+            store.set_file(name, *_read_view(base_dir / name))
+        count += 1
+    if count:
+        store.share_texts(range(first_new_row, len(store.rows)))
+        store.drop_unused_rows()
+        store.save(store_path)
+    return count
+
+
+def verify(store, base_dir=BASE_DIR):
+    """返回与存储生成结果不一致的文件列表（包括缺少的文件和存储中没有的文件）"""
+    base_dir = Path(base_dir)
+    problems = []
+    for name in sorted(set(view_names(base_dir)) | set(store.files)):
+        path = base_dir / name
+        if name not in store.files:
+            problems.append(f"{name}: not in store")
+        elif not path.exists():
+            problems.append(f"{name}: missing")
+        elif path.read_text(encoding="utf-8") != store.render(name):
+            problems.append(f"{name}: differs")
+    return problems
+
+
+def write_views(store, out_dir=BASE_DIR):
+    """由存储生成所有 JSON 文件，内容不变的文件不重写，返回写入的文件数"""
+    written = 0
+    for name in sorted(store.files):
+        path = Path(out_dir) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written += write_text_if_changed(path, store.render(name))
+    return written
+
+
+def stats(store, base_dir=BASE_DIR):
+    views = sum((Path(base_dir) / name).stat().st_size for name in store.files if (Path(base_dir) / name).exists())
+    records = sum(len(info["rows"]) for info in store.files.values())
+    return {
+        "files": len(store.files),
+        "records": records,
+        "rows": len(store.rows),
+        "images": len(store.images),
+        "shared_images": sum(len(markets) > 1 for markets in store.image_markets().values()),
+        "strings": len(store.strings),
+        "view_bytes": views,
+        "store_bytes": len(json_codec.dumps_compact(store.to_json()).encode("utf-8")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalized image store for the archive JSON files.")
+    parser.add_argument("command", choices=["build", "update", "verify", "render", "stats"])
+    parser.add_argument("--store", default=str(STORE_PATH))
+    parser.add_argument("--out", default=str(BASE_DIR), help="output directory for render")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "build":
+        store = ImageStore.from_files()
+        store.save(args.store)
+        print(f"✓ Built {args.store} from {len(store.files)} file(s) in {time.perf_counter() - start:.2f}s")
+        print(json.dumps(stats(store), indent=2))
+        return 0
+
+    if args.command == "update":
+        synced = update(store_path=args.store)
+        print(f"✓ Synced {synced} file(s) to {args.store} in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    store = ImageStore.load(args.store)
+    if args.command == "verify":
+        problems = verify(store)
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        print(f"{'✓' if not problems else '✗'} {len(store.files) - len(problems)}/{len(store.files)} view(s) match "
+              f"({time.perf_counter() - start:.2f}s)")
+        return 1 if problems else 0
+    if args.command == "render":
+        written = write_views(store, args.out)
+        print(f"✓ Rendered {len(store.files)} view(s) to {args.out}, {written} changed ({time.perf_counter() - start:.2f}s)")
+        return 0
+    print(json.dumps(stats(store), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
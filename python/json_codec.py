@@ -0,0 +1,94 @@
+import json
+
+# JSON 编解码层：
+# - 解析和紧凑输出（供前端等机器读取的副本）在安装了 orjson 时使用 orjson，否则使用标准库；
+# - 缩进输出（仓库中供人阅读的文件）必须与 json.dumps(..., ensure_ascii=False, indent=4)
+#   逐字节一致。存档文件都是“扁平对象数组”，对这种结构走快速路径，其它结构回退到标准库。
+# ujson 解析这些文件并不比标准库快，所以没有使用。
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(text):
+    # orjson 把超出 64 位的整数解析为浮点数；存档中没有这样的数字
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps_compact(data):
+    """最小化输出（无空白），中文等字符不转义"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass  # 例如超出 64 位的整数，交给标准库
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_record_encoders = {}
+
+
+def _records_encoder(indent):
+    # 标准库只在 indent=None 时使用 C 编码器。把“换行 + 两级缩进”作为分隔符，
+    # 一次编码整个数组，字段部分就与缩进模式完全相同，之后只需修正对象的边界。
+    # 字符串中的换行总会被转义，所以这个分隔符不会出现在字符串内部。
+    if indent not in _record_encoders:
+        _record_encoders[indent] = json.JSONEncoder(
+            ensure_ascii=False,
+            separators=(",\n" + " " * (indent * 2), ": "),
+        )
+    return _record_encoders[indent]
+
+
+def _is_flat_records(records, scalar_types):
+    for record in records:
+        if type(record) is not dict:
+            return False
+        for key, value in record.items():
+            if type(key) is not str or not isinstance(value, scalar_types):
+                return False
+    return True
+
+
+def _orjson_records(records, indent):
+    # orjson 只支持 2 空格缩进；字符串里的换行一定被转义，
+    # 所以可以安全地把行首缩进替换成 indent 对应的空格数
+    text = orjson.dumps(records, option=orjson.OPT_INDENT_2).decode("utf-8")
+    pad1 = "\n" + " " * indent
+    pad2 = "\n" + " " * (indent * 2)
+    return text.replace('\n    "', pad2 + '"').replace("\n  {", pad1 + "{").replace("\n  }", pad1 + "}")
+
+
+def _dumps_records(records, indent):
+    """把 [{key: 标量, ...}, ...] 按 indent 格式输出；结构不符合时返回 None"""
+    if not records:
+        return "[]"
+    # 浮点数的格式 orjson 与标准库不同（1e-05 / 1e-5），含浮点数时不用 orjson
+    if orjson is not None and _is_flat_records(records, (str, int, bool, type(None))):
+        try:
+            return _orjson_records(records, indent)
+        except orjson.JSONEncodeError:
+            pass
+    if not _is_flat_records(records, _SCALAR_TYPES) or not all(records):
+        return None
+    pad1 = "\n" + " " * indent
+    pad2 = "\n" + " " * (indent * 2)
+    text = _records_encoder(indent).encode(records)
+    # text 形如 [{"k": "v",<pad2>"k2": "v2"},<pad2>{...}]
+    body = text[2:-2].replace("}," + pad2 + "{", pad1 + "}," + pad1 + "{" + pad2)
+    return "[" + pad1 + "{" + pad2 + body + pad1 + "}\n]"
+
+
+def dumps_pretty(data, indent=4):
+    """与 json.dumps(data, ensure_ascii=False, indent=indent) 逐字节一致"""
+    if type(data) is list:
+        text = _dumps_records(data, indent)
+        if text is not None:
+            return text
+    return json.dumps(data, ensure_ascii=False, indent=indent)
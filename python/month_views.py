@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import archive_io
+import json_codec
+from data_index import BASE_DIR, region_files, write_text_if_changed
+
+# archive.html 的按月分片视图：默认的分页浏览和按月筛选只下载要显示的那几个月，而不是整年的区域文件。
+#
+#   bing/months/bing_en-US/index.json    清单：每月记录数和内容哈希、固定大小的分页表、各年份源文件信息
+#   bing/months/bing_en-US/202608.json   该月的记录（最小化 JSON，按日期从新到旧）
+#
+# - 分页表 pages[页号 - 1] = [[月份, 偏移, 数量], ...]，每页 ITEMS_PER_PAGE 条，与 archive.js 的分页一致；
+# - 记录的去重和排序与 archive.js 加载年份文件时相同（按 fullstartdate/date 去重，年份从新到旧拼接后按日期排序）；
+# - 增量更新：清单记录每个年份文件的 SHA-1、记录数和其中各月份的记录数，只重新生成内容变化的年份文件涉及的月份，
+#   内容不变的月份文件不重写；分页表由每月记录数重新计算。
+#   （修复脚本可能在不改变文件大小的情况下改写记录，所以比较内容哈希而不是文件大小）
+#
+# 默认不生成：设置 BING_MONTH_VIEWS=1 或手动运行一次本脚本后，bing/months 存在，
+# 之后 bing_260204.py 和修复脚本每次运行都会增量更新它。archive.js 没有分片时按年份加载；
+# 清单 sources 中各年份文件的记录数与 data_index.json 不一致（分片落后于数据文件）时同样按年份加载。
+#
+# 用法（在仓库根目录执行）: python python/month_views.py [--force]
+MONTHS_DIR = BASE_DIR / "months"
+VERSION = 2
+ITEMS_PER_PAGE = 31  # 与 assets/archive.js 中的 ARCHIVE_CONFIG.itemsPerPage 相同
+ENABLED = os.environ.get("BING_MONTH_VIEWS") == "1"
+
+
+def enabled(base_dir=BASE_DIR):
+    """设置了 BING_MONTH_VIEWS=1，或者分片已经生成过（之后每次运行都要保持最新）"""
+    return ENABLED or (Path(base_dir) / MONTHS_DIR.name).is_dir()
+
+
+def item_key(item):
+    return item.get("fullstartdate") or item.get("date")
+
+
+def year_records(path):
+    """读取年份文件：按 fullstartdate/date 去重（保留第一条），忽略没有有效日期的记录；返回 (记录, 文件中的记录数)"""
+    seen = set()
+    records = []
+    items = archive_io.load_json(path)
+    for item in items:
+        key = item_key(item)
+        if key in seen:
+            continue
+        seen.add(key)
+        date = item.get("date")
+        if isinstance(date, str) and len(date) == 8:
+            records.append(item)
+    return records, len(items)
+
+
+def paginate(month_counts, per_page=ITEMS_PER_PAGE):
+    """[(月份, 记录数)]（从新到旧） -> 每页的 [[月份, 偏移, 数量], ...]"""
+    pages = []
+    page = []
+    room = per_page
+    for month, count in month_counts:
+        offset = 0
+        while offset < count:
+            take = min(room, count - offset)
+            page.append([month, offset, take])
+            offset += take
+            room -= take
+            if room == 0:
+                pages.append(page)
+                page, room = [], per_page
+    if page:
+        pages.append(page)
+    return pages
+
+
+def load_manifest(out_dir):
+    try:
+        with open(Path(out_dir) / "index.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != VERSION or manifest.get("itemsPerPage") != ITEMS_PER_PAGE:
+        return None
+    return manifest
+
+
+def update_region(region, paths, out_dir, force=False):
+    """更新一个区域的月份分片和清单；没有变化时返回 None，否则返回重写的月份文件数"""
+    out_dir = Path(out_dir)
+    manifest = None if force else load_manifest(out_dir)
+    old_sources = manifest["sources"] if manifest else {}
+    months = dict(manifest["months"]) if manifest else {}
+
+    by_year = {path.parent.name: path for path in paths}
+    hashes = {year: hashlib.sha1(path.read_bytes()).hexdigest() for year, path in by_year.items()}
+    changed = {
+        year for year in hashes.keys() | old_sources.keys()
+        if old_sources.get(year, {}).get("sha1") != hashes.get(year)
+    }
+    if manifest and not changed:
+        return None
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # 受影响的月份：变化的年份文件在更新前后包含的所有月份
+    affected = set()
+    for year in changed:
+        affected.update(old_sources.get(year, {}).get("months", {}))
+    sources = {year: source for year, source in old_sources.items() if year in hashes and year not in changed}
+    loaded = {}
+    for year in sorted(changed & hashes.keys()):
+        records, total = year_records(by_year[year])
+        loaded[year] = records
+        counts = Counter(item["date"][:6] for item in records)
+        sources[year] = {"sha1": hashes[year], "records": total, "months": dict(sorted(counts.items()))}
+        affected.update(counts)
+    # 同一个月的记录也可能来自其它年份文件（日期不属于所在年份的记录）
+    for year, source in sources.items():
+        if year not in loaded and affected.intersection(source["months"]):
+            loaded[year] = year_records(by_year[year])[0]
+
+    grouped = {month: [] for month in affected}
+    for year in sorted(loaded, reverse=True):
+        for item in loaded[year]:
+            month = item["date"][:6]
+            if month in grouped:
+                grouped[month].append(item)
+
+    written = 0
+    for month, records in sorted(grouped.items()):
+        path = out_dir / f"{month}.json"
+        if not records:
+            months.pop(month, None)
+            path.unlink(missing_ok=True)
+            continue
+        records.sort(key=lambda item: item["date"], reverse=True)
+        text = json_codec.dumps_compact(records)
+        months[month] = {"count": len(records), "hash": hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]}
+        written += write_text_if_changed(path, text)
+
+    if not manifest:
+        # 完整重建时删除已不存在的月份文件
+        for stale in out_dir.glob("[0-9][0-9][0-9][0-9][0-9][0-9].json"):
+            if stale.stem not in months:
+                stale.unlink()
+
+    ordered = sorted(months.items(), reverse=True)
+    manifest = {
+        "version": VERSION,
+        "region": region,
+        "itemsPerPage": ITEMS_PER_PAGE,
+        "total": sum(info["count"] for _, info in ordered),
+        "months": dict(ordered),
+        "pages": paginate([(month, info["count"]) for month, info in ordered]),
+        "sources": dict(sorted(sources.items())),
+    }
+    write_text_if_changed(out_dir / "index.json", json_codec.dumps_compact(manifest) + "\n")
+    return written
+
+
+def update(base_dir=BASE_DIR, months_dir=None, force=False):
+    """更新所有区域，返回 {区域: 重写的月份文件数}（只包含有变化的区域）；months_dir 默认为 base_dir/months"""
+    months_dir = Path(base_dir) / MONTHS_DIR.name if months_dir is None else Path(months_dir)
+    updated = {}
+    for region, paths in region_files(base_dir).items():
+        written = update_region(region, paths, months_dir / region, force)
+        if written is not None:
+            updated[region] = written
+    return updated
+
+
+def main():
+    force = "--force" in sys.argv[1:]
+    start = time.perf_counter()
+    updated = update(force=force)
+    for region, written in updated.items():
+        print(f"  {region}: rewrote {written} month file(s)")
+    print(f"✓ Month views: {len(updated)} region(s) updated in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
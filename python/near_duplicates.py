@@ -0,0 +1,358 @@
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+import archive_io
+import bing_url
+import image_store
+from data_index import BASE_DIR
+from repair_archive_data import archive_paths
+
+# 近似重复检测：找出 OHR ID 不同、但文字描述或拍摄地点相近的壁纸（换名重发、同一地点不同年份）。
+#
+# - 每个 (市场, OHR ID) 作为一篇文档，文字取 copyright + copyrightKeyword + description，
+#   规范化（NFKC、小写、去掉重音）后切成词（中日文按相邻两个字切分），各字段内相邻两词作为 shingle；
+#   摄影师署名 "(© ...)" 和搜索关键词整体各作为一个 shingle。
+#   shingle 太少的文档（例如只有很短的 copyright）相似度没有意义，只参与地点匹配。
+# - MinHash 使用单次哈希分桶 (one permutation hashing)：每个 shingle 只计算一次 64 位哈希，
+#   按低位分到 NUM_HASHES 个桶中取最小值，空桶从右侧最近的非空桶借值（rotation densification）。
+# - LSH：签名分成 BANDS 段，每段 ROWS 个值，任一段完全相同即成为候选对。Jaccard 为 s 的两篇文档
+#   成为候选对的概率是 1 - (1 - s^ROWS)^BANDS：32 段 x 3 行时 S 曲线中点约为 0.31，
+#   s = 0.4 / 0.5 / 0.6 时分别为 0.88 / 0.986 / 0.9996。
+#   候选对再用 shingle 集合计算精确的 Jaccard 与 THRESHOLD 比较（签名只用于分桶，不用来估计相似度，
+#   否则相似度在阈值附近的对有一半会因估计误差漏掉），所以召回率就是上面的候选概率：
+#   在当前存档中 Jaccard >= 0.5 的 240 对全部找到。
+# - 另外按 maplink 坐标分网格，距离 near_km 以内的网格中的记录也成为候选对
+#   （经度方向按 1/cos(纬度) 放宽，跨越 ±180° 时回绕）。
+#   候选对数量与相似对数量相关，而不是文档数的平方。
+#
+# 用法（在仓库根目录执行）:
+#   python python/near_duplicates.py scan --out near_duplicates.json
+#   python python/near_duplicates.py query OHR.JulierPass --market ROW
+#   python python/near_duplicates.py scan --store image_store.json.gz   # 读取规范化存储（见 image_store.py）
+NUM_HASHES = 96
+BANDS = 32
+ROWS = NUM_HASHES // BANDS
+THRESHOLD = 0.5
+MIN_SHINGLES = 4
+GRID_DEGREES = 0.05   # 约 5 公里（经度方向乘以 cos(纬度)）
+GRID_COLUMNS = round(360 / GRID_DEGREES)
+KM_PER_DEGREE = math.pi * 6371.0 / 180
+NEAR_KM = 2.0
+
+_WORD = re.compile(r"\w+")
+_CREDIT = re.compile(r"\(©([^)]*)\)")
+_CJK_START = 0x2E80
+_MAX_HASH = (1 << 64) - 1
+_token_hashes = {}
+
+
+# ====== 文本 -> shingle ======
+def normalize(text):
+    text = unicodedata.normalize("NFKD", unicodedata.normalize("NFKC", text).lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def words(text):
+    """切词；中日文等连续书写的文字按相邻两个字切分"""
+    tokens = []
+    for word in _WORD.findall(normalize(text)):
+        if ord(word[0]) >= _CJK_START:
+            tokens.extend(word[i:i + 2] for i in range(max(len(word) - 1, 1)))
+        elif not word.isdigit() or len(word) == 4:  # 数字只保留年份
+            tokens.append(word)
+    return tokens
+
+
+def bigrams(tokens):
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def shingles(item):
+    copyright = item.get("copyright") or ""
+    result = set()
+    credit = _CREDIT.search(copyright)
+    if credit:
+        result.add("c:" + " ".join(words(credit.group(1))))
+        copyright = _CREDIT.sub(" ", copyright)
+    keyword = words(item.get("copyrightKeyword") or "")
+    if keyword:
+        result.add("k:" + " ".join(keyword))
+    result |= bigrams(words(copyright))
+    result |= bigrams(words(item.get("description") or ""))
+    return result
+
+
+def token_hash(token):
+    value = _token_hashes.get(token)
+    if value is None:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = _token_hashes[token] = int.from_bytes(digest, "little")
+    return value
+
+
+def minhash(tokens, num_hashes=NUM_HASHES):
+    """单次哈希分桶的 MinHash 签名；tokens 少于 MIN_SHINGLES 个时返回 None"""
+    if len(tokens) < MIN_SHINGLES:
+        return None
+    bins = [None] * num_hashes
+    for token in tokens:
+        value = token_hash(token)
+        index, rest = value % num_hashes, value // num_hashes
+        if bins[index] is None or rest < bins[index]:
+            bins[index] = rest
+    # 空桶取右侧（循环）最近的非空桶，并按距离加上偏移，避免空桶之间产生虚假的相等
+    signature = list(bins)
+    for index in range(num_hashes):
+        if signature[index] is None:
+            distance = 1
+            while bins[(index + distance) % num_hashes] is None:
+                distance += 1
+            signature[index] = bins[(index + distance) % num_hashes] + distance * (_MAX_HASH // num_hashes + 1)
+    return tuple(signature)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+# ====== 地点 ======
+def coordinates(item):
+    try:
+        lat, lon = (float(v) for v in (item.get("maplink") or "").split(","))
+    except ValueError:
+        return None
+    return lat, lon
+
+
+def distance_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(min(1.0, h)))
+
+
+def _rank(match):
+    """排序：文字相似度高的在前，其次距离近的在前"""
+    _, text, distance = match
+    return -(text or 0), distance if distance is not None else math.inf
+
+
+# ====== 索引 ======
+class NearDuplicateIndex:
+    def __init__(self, num_hashes=NUM_HASHES, bands=BANDS):
+        self.num_hashes = num_hashes
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.docs = []                      # [{"market", "image_id", "date", "copyright", "coords"}]
+        self.signatures = []
+        self.token_sets = []                # 每篇文档 shingle 哈希的集合，用于计算精确的 Jaccard
+        self.keys = {}                      # (market, image_id) -> 文档序号
+        self.buckets = defaultdict(list)    # (段号, 签名片段) -> [文档序号]
+        self.grid = defaultdict(list)       # (纬度格, 经度格) -> [文档序号]
+        self.grid_columns = defaultdict(set)  # 纬度格 -> 有文档的经度格
+
+    def add(self, market, item):
+        image_id = bing_url.ohr_id(item.get("urlbase") or item.get("url") or "")
+        if not image_id or (market, image_id) in self.keys:
+            return None
+        tokens = shingles(item)
+        signature = minhash(tokens, self.num_hashes)
+        coords = coordinates(item)
+        if signature is None and coords is None:
+            return None
+
+        doc_id = len(self.docs)
+        self.keys[(market, image_id)] = doc_id
+        self.docs.append({
+            "market": market,
+            "image_id": image_id,
+            "date": item.get("date"),
+            "copyright": item.get("copyright"),
+            "coords": coords,
+        })
+        self.signatures.append(signature)
+        self.token_sets.append(frozenset(map(token_hash, tokens)) if signature is not None else None)
+        if signature is not None:
+            for band in range(self.bands):
+                self.buckets[(band, signature[band * self.rows:(band + 1) * self.rows])].append(doc_id)
+        if coords is not None:
+            row, col = self._cell(coords)
+            self.grid[(row, col)].append(doc_id)
+            self.grid_columns[row].add(col)
+        return doc_id
+
+    @staticmethod
+    def _cell(coords):
+        # 经度格按 360° 取模，-180° 和 180° 两侧是相邻的格子
+        return int(math.floor(coords[0] / GRID_DEGREES)), int(math.floor(coords[1] / GRID_DEGREES)) % GRID_COLUMNS
+
+    def _nearby(self, doc_id, near_km=NEAR_KM):
+        """
+        距离可能不超过 near_km 的网格中的文档。纬度方向按 near_km 换算格数；
+        经度方向每度的距离乘以 cos(纬度)，按这几行中最靠近极点的纬度放宽格数，跨越 ±180° 时回绕，
+        接近极点（需要覆盖整圈经度）时取该行所有的格子
+        """
+        coords = self.docs[doc_id]["coords"]
+        if coords is None:
+            return
+        row, col = self._cell(coords)
+        reach = near_km / KM_PER_DEGREE
+        dr_max = math.ceil(reach / GRID_DEGREES)
+        polar = min(90.0, abs(coords[0]) + reach + GRID_DEGREES)
+        cos_lat = math.cos(math.radians(polar))
+        dc_max = math.ceil(reach / cos_lat / GRID_DEGREES) if cos_lat > 0 else GRID_COLUMNS
+        for dr in range(-dr_max, dr_max + 1):
+            columns = self.grid_columns.get(row + dr)
+            if not columns:
+                continue
+            if 2 * dc_max + 1 >= GRID_COLUMNS:
+                nearby_columns = columns
+            else:
+                nearby_columns = ((col + dc) % GRID_COLUMNS for dc in range(-dc_max, dc_max + 1))
+            for c in nearby_columns:
+                yield from self.grid.get((row + dr, c), ())
+
+    def candidates(self, doc_id, near_km=NEAR_KM):
+        """与 doc_id 在某个 LSH 段或距离 near_km 以内的地理网格中相同的文档"""
+        found = set()
+        signature = self.signatures[doc_id]
+        if signature is not None:
+            for band in range(self.bands):
+                found.update(self.buckets[(band, signature[band * self.rows:(band + 1) * self.rows])])
+        found.update(self._nearby(doc_id, near_km))
+        found.discard(doc_id)
+        return found
+
+    def score(self, a, b):
+        """返回 (文字相似度, 距离 km)；无法计算的项为 None"""
+        tokens_a, tokens_b = self.token_sets[a], self.token_sets[b]
+        text = jaccard(tokens_a, tokens_b) if tokens_a is not None and tokens_b is not None else None
+        coords_a, coords_b = self.docs[a]["coords"], self.docs[b]["coords"]
+        distance = distance_km(coords_a, coords_b) if coords_a and coords_b else None
+        return text, distance
+
+    def matches(self, doc_id, threshold=THRESHOLD, near_km=NEAR_KM):
+        """
+        doc_id 的近似重复（文字相似度 >= threshold 或距离 <= near_km），不包括同一 OHR ID。
+        同一张图片在多个市场都匹配时只保留得分最高的一条。返回 [(文档序号, 相似度, 距离)]
+        """
+        image_id = self.docs[doc_id]["image_id"]
+        best = {}
+        for other in self.candidates(doc_id, near_km):
+            other_image = self.docs[other]["image_id"]
+            if other_image == image_id:
+                continue
+            text, distance = self.score(doc_id, other)
+            if (text is not None and text >= threshold) or (distance is not None and distance <= near_km):
+                match = (other, text, distance)
+                if other_image not in best or _rank(match) < _rank(best[other_image]):
+                    best[other_image] = match
+        return sorted(best.values(), key=_rank)
+
+    def pairs(self, threshold=THRESHOLD, near_km=NEAR_KM):
+        """所有不同 OHR ID 之间的近似重复对，每对图片只出现一次"""
+        best = {}
+        for doc_id in range(len(self.docs)):
+            for other, text, distance in self.matches(doc_id, threshold, near_km):
+                key = tuple(sorted((self.docs[doc_id]["image_id"], self.docs[other]["image_id"])))
+                match = (doc_id, other, text, distance)
+                if key not in best or _rank(match[1:]) < _rank(best[key][1:]):
+                    best[key] = match
+        return sorted(best.values(), key=lambda match: _rank(match[1:]))
+
+    def describe(self, doc_id):
+        doc = self.docs[doc_id]
+        return {key: doc[key] for key in ("market", "image_id", "date", "copyright")}
+
+
+def build_index(paths=None, markets=None, store=None):
+    """从 JSON 文件建立索引；给出 store（image_store.ImageStore）时改为读取规范化存储中每个市场的记录"""
+    index = NearDuplicateIndex()
+    if store is not None:
+        names = [Path(path).relative_to(BASE_DIR).as_posix() for path in paths or archive_paths()]
+        for market, item in store.unique_records(names):
+            if not markets or market in markets:
+                index.add(market, item)
+        return index
+    for path in paths or archive_paths():
+        market = Path(path).stem[len("bing_"):]
+        if markets and market not in markets:
+            continue
+        for item in archive_io.load_json(path):
+            index.add(market, item)
+    return index
+
+
+def pair_entry(index, a, b, text, distance):
+    return {
+        "a": index.describe(a),
+        "b": index.describe(b),
+        "text_similarity": round(text, 3) if text is not None else None,
+        "distance_km": round(distance, 2) if distance is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate wallpapers (MinHash/LSH over text and maplink).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p):
+        p.add_argument("--paths", nargs="*", help="archive files to index (default: root, year and weekly files)")
+        p.add_argument("--markets", nargs="*", help="only index these markets")
+        p.add_argument("--store", help="read the --paths records from an image store (image_store.json.gz) "
+                                       "instead of the JSON files")
+        p.add_argument("--threshold", type=float, default=THRESHOLD, help="minimum text Jaccard")
+        p.add_argument("--near-km", type=float, default=NEAR_KM, help="maximum maplink distance")
+
+    scan_p = sub.add_parser("scan", help="list near-duplicate pairs across the archive")
+    add_common(scan_p)
+    scan_p.add_argument("--out", help="write pairs as JSON to this file")
+
+    query_p = sub.add_parser("query", help="show records that look like one image")
+    add_common(query_p)
+    query_p.add_argument("image_id", help="OHR ID, e.g. OHR.JulierPass")
+    query_p.add_argument("--market", default="ROW")
+    query_p.add_argument("--top", type=int, default=10)
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    store = image_store.ImageStore.load(args.store) if args.store else None
+    index = build_index(args.paths, args.markets, store)
+    print(f"Indexed {len(index.docs)} documents in {time.perf_counter() - start:.2f}s")
+
+    if args.command == "query":
+        doc_id = index.keys.get((args.market, args.image_id))
+        if doc_id is None:
+            print(f"{args.image_id} not found in {args.market}")
+            return 1
+        print(f"{args.image_id} [{args.market}] {index.docs[doc_id]['date']}: {index.docs[doc_id]['copyright']}")
+        for other, text, distance in index.matches(doc_id, args.threshold, args.near_km)[:args.top]:
+            doc = index.docs[other]
+            text_s = f"{text:.2f}" if text is not None else "-"
+            dist_s = f"{distance:.1f} km" if distance is not None else "-"
+            print(f"  {text_s:>5} {dist_s:>10}  {doc['image_id']} [{doc['market']}] {doc['date']}: {doc['copyright']}")
+        return 0
+
+    pairs = [pair_entry(index, *pair) for pair in index.pairs(args.threshold, args.near_km)]
+    print(f"Found {len(pairs)} near-duplicate pair(s) in {time.perf_counter() - start:.2f}s")
+    for pair in pairs[:20]:
+        text_s = pair["text_similarity"] if pair["text_similarity"] is not None else "-"
+        dist_s = f"{pair['distance_km']} km" if pair["distance_km"] is not None else "-"
+        print(f"  {text_s:>5} {dist_s:>10}  "
+              f"{pair['a']['image_id']} [{pair['a']['market']}] {pair['a']['date']}  <->  "
+              f"{pair['b']['image_id']} [{pair['b']['market']}] {pair['b']['date']}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(pairs, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Pairs written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
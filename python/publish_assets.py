@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import data_index
+import json_codec
+from data_index import BASE_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 发布阶段：把前端读取的 JSON（主目录、old-2408 和年份目录中的 bing_*.json）写成
+# 带内容哈希的最小化副本，以及预压缩的 .gz / .br（安装了 brotli 时）兄弟文件：
+#
+#   bing/dist/2026/bing_en-US.3f9c0a1b2e.json      最小化 JSON，文件名随内容变化，可永久缓存
+#   bing/dist/2026/bing_en-US.3f9c0a1b2e.json.gz   供 gzip_static / brotli_static 等直接发送
+#   bing/dist/2026/bing_en-US.3f9c0a1b2e.json.br
+#
+# data_index.json 的 "assets" 记录 源路径 -> 发布文件，archive.js / script.js 有这一项时读取发布文件，
+# 否则（未发布或文件不存在）仍读取原路径。bing/dist/manifest.json 额外记录每个源文件的 SHA-1，
+# 源文件内容不变时不重新生成；不再使用的旧文件会被删除。
+#
+# 预压缩文件每天都会产生新的二进制文件，所以日常运行默认不发布（设置 BING_PUBLISH=1 开启），
+# 适合把 bing/ 部署到静态服务器的流程在部署前执行。
+#
+# 用法（在仓库根目录执行）: python python/publish_assets.py [--force]
+DIST_DIR = BASE_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+VERSION = 1
+HASH_LENGTH = 10
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def asset_sources(base_dir=BASE_DIR):
+    """前端读取的文件（相对 base_dir 的路径）"""
+    base_dir = Path(base_dir)
+    paths = sorted(base_dir.glob("bing_*.json"))
+    paths.extend(sorted((base_dir / "old-2408").glob("bing_*.json")))
+    paths.extend(data_index.year_files(base_dir))
+    return [path.relative_to(base_dir).as_posix() for path in paths if path.name.startswith("bing_")]
+
+
+def compressed_variants(data):
+    """{扩展名: 压缩后的字节}；gzip 固定 mtime=0，相同内容得到相同的文件"""
+    variants = {".gz": gzip.compress(data, GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=BROTLI_QUALITY)
+    return variants
+
+
+def publish_file(base_dir, dist_dir, key, source_hash):
+    """生成一个源文件的发布文件，返回清单条目"""
+    data = json_codec.dumps_compact(json_codec.loads((Path(base_dir) / key).read_text(encoding="utf-8"))).encode("utf-8")
+    digest = hashlib.sha1(data).hexdigest()[:HASH_LENGTH]
+    name = f"{Path(key).stem}.{digest}.json"
+    target = Path(dist_dir) / Path(key).parent / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(data)
+
+    entry = {"file": target.relative_to(base_dir).as_posix(), "source": source_hash, "bytes": len(data)}
+    for suffix, compressed in compressed_variants(data).items():
+        target.with_name(name + suffix).write_bytes(compressed)
+        entry[suffix[1:]] = len(compressed)
+    return entry
+
+
+def load_manifest(dist_dir=DIST_DIR):
+    try:
+        with open(Path(dist_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return manifest.get("assets", {}) if manifest.get("version") == VERSION else {}
+
+
+def _is_current(base_dir, entry, source_hash):
+    if not entry or entry.get("source") != source_hash:
+        return False
+    target = Path(base_dir) / entry["file"]
+    # 之后安装或卸载了 brotli 时也重新生成
+    if ("br" in entry) != (brotli is not None):
+        return False
+    return target.exists() and all(
+        target.with_name(target.name + f".{ext}").exists() for ext in ("gz", "br") if ext in entry
+    )
+
+
+def remove_stale(base_dir, dist_dir, assets):
+    """删除清单中不再引用的发布文件"""
+    keep = {Path(base_dir) / entry["file"] for entry in assets.values()}
+    removed = 0
+    for path in Path(dist_dir).rglob("bing_*.json*"):
+        if path.name.endswith((".gz", ".br")):
+            current = path.with_name(path.name.rsplit(".", 1)[0])
+        else:
+            current = path
+        if current not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def publish(base_dir=BASE_DIR, dist_dir=None, force=False):
+    """
+    生成有变化的发布文件，写入 bing/dist/manifest.json，并把 "assets" 写入 data_index.json。
+    返回 (重新生成的文件数, 删除的旧文件数)
+    """
+    dist_dir = Path(base_dir) / DIST_DIR.name if dist_dir is None else Path(dist_dir)
+    previous = {} if force else load_manifest(dist_dir)
+    assets = {}
+    generated = 0
+    for key in asset_sources(base_dir):
+        source_hash = hashlib.sha1((Path(base_dir) / key).read_bytes()).hexdigest()
+        entry = previous.get(key)
+        if not _is_current(base_dir, entry, source_hash):
+            entry = publish_file(base_dir, dist_dir, key, source_hash)
+            generated += 1
+        assets[key] = entry
+    removed = remove_stale(base_dir, dist_dir, assets)
+
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    data_index.write_text_if_changed(
+        dist_dir / MANIFEST_NAME,
+        json.dumps({"version": VERSION, "assets": assets}, ensure_ascii=False, indent=2) + "\n",
+    )
+
+    # data_index.json 中只保留前端需要的字段
+    index_path = Path(base_dir) / data_index.INDEX_PATH.name
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    checksum = index.pop("checksum", None)
+    index["assets"] = {
+        key: {field: value for field, value in entry.items() if field != "source"}
+        for key, entry in assets.items()
+    }
+    data_index.write_index(index, base_dir, checksum)
+    return generated, removed
+
+
+def main():
+    force = "--force" in sys.argv[1:]
+    start = time.perf_counter()
+    generated, removed = publish(force=force)
+    print(f"✓ Published {generated} file(s), removed {removed} stale file(s) in {time.perf_counter() - start:.2f}s "
+          f"(brotli: {'yes' if brotli is not None else 'not installed'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
+import argparse
+import hashlib
 import json
+import os
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import archive_io
+import bing_url
+import data_index
+import month_views
+import search_index
 
 BASE_DIR = Path("bing")
 REPORT_PATH = Path("python/archive_data_repair_report.json")
+MANIFEST_PATH = Path("python/archive_repair_manifest.json")
+MANIFEST_VERSION = 1
 REQUIRED_FIELDS = [
     "fullstartdate",
     "date",
@@ -16,18 +27,13 @@ REQUIRED_FIELDS = [
     "hsh",
 ]
 OPTIONAL_FIELDS = {"description", "maplink"}
+# RecordIndex 中用作查找键的字段
+KEY_FIELDS = {"fullstartdate", "date", "url", "urlbase"}
 POST_2408_CUTOFF = "20240801"
-
-
-def load_json(path):
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def write_json(path, data):
-    path.write_text(
-        json.dumps(data, ensure_ascii=False, indent=4) + "\n",
-        encoding="utf-8",
-    )
+# --jobs 只在要读取的文件足够多、足够大时才启用进程池：当前整个存档约 90 个文件、22 MB，
+# 串行修复不到 1 秒，进程启动和在进程间传递解析结果的开销反而更大
+PARALLEL_MIN_FILES = 32
+PARALLEL_MIN_BYTES = 64 << 20
 
 
 def archive_paths():
@@ -47,12 +53,7 @@ def region_from_path(path):
 
 
 def image_id(item):
-    urlbase = item.get("urlbase") or item.get("url") or ""
-    marker = "OHR."
-    if marker not in urlbase:
-        return None
-    tail = urlbase.split(marker, 1)[1]
-    return "OHR." + tail.split("_", 1)[0].split(".", 1)[0]
+    return bing_url.ohr_id(item.get("urlbase") or item.get("url") or "")
 
 
 def corrected_en_gb_date(item):
@@ -69,53 +70,137 @@ def sort_items(items):
     items.sort(key=lambda x: (x.get("date") or "", x.get("fullstartdate") or ""), reverse=True)
 
 
-def build_sources(files):
-    by_region_fullstart = defaultdict(list)
-    by_region_date_image = defaultdict(list)
-    by_region_date_urlbase = defaultdict(list)
+def is_year_file(path):
+    return path.parent.name.isdigit()
 
-    for path, data in files.items():
-        region = region_from_path(path)
-        for item in data:
-            fullstartdate = item.get("fullstartdate")
-            date = item.get("date")
+
+def item_identity(item):
+    if item.get("fullstartdate"):
+        return ("fullstartdate", item["fullstartdate"])
+    img_id = image_id(item)
+    if item.get("date") and img_id:
+        return ("date_image", item["date"], img_id)
+    if item.get("date") and item.get("urlbase"):
+        return ("date_urlbase", item["date"], item["urlbase"])
+    return None
+
+
+def positions(data, items):
+    """返回 items 中每条记录在 data 中的位置 {id(item): index}"""
+    wanted = {id(item) for item in items}
+    return {id(item): index for index, item in enumerate(data) if id(item) in wanted}
+
+
+class RecordIndex:
+    """
+    一次遍历所有文件建立各修复步骤需要的查找结构：
+    - 按 (区域, fullstartdate) / (区域, date, 图片ID) / (区域, date, urlbase) 查找同一图片的其它记录；
+    - 年份文件的记录身份计数和日期不属于该年份的记录；
+    - 每个文件的日期计数。
+    各步骤修改数据时通过 add / remove / set_date 同步更新，不再重复遍历全部记录。
+    """
+
+    def __init__(self, files):
+        self.by_fullstart = defaultdict(list)
+        self.by_date_image = defaultdict(list)
+        self.by_date_urlbase = defaultdict(list)
+        self.identities = {}   # 年份文件 path -> Counter(身份)
+        self.wrong_year = {}   # 年份文件 path -> {id(item): item}
+        self.date_counts = {}  # path -> Counter(date)
+        self.missing = {}      # path -> [(item, 缺失字段)]，由 fill_required_fields 填写
+        self._regions = {}
+        for path, data in files.items():
+            self.date_counts[path] = Counter()
+            if is_year_file(path):
+                self.identities[path] = Counter()
+                self.wrong_year[path] = {}
+            for item in data:
+                self.add(path, item)
+
+    def _region(self, path):
+        region = self._regions.get(path)
+        if region is None:
+            region = self._regions[path] = region_from_path(path)
+        return region
+
+    def _source_lists(self, region, item):
+        lists = []
+        fullstartdate = item.get("fullstartdate")
+        date = item.get("date")
+        urlbase = item.get("urlbase")
+        if fullstartdate:
+            lists.append(self.by_fullstart[(region, fullstartdate)])
+        if date:
             img_id = image_id(item)
-            urlbase = item.get("urlbase")
-            if fullstartdate:
-                by_region_fullstart[(region, fullstartdate)].append(item)
-            if date and img_id:
-                by_region_date_image[(region, date, img_id)].append(item)
-            if date and urlbase:
-                by_region_date_urlbase[(region, date, urlbase)].append(item)
+            if img_id:
+                lists.append(self.by_date_image[(region, date, img_id)])
+            if urlbase:
+                lists.append(self.by_date_urlbase[(region, date, urlbase)])
+        return lists
+
+    def sources(self, region, item):
+        """同一区域中可能是同一张图片的记录（可能包含 item 本身）"""
+        sources = []
+        for source_list in self._source_lists(region, item):
+            sources.extend(source_list)
+        return sources
+
+    def add(self, path, item):
+        for source_list in self._source_lists(self._region(path), item):
+            source_list.append(item)
+        date = item.get("date") or ""
+        if date:
+            self.date_counts[path][date] += 1
+        if path in self.identities:
+            self.identities[path][item_identity(item)] += 1
+            if date and not date.startswith(path.parent.name):
+                self.wrong_year[path][id(item)] = item
+
+    def remove(self, path, item, keys_from=None):
+        """移除 item；item 已被修改时用 keys_from 传入修改前的内容来定位原来的键"""
+        keys_from = item if keys_from is None else keys_from
+        for source_list in self._source_lists(self._region(path), keys_from):
+            for index, source in enumerate(source_list):
+                if source is item:
+                    del source_list[index]
+                    break
+        date = keys_from.get("date") or ""
+        if date:
+            self.date_counts[path][date] -= 1
+        if path in self.identities:
+            self.identities[path][item_identity(keys_from)] -= 1
+            self.wrong_year[path].pop(id(item), None)
+
+    def set_date(self, path, item, date):
+        self.remove(path, item)
+        item["date"] = date
+        self.add(path, item)
 
-    return by_region_fullstart, by_region_date_image, by_region_date_urlbase
+    def contains(self, path, identity):
+        return self.identities[path][identity] > 0
 
 
-def fill_required_fields(files, changed_paths):
-    by_region_fullstart, by_region_date_image, by_region_date_urlbase = build_sources(files)
+def fill_required_fields(files, changed_paths, index):
     fills = []
+    # 补全了查找键的记录在全部补全完成后再更新索引，补全过程中使用同一份索引
+    rekey = []
 
     for path, data in files.items():
         region = region_from_path(path)
-        for index, item in enumerate(data):
+        missing_items = index.missing[path] = []
+        for position, item in enumerate(data):
             if (item.get("date") or "") < POST_2408_CUTOFF:
                 continue
 
-            sources = []
-            fullstartdate = item.get("fullstartdate")
-            date = item.get("date")
-            img_id = image_id(item)
-            urlbase = item.get("urlbase")
-            if fullstartdate:
-                sources.extend(by_region_fullstart.get((region, fullstartdate), []))
-            if date and img_id:
-                sources.extend(by_region_date_image.get((region, date, img_id), []))
-            if date and urlbase:
-                sources.extend(by_region_date_urlbase.get((region, date, urlbase), []))
-
-            for field in REQUIRED_FIELDS:
-                if item.get(field):
-                    continue
+            missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
+            if not missing:
+                continue
+            sources = index.sources(region, item)
+            if KEY_FIELDS.intersection(missing):
+                rekey.append((path, item, dict(item)))
+
+            still_missing = []
+            for field in missing:
                 for source in sources:
                     if source is item or not source.get(field):
                         continue
@@ -124,7 +209,7 @@ def fill_required_fields(files, changed_paths):
                     fills.append(
                         {
                             "file": str(path),
-                            "index": index,
+                            "index": position,
                             "date": item.get("date"),
                             "region": region,
                             "field": field,
@@ -132,28 +217,35 @@ def fill_required_fields(files, changed_paths):
                         }
                     )
                     break
-
+                else:
+                    still_missing.append(field)
+            if still_missing:
+                missing_items.append((item, still_missing))
+
+    for path, item, before in rekey:
+        index.remove(path, item, keys_from=before)
+        index.add(path, item)
     return fills
 
 
-def fix_en_gb_dates(files, changed_paths):
+def fix_en_gb_dates(files, changed_paths, index):
     changes = []
     for path, data in files.items():
         if region_from_path(path) != "bing_en-GB":
             continue
 
         changed = False
-        for index, item in enumerate(data):
+        for position, item in enumerate(data):
             new_date = corrected_en_gb_date(item)
             old_date = item.get("date")
             if new_date and old_date != new_date:
-                item["date"] = new_date
+                index.set_date(path, item, new_date)
                 changed_paths.add(path)
                 changed = True
                 changes.append(
                     {
                         "file": str(path),
-                        "index": index,
+                        "index": position,
                         "old_date": old_date,
                         "new_date": new_date,
                         "fullstartdate": item.get("fullstartdate"),
@@ -165,33 +257,20 @@ def fix_en_gb_dates(files, changed_paths):
     return changes
 
 
-def item_identity(item):
-    if item.get("fullstartdate"):
-        return ("fullstartdate", item["fullstartdate"])
-    img_id = image_id(item)
-    if item.get("date") and img_id:
-        return ("date_image", item["date"], img_id)
-    if item.get("date") and item.get("urlbase"):
-        return ("date_urlbase", item["date"], item["urlbase"])
-    return None
-
-
-def relocate_wrong_year_records(files, changed_paths):
+def relocate_wrong_year_records(files, changed_paths, index):
     moves = []
     additions = defaultdict(list)
     removals = defaultdict(list)
 
     for path, data in files.items():
-        parent = path.parent.name
-        if not parent.isdigit():
+        wrong_year = index.wrong_year.get(path)
+        if not wrong_year:
             continue
 
         region = path.stem
-        for index, item in enumerate(data):
-            date = item.get("date") or ""
-            if not date or date.startswith(parent):
-                continue
-
+        item_positions = positions(data, wrong_year.values())
+        for item in sorted(wrong_year.values(), key=lambda item: item_positions[id(item)]):
+            date = item["date"]
             target_path = BASE_DIR / date[:4] / f"{region}.json"
             if target_path not in files:
                 continue
@@ -202,7 +281,7 @@ def relocate_wrong_year_records(files, changed_paths):
                 {
                     "from": str(path),
                     "to": str(target_path),
-                    "index": index,
+                    "index": item_positions[id(item)],
                     "date": date,
                     "region": region,
                     "copyrightKeyword": item.get("copyrightKeyword"),
@@ -212,24 +291,24 @@ def relocate_wrong_year_records(files, changed_paths):
     for path, items in removals.items():
         remove_ids = {id(item) for item in items}
         files[path] = [item for item in files[path] if id(item) not in remove_ids]
+        for item in items:
+            index.remove(path, item)
         changed_paths.add(path)
 
     for path, items in additions.items():
-        existing = {item_identity(item) for item in files[path]}
         for item in items:
             identity = item_identity(item)
-            if identity and identity in existing:
+            if identity and index.contains(path, identity):
                 continue
             files[path].append(item)
-            if identity:
-                existing.add(identity)
+            index.add(path, item)
         sort_items(files[path])
         changed_paths.add(path)
 
     return moves
 
 
-def sync_root_records_to_years(files, changed_paths):
+def sync_root_records_to_years(files, changed_paths, index):
     additions = []
 
     for path, data in list(files.items()):
@@ -247,14 +326,12 @@ def sync_root_records_to_years(files, changed_paths):
                 continue
 
             identity = item_identity(item)
-            if not identity:
-                continue
-
-            existing = {item_identity(existing_item) for existing_item in files[target_path]}
-            if identity in existing:
+            if not identity or index.contains(target_path, identity):
                 continue
 
-            files[target_path].append(dict(item))
+            copy = dict(item)
+            files[target_path].append(copy)
+            index.add(target_path, copy)
             changed_paths.add(target_path)
             additions.append(
                 {
@@ -273,53 +350,55 @@ def sync_root_records_to_years(files, changed_paths):
     return additions
 
 
-def validate(files):
+def validate(files, index):
+    """根据索引中记录的问题生成报告，只在有问题的文件中查找记录位置"""
     missing_required = []
     duplicate_dates = []
     wrong_year = []
 
     for path, data in files.items():
         region = region_from_path(path)
-        dates = []
-        for index, item in enumerate(data):
-            date = item.get("date") or ""
-            if date:
-                dates.append(date)
-
-            if date >= POST_2408_CUTOFF:
-                missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
-                if missing:
-                    missing_required.append(
-                        {
-                            "file": str(path),
-                            "index": index,
-                            "date": date,
-                            "region": region,
-                            "missing": missing,
-                            "copyright": item.get("copyright"),
-                            "urlbase": item.get("urlbase"),
-                        }
-                    )
-
-            parent = path.parent.name
-            if parent.isdigit() and date and not date.startswith(parent):
+        missing_items = index.missing.get(path, [])
+        wrong_items = list(index.wrong_year.get(path, {}).values())
+        duplicated = {
+            date for date, count in index.date_counts[path].items()
+            if date >= POST_2408_CUTOFF and count > 1
+        }
+
+        if missing_items or wrong_items:
+            item_positions = positions(data, [item for item, _ in missing_items] + wrong_items)
+            for item, missing in sorted(missing_items, key=lambda entry: item_positions[id(entry[0])]):
+                missing_required.append(
+                    {
+                        "file": str(path),
+                        "index": item_positions[id(item)],
+                        "date": item.get("date") or "",
+                        "region": region,
+                        "missing": missing,
+                        "copyright": item.get("copyright"),
+                        "urlbase": item.get("urlbase"),
+                    }
+                )
+            for item in sorted(wrong_items, key=lambda item: item_positions[id(item)]):
                 wrong_year.append(
                     {
                         "file": str(path),
-                        "index": index,
-                        "date": date,
+                        "index": item_positions[id(item)],
+                        "date": item["date"],
                         "region": region,
                     }
                 )
 
-        for date, count in Counter(dates).items():
-            if date >= POST_2408_CUTOFF and count > 1:
+        if duplicated:
+            # 按日期在文件中首次出现的顺序输出
+            seen = [date for date in dict.fromkeys(item.get("date") for item in data) if date in duplicated]
+            for date in seen:
                 duplicate_dates.append(
                     {
                         "file": str(path),
                         "region": region,
                         "date": date,
-                        "count": count,
+                        "count": index.date_counts[path][date],
                     }
                 )
 
@@ -330,44 +409,192 @@ def validate(files):
     }
 
 
-def regenerate_data_index(files):
-    years = {}
+def regenerate_data_index(files, stored_counts=None):
+    """stored_counts: 未加载的年份文件的记录数 {(year, region): count}（增量模式）"""
+    counts = dict(stored_counts or {})
     for path, data in files.items():
         parent = path.parent.name
         if not parent.isdigit():
             continue
-        years.setdefault(parent, {"regions": {}})
-        years[parent]["regions"][path.stem] = len(data)
-
-    current_year = max((int(year) for year in years), default=datetime.now().year)
-    index = {
-        "years": {year: years[year] for year in sorted(years)},
-        "currentYear": current_year,
-    }
-    out_path = BASE_DIR / "data_index.json"
-    out_path.write_text(json.dumps(index, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        counts[(parent, path.stem)] = len(data)
+
+    current_year = max((int(year) for year, _ in counts), default=datetime.now().year)
+    _, out_path = data_index.rebuild(current_year, base_dir=BASE_DIR, counts=counts)
+    if search_index.enabled(BASE_DIR):
+        search_index.update(base_dir=BASE_DIR)
+    if month_views.enabled(BASE_DIR):
+        month_views.update(base_dir=BASE_DIR)
     return str(out_path)
 
 
-def main():
+# ====== 增量模式 ======
+# 清单记录每个文件上次成功修复后的内容哈希、记录数和剩余问题。
+# 各修复步骤只在同一区域（同名文件）内跨文件查找，所以某个文件变化时，
+# 重新处理该区域的变化文件 + 主目录/weekly/仍在更新的年份文件，以及错误年份记录的目标文件；
+# 其余文件（例如 2019–2023 年）沿用清单中的记录数和验证结果。
+
+def file_state(path, previous=None):
+    """返回文件的 {size, mtime_ns, sha1}；大小和 mtime 与 previous 相同时不重新计算哈希"""
+    stat = path.stat()
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": previous["sha1"]}
+    digest = hashlib.sha1(path.read_bytes()).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+
+
+def load_manifest():
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def is_live_file(path):
+    """主目录、weekly 和 POST_2408_CUTOFF 之后的年份文件每天都可能被写入"""
+    return not is_year_file(path) or path.parent.name >= POST_2408_CUTOFF[:4]
+
+
+def incremental_paths(paths, changed):
+    regions = {path.stem for path in changed}
+    return [path for path in paths if path in changed or (path.stem in regions and is_live_file(path))]
+
+
+def relocation_targets(files, paths):
+    """已加载的年份文件中错误年份记录的目标文件（存在但尚未加载的）"""
+    available = set(paths)
+    targets = set()
+    for path, data in files.items():
+        if not is_year_file(path):
+            continue
+        for item in data:
+            date = item.get("date") or ""
+            if date and not date.startswith(path.parent.name):
+                target = BASE_DIR / date[:4] / f"{path.stem}.json"
+                if target in available and target not in files:
+                    targets.add(target)
+    return targets
+
+
+def issues_by_file(validation):
+    grouped = defaultdict(lambda: {kind: [] for kind in validation})
+    for kind, entries in validation.items():
+        for entry in entries:
+            grouped[entry["file"]][kind].append(entry)
+    return grouped
+
+
+def write_manifest(paths, states, files, issues, stored):
+    entries = {}
+    for path in paths:
+        key = str(path)
+        entry = file_state(path, states[path])
+        if path in files:
+            entry["records"] = len(files[path])
+            entry["issues"] = issues.get(key, {})
+        else:
+            entry["records"] = stored[key]["records"]
+            entry["issues"] = stored[key].get("issues", {})
+        entries[key] = entry
+    manifest = {"version": MANIFEST_VERSION, "files": entries}
+    MANIFEST_PATH.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def use_parallel(paths, jobs):
+    """要处理的文件数和总大小都超过阈值时才值得使用 jobs 个进程"""
+    if jobs <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        return False
+    return sum(path.stat().st_size for path in paths) >= PARALLEL_MIN_BYTES
+
+
+def main(jobs=1, incremental=False):
+    """
+    jobs > 1 时，要处理的文件超过 PARALLEL_MIN_FILES 个、PARALLEL_MIN_BYTES 字节时
+    用进程池并行读取/解析和序列化/写入文件（jobs=0 表示使用全部核心），否则仍串行执行；
+    跨文件的修复步骤始终在主进程中基于同一份索引执行。
+    incremental=True 时只处理自上次成功修复以来有变化的文件及其依赖文件。
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    return repair(incremental=incremental, jobs=jobs)
+
+
+def repair(executor=None, incremental=False, jobs=1):
+    """没有传入 executor 时，按要处理的文件决定是否创建 jobs 个进程的进程池"""
+    selection = select_paths(incremental)
+    if executor is None and use_parallel(selection[0], jobs):
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return _repair(executor, *selection)
+    return _repair(executor, *selection)
+
+
+def select_paths(incremental):
+    """返回 (要处理的文件, 所有文件, 各文件当前状态, manifest)"""
     paths = archive_paths()
-    files = {path: load_json(path) for path in paths}
+    manifest = load_manifest() if incremental else None
+    stored = manifest["files"] if manifest else {}
+    states = {path: file_state(path, stored.get(str(path))) for path in paths}
+
+    if manifest is None:
+        if incremental:
+            print("No usable manifest, running a full repair")
+        selected = paths
+    else:
+        changed = {path for path in paths if stored.get(str(path), {}).get("sha1") != states[path]["sha1"]}
+        selected = incremental_paths(paths, changed)
+        print(f"Incremental: {len(changed)} changed file(s), processing {len(selected)}/{len(paths)}")
+    return selected, paths, states, manifest
+
+
+def _repair(executor, selected, paths, states, manifest):
+    stored = manifest["files"] if manifest else {}
+
+    files = archive_io.files.load_many(selected, executor)
+    if manifest is not None:
+        targets = relocation_targets(files, paths)
+        while targets:
+            files.update(archive_io.files.load_many(sorted(targets), executor))
+            targets = relocation_targets(files, paths)
+        # 保持与完整模式相同的文件顺序
+        files = {path: files[path] for path in paths if path in files}
+
     changed_paths = set()
+    # 唯一一次完整遍历；之后各步骤只做有针对性的更新
+    index = RecordIndex(files)
 
-    en_gb_date_changes = fix_en_gb_dates(files, changed_paths)
-    relocated_records = relocate_wrong_year_records(files, changed_paths)
-    root_to_year_additions = sync_root_records_to_years(files, changed_paths)
-    required_field_fills = fill_required_fields(files, changed_paths)
+    en_gb_date_changes = fix_en_gb_dates(files, changed_paths, index)
+    relocated_records = relocate_wrong_year_records(files, changed_paths, index)
+    root_to_year_additions = sync_root_records_to_years(files, changed_paths, index)
+    required_field_fills = fill_required_fields(files, changed_paths, index)
 
     for path in sorted(changed_paths):
         data = files[path]
         sort_items(data)
-        write_json(path, data)
+        archive_io.files.mark_dirty(path, data)
+    archive_io.files.flush(executor)
 
-    index_path = regenerate_data_index(files)
-    validation = validate(files)
+    stored_counts = {
+        (path.parent.name, path.stem): stored[str(path)]["records"]
+        for path in paths
+        if path not in files and is_year_file(path)
+    }
+    index_path = regenerate_data_index(files, stored_counts)
+
+    # 未处理的文件沿用上次的验证结果，按文件顺序合并
+    issues = issues_by_file(validate(files, index))
+    validation = {"missing_required": [], "duplicate_dates": [], "wrong_year": []}
+    for path in paths:
+        key = str(path)
+        file_issues = issues.get(key) if path in files else stored[key].get("issues")
+        for kind, entries in (file_issues or {}).items():
+            validation[kind].extend(entries)
+    write_manifest(paths, states, files, issues, stored)
 
     report = {
+        "mode": "incremental" if manifest is not None else "full",
+        "processed_files": len(files),
         "en_gb_date_changes": en_gb_date_changes,
         "relocated_records": relocated_records,
         "root_to_year_additions": root_to_year_additions,
@@ -392,4 +619,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Repair the Bing archive JSON files.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="worker processes for reading and writing files (0 = all cores, default: serial); "
+                             f"only used when at least {PARALLEL_MIN_FILES} files and {PARALLEL_MIN_BYTES >> 20} MB "
+                             "are processed")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only process files changed since the last repair (tracked in {MANIFEST_PATH})")
+    args = parser.parse_args()
+    main(args.jobs, args.incremental)
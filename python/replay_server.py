@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from bing_fetch import fixture_path
+
+# 离线回放：用本地 HTTP 服务器代替 HPImageArchive.aspx 和 hp/api/model，
+# 按 {fixtures}/{mkt}/{接口名}.json 返回录制好的原始响应，并可注入延迟、5xx 和损坏的 JSON。
+#
+# 录制夹具:   BING_RECORD_DIR=fixtures python python/bing_260204.py
+# 由 weekly 文件生成夹具:   python python/replay_server.py synthesize --fixtures fixtures
+# 启动服务器:   python python/replay_server.py serve --fixtures fixtures --port 8000 --latency 0.2 --error-rate 0.1
+#               BING_API_BASE=http://127.0.0.1:8000 python python/bing_260204.py
+# 离线端到端计时:   python python/replay_server.py bench --fixtures fixtures --runs 3
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency=0.0, jitter=0.0, error_rate=0.0,
+                 malformed_rate=0.0, seed=0, verbose=False):
+        super().__init__(address, ReplayHandler)
+        self.fixtures = Path(fixtures)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.verbose = verbose
+        self.requests_served = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """返回 (本次延迟, 随机数)；随机数用于决定是否注入错误"""
+        with self._lock:
+            self.requests_served += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            return delay, self._rng.random()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        delay, roll = server.draw()
+        if delay > 0:
+            time.sleep(delay)
+
+        if roll < server.error_rate:
+            self._send(503, b"injected server error", "text/plain")
+            return
+
+        path = fixture_path(server.fixtures, self.path)
+        try:
+            body = path.read_bytes()
+        except FileNotFoundError:
+            self._send(404, f"no fixture {path}".encode("utf-8"), "text/plain")
+            return
+
+        if roll < server.error_rate + server.malformed_rate:
+            body = body[: len(body) // 2]
+        self._send(200, body, "application/json; charset=utf-8")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_server(fixtures, port=0, **options):
+    """在后台线程启动回放服务器，返回 server（用 server.shutdown() 停止）"""
+    server = ReplayServer(("127.0.0.1", port), fixtures, **options)
+    # 较短的轮询间隔让 shutdown() 尽快返回
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+
+def api_payloads(records):
+    """由存档记录反推两个接口的响应内容 (HPImageArchive, hp/api/model)"""
+    images = []
+    media = []
+    for record in records:
+        path = record["urlbase"].replace("https://www.bing.com", "")
+        keyword = record.get("copyrightKeyword", "").replace(" ", "+")
+        images.append({
+            "startdate": record["date"],
+            "fullstartdate": record["fullstartdate"],
+            "enddate": record["date"],
+            "url": path + "_1920x1080.jpg&rf=LaDigue_1920x1080.jpg&pid=hp",
+            "urlbase": path,
+            "copyright": record["copyright"],
+            "copyrightlink": f"https://www.bing.com/search?q={keyword}&form=hpcapt",
+            "hsh": record["hsh"],
+        })
+        if "description" in record:
+            content = {
+                "Description": record["description"],
+                "Image": {"Url": path + "_1920x1080.jpg"},
+            }
+            if "maplink" in record:
+                content["MapLink"] = {"Url": f"https://www.bing.com/maps?pp={record['maplink']}&lvl=4"}
+            media.append({"ImageContent": content})
+    return {"images": images}, {"MediaContents": media}
+
+
+def write_fixtures(fixtures, records_by_lang, api_base="https://www.bing.com"):
+    """records_by_lang: {接口使用的 mkt: [记录, ...]}"""
+    for lang, records in records_by_lang.items():
+        archive, model = api_payloads(records)
+        for url, payload in (
+            (f"{api_base}/HPImageArchive.aspx?format=js&idx=0&n=8&mkt={lang}", archive),
+            (f"{api_base}/hp/api/model?toWww=1&mkt={lang}", model),
+        ):
+            path = fixture_path(fixtures, url)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+def synthesize(fixtures, weekly_dir):
+    """用 weekly 文件生成夹具，zh-TW 对应 bing_ROW.json"""
+    from bing_260204 import languages
+    records_by_lang = {}
+    for lang in languages:
+        file_lang = "ROW" if lang == "zh-TW" else lang
+        path = Path(weekly_dir) / f"bing_{file_lang}.json"
+        if path.exists():
+            records_by_lang[lang] = json.loads(path.read_text(encoding="utf-8"))
+    write_fixtures(fixtures, records_by_lang)
+    return len(records_by_lang)
+
+
+def run_pipeline(base_url):
+    """对回放服务器执行一次完整的 bing_260204.main()（在当前目录下读写 bing/）"""
+    import archive_io
+    import bing_260204
+    archive_io.files = archive_io.ArchiveFiles()
+    bing_260204.index_deltas.clear()
+    bing_260204.API_BASE = base_url
+    bing_260204.FETCH_HOST_INTERVAL = 0
+    bing_260204.FETCH_RETRY_DELAY = 0
+    bing_260204.main()
+
+
+def bench(fixtures, archive_dir, runs, **options):
+    """在临时目录中复制存档，反复运行完整流水线并计时"""
+    fixtures = Path(fixtures).resolve()
+    archive_dir = Path(archive_dir).resolve()
+    server = start_server(fixtures, **options)
+    cwd = os.getcwd()
+    times = []
+    try:
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory(prefix="bing-replay-") as tmp:
+                shutil.copytree(archive_dir, Path(tmp) / "bing")
+                os.chdir(tmp)
+                try:
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run_pipeline(server.base_url)
+                    times.append(time.perf_counter() - start)
+                finally:
+                    os.chdir(cwd)
+    finally:
+        server.shutdown()
+    return times, server.requests_served
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay server for the Bing API endpoints.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_fault_options(p):
+        p.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+        p.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+        p.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+        p.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of truncated JSON bodies")
+        p.add_argument("--seed", type=int, default=0)
+
+    serve_p = sub.add_parser("serve")
+    serve_p.add_argument("--fixtures", required=True)
+    serve_p.add_argument("--port", type=int, default=8000)
+    add_fault_options(serve_p)
+
+    synth_p = sub.add_parser("synthesize")
+    synth_p.add_argument("--fixtures", required=True)
+    synth_p.add_argument("--weekly", default="bing/weekly")
+
+    bench_p = sub.add_parser("bench")
+    bench_p.add_argument("--fixtures", required=True)
+    bench_p.add_argument("--archive", default="bing")
+    bench_p.add_argument("--runs", type=int, default=3)
+    add_fault_options(bench_p)
+
+    args = parser.parse_args()
+    if args.command == "synthesize":
+        count = synthesize(args.fixtures, args.weekly)
+        print(f"Wrote fixtures for {count} market(s) to {args.fixtures}")
+        return
+
+    options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "malformed_rate": args.malformed_rate,
+        "seed": args.seed,
+    }
+    if args.command == "serve":
+        server = ReplayServer(("127.0.0.1", args.port), args.fixtures, verbose=True, **options)
+        print(f"Serving {args.fixtures} on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    times, served = bench(args.fixtures, args.archive, args.runs, **options)
+    print(f"runs: {len(times)}, requests served: {served}")
+    print(f"best {min(times):.3f}s, mean {sum(times) / len(times):.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from itertools import accumulate
+from datetime import date as Date
+from pathlib import Path
+
+import bing_url
+import json_codec
+from data_index import BASE_DIR, region_files, write_text_if_changed
+
+# archive.html 的搜索索引：每个区域一个倒排索引 (词 -> 记录序号)，按词的前两个字符分片，
+# 搜索时只需下载查询词所在的几个分片，而不是该区域所有年份的完整 JSON。
+#
+#   bing/search/bing_en-US/index.json   清单：基准日期、分片数、各分片的内容哈希、最近更新段、各年份源文件
+#   bing/search/bing_en-US/97.json      分片：{"词": [序号差分列表], ...}
+#   bing/search/bing_en-US/recent.json  最近更新段：与分片格式相同，只包含 recent.days 这些天的记录
+#
+# - 记录序号 = 记录日期距离基准日期的天数（每天一条记录，序号即日期），
+#   客户端由序号直接还原出 YYYYMMDD，只加载命中的年份文件来显示结果。
+# - 词：小写后按 \w+ 切分；中日韩文字每个字和相邻两个字各作为一个词，其它文字取每个词中连续的三个字符
+#   (trigram)，OHR 名称同样取 trigram。查询时按同样规则切分，要求所有词都命中：
+#   查询词是某个词的子串时它的 trigram 都在该词中，所以不会漏掉 "see" -> "Bodensee" 这样的结果；
+#   少于三个字母的查询词无法用索引回答，客户端忽略它（全部如此时退回完整加载）。
+#   索引只用于缩小范围，archive.js 仍会用原来的子串规则核对每条结果。
+# - 分片号 = (首字符码位 * 31 + 第二个字符码位) % SHARDS（单字符的词第二个码位记为 0）。
+# - 增量更新：清单记录每个年份文件的 SHA-1、记录数和其中记录的日期，只重新切词内容变化的年份文件。
+#   变化涉及的日期写入最近更新段 recent.json，客户端对这些天使用 recent.json 而忽略分片中的旧结果；
+#   最近更新段超过 RECENT_LIMIT 天时才合并进分片，平时每天只改写 index.json 和 recent.json。
+#
+# 生成的文件较多，默认不生成：设置 BING_SEARCH_INDEX=1 或手动运行一次本脚本后，bing/search 存在，
+# 之后 bing_260204.py 和修复脚本每次运行都会增量更新它。archive.js 没有索引时逐年加载搜索。
+# 清单 sources 中记录每个年份文件的记录数，archive.js 与 data_index.json 中的记录数比较，
+# 不一致（索引落后于数据文件）时不使用索引，退回逐年加载搜索。
+#
+# 用法（在仓库根目录执行）: python python/search_index.py [--force]
+SEARCH_DIR = BASE_DIR / "search"
+VERSION = 3
+SHARDS = 128
+NGRAM = 3
+RECENT_LIMIT = 31
+RECENT_NAME = "recent.json"
+TEXT_FIELDS = ("copyrightKeyword", "copyright", "description", "title")
+ENABLED = os.environ.get("BING_SEARCH_INDEX") == "1"
+
+
+def enabled(base_dir=BASE_DIR):
+    """设置了 BING_SEARCH_INDEX=1，或者索引已经生成过（之后每次运行都要保持最新）"""
+    return ENABLED or (Path(base_dir) / SEARCH_DIR.name).is_dir()
+
+_WORD = re.compile(r"\w+")
+_CJK_START = 0x2E80
+_RUN = re.compile("[\u2e80-\U0010ffff]+|[^\u2e80-\U0010ffff]+")
+
+
+# ====== 切词（与 assets/archive.js 中的 tokenizeSearch 保持一致） ======
+def is_cjk(ch):
+    return ord(ch) >= _CJK_START
+
+
+def tokenize(text):
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        for run in _RUN.findall(word):
+            if is_cjk(run[0]):
+                tokens.extend(run)
+                tokens.extend(run[j:j + 2] for j in range(len(run) - 1))
+            else:
+                tokens.extend(run[j:j + NGRAM] for j in range(len(run) - NGRAM + 1))
+    return tokens
+
+
+def record_tokens(item):
+    tokens = set()
+    for field in TEXT_FIELDS:
+        value = item.get(field)
+        if isinstance(value, str):
+            tokens.update(tokenize(value))
+    name = bing_url.ohr_id(item.get("urlbase") or item.get("url") or "")
+    if name:
+        tokens.update(tokenize(name[len("OHR."):]))
+    return tokens
+
+
+def shard_of(token):
+    second = ord(token[1]) if len(token) > 1 else 0
+    return (ord(token[0]) * 31 + second) % SHARDS
+
+
+# ====== 序号和日期 ======
+def day_number(value):
+    try:
+        return Date(int(value[:4]), int(value[4:6]), int(value[6:8])).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def day_text(day):
+    return Date.fromordinal(day).strftime("%Y%m%d")
+
+
+def day_ranges(days):
+    """天数集合 -> [[起始日期 YYYYMMDD, 天数], ...]"""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][0] + ranges[-1][1] == day:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([day, 1])
+    return [[day_text(start), count] for start, count in ranges]
+
+
+def range_days(ranges):
+    days = set()
+    for start, count in ranges:
+        first = day_number(start)
+        days.update(range(first, first + count))
+    return days
+
+
+def encode(ordinals):
+    ordinals = sorted(ordinals)
+    return ordinals[:1] + [b - a for a, b in zip(ordinals, ordinals[1:])]
+
+
+def decode(deltas):
+    return list(accumulate(deltas))
+
+
+def day_tokens(data):
+    """年份文件内容 -> ({天数: 这一天所有记录的词}, 文件中的记录数)"""
+    result = {}
+    items = json_codec.loads(data.decode("utf-8"))
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        day = day_number(item.get("date"))
+        if day is not None:
+            result.setdefault(day, set()).update(record_tokens(item))
+    return result, len(items)
+
+
+def postings(tokens_by_day, base):
+    """{天数: 词} -> {词: 序号集合}"""
+    result = {}
+    for day, tokens in tokens_by_day.items():
+        for token in tokens:
+            result.setdefault(token, set()).add(day - base)
+    return result
+
+
+# ====== 写入 ======
+def _dumps(tokens):
+    return json.dumps(tokens, ensure_ascii=False, separators=(",", ":"))
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+
+def write_shards(out_dir, postings_by_token, existing=None):
+    """把 {词: 序号集合} 按分片写入，内容不变的分片不重写，删除不再使用的分片；返回 ({分片号: 哈希}, 写入数)"""
+    shards = {}
+    for token in sorted(postings_by_token):
+        if postings_by_token[token]:
+            shards.setdefault(shard_of(token), {})[token] = encode(postings_by_token[token])
+    hashes = {}
+    written = 0
+    for shard, tokens in sorted(shards.items()):
+        text = _dumps(tokens)
+        hashes[str(shard)] = _digest(text)
+        if (existing or {}).get(str(shard)) != hashes[str(shard)]:
+            written += write_text_if_changed(out_dir / f"{shard}.json", text)
+    for stale in out_dir.glob("*.json"):
+        if stale.stem.isdigit() and stale.stem not in hashes:
+            stale.unlink()
+    return hashes, written
+
+
+def read_shards(out_dir, hashes):
+    result = {}
+    for shard in hashes:
+        with open(out_dir / f"{shard}.json", "r", encoding="utf-8") as f:
+            for token, deltas in json.load(f).items():
+                result[token] = set(decode(deltas))
+    return result
+
+
+def read_recent(out_dir, manifest):
+    if not manifest.get("recent"):
+        return {}, set()
+    with open(out_dir / RECENT_NAME, "r", encoding="utf-8") as f:
+        tokens = {token: set(decode(deltas)) for token, deltas in json.load(f).items()}
+    return tokens, set(decode(manifest["recent"]["days"]))
+
+
+def load_manifest(region, search_dir=SEARCH_DIR):
+    try:
+        with open(Path(search_dir) / region / "index.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != VERSION or manifest.get("shardCount") != SHARDS:
+        return None
+    return manifest
+
+
+def write_manifest(out_dir, region, base, shards, recent, sources):
+    days = set()
+    for source in sources.values():
+        days |= range_days(source["days"])
+    manifest = {
+        "version": VERSION,
+        "region": region,
+        "base": day_text(base) if base is not None else None,
+        "records": len(days),
+        "shardCount": SHARDS,
+        "shards": shards,
+        "recent": recent,
+        "sources": dict(sorted(sources.items())),
+    }
+    write_text_if_changed(out_dir / "index.json", json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
+
+
+# ====== 构建和增量更新 ======
+def build_region(region, contents, out_dir):
+    """完整重建一个区域；contents = {年份: 文件内容}，返回写入的文件数"""
+    by_day = {}
+    sources = {}
+    for year, data in contents.items():
+        tokens, records = day_tokens(data)
+        sources[year] = {"sha1": hashlib.sha1(data).hexdigest(), "records": records, "days": day_ranges(tokens)}
+        for day, day_set in tokens.items():
+            by_day.setdefault(day, set()).update(day_set)
+    base = min(by_day) if by_day else None
+    shards, written = write_shards(out_dir, postings(by_day, base) if by_day else {})
+    (out_dir / RECENT_NAME).unlink(missing_ok=True)
+    write_manifest(out_dir, region, base, shards, None, sources)
+    return written
+
+
+def update_region(region, paths, out_dir, force=False):
+    """更新一个区域的索引；没有变化时返回 None，否则返回写入的分片和最近更新段文件数"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = None if force else load_manifest(region, out_dir.parent)
+    contents = {path.parent.name: path.read_bytes() for path in paths}
+    if manifest is None or manifest.get("base") is None:
+        return build_region(region, contents, out_dir)
+
+    hashes = {year: hashlib.sha1(data).hexdigest() for year, data in contents.items()}
+    old_sources = manifest["sources"]
+    changed = {
+        year for year in hashes.keys() | old_sources.keys()
+        if old_sources.get(year, {}).get("sha1") != hashes.get(year)
+    }
+    if not changed:
+        return None
+
+    # 候选日期：变化的年份文件在更新前后包含的所有日期
+    candidates = set()
+    for year in changed:
+        candidates |= range_days(old_sources.get(year, {}).get("days", []))
+    sources = {year: source for year, source in old_sources.items() if year in hashes and year not in changed}
+    loaded = {}
+    for year in sorted(changed & hashes.keys()):
+        loaded[year], records = day_tokens(contents[year])
+        sources[year] = {"sha1": hashes[year], "records": records, "days": day_ranges(loaded[year])}
+        candidates |= loaded[year].keys()
+    # 同一天的记录也可能来自其它年份文件（日期不属于所在年份的记录）
+    for year, source in sources.items():
+        if year not in loaded and candidates & range_days(source["days"]):
+            loaded[year] = day_tokens(contents[year])[0]
+    new_tokens = {}
+    for tokens in loaded.values():
+        for day, day_set in tokens.items():
+            if day in candidates:
+                new_tokens.setdefault(day, set()).update(day_set)
+
+    base = day_number(manifest["base"])
+    if new_tokens and min(new_tokens) < base:
+        # 序号不能为负，出现比基准日期更早的记录时完整重建
+        return build_region(region, contents, out_dir)
+
+    # 年份文件改写时大部分日期的记录不变（只是格式化或追加了一天），
+    # 与索引中现有的结果逐天比较，只有词不同的日期才进入最近更新段
+    shards = manifest["shards"]
+    recent, recent_days = read_recent(out_dir, manifest)
+    old_tokens = {}
+    for token, ordinals in read_shards(out_dir, shards).items():
+        for ordinal in ordinals - recent_days:
+            if ordinal + base in candidates:
+                old_tokens.setdefault(ordinal + base, set()).add(token)
+    for token, ordinals in recent.items():
+        for ordinal in ordinals:
+            if ordinal + base in candidates:
+                old_tokens.setdefault(ordinal + base, set()).add(token)
+    affected = {day for day in candidates if old_tokens.get(day, set()) != new_tokens.get(day, set())}
+
+    # 最近更新段：删除受影响日期的旧结果，加入这些日期现在的记录
+    offsets = {day - base for day in affected}
+    recent = {token: ordinals - offsets for token, ordinals in recent.items()}
+    for day in affected:
+        for token in new_tokens.get(day, ()):
+            recent.setdefault(token, set()).add(day - base)
+    recent = {token: ordinals for token, ordinals in recent.items() if ordinals}
+    recent_days |= offsets
+
+    if not recent_days:
+        (out_dir / RECENT_NAME).unlink(missing_ok=True)
+        write_manifest(out_dir, region, base, shards, None, sources)
+        return 0
+    if len(recent_days) > RECENT_LIMIT:
+        # 合并：分片中去掉最近更新段覆盖的日期，再加入最近更新段的结果
+        merged = {token: ordinals - recent_days for token, ordinals in read_shards(out_dir, shards).items()}
+        for token, ordinals in recent.items():
+            merged.setdefault(token, set()).update(ordinals)
+        shards, written = write_shards(out_dir, merged, shards)
+        (out_dir / RECENT_NAME).unlink(missing_ok=True)
+        write_manifest(out_dir, region, base, shards, None, sources)
+        return written
+
+    text = _dumps({token: encode(recent[token]) for token in sorted(recent)})
+    written = int(write_text_if_changed(out_dir / RECENT_NAME, text))
+    write_manifest(out_dir, region, base, shards, {"days": encode(recent_days), "hash": _digest(text)}, sources)
+    return written
+
+
+def update(base_dir=BASE_DIR, search_dir=None, force=False):
+    """更新年份文件内容有变化的区域，返回 {区域: 写入的文件数}；search_dir 默认为 base_dir/search"""
+    search_dir = Path(base_dir) / SEARCH_DIR.name if search_dir is None else Path(search_dir)
+    updated = {}
+    for region, paths in region_files(base_dir).items():
+        written = update_region(region, paths, search_dir / region, force)
+        if written is not None:
+            updated[region] = written
+    return updated
+
+
+def main():
+    force = "--force" in sys.argv[1:]
+    start = time.perf_counter()
+    updated = update(force=force)
+    for region, written in updated.items():
+        print(f"  {region}: rewrote {written} file(s)")
+    print(f"✓ Search index: {len(updated)} region(s) updated in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
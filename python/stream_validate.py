@@ -0,0 +1,272 @@
+import argparse
+import json
+import sys
+from datetime import date as Date
+from pathlib import Path
+
+from repair_archive_data import BASE_DIR, POST_2408_CUTOFF, REQUIRED_FIELDS, archive_paths, region_from_path
+
+# 流式验证：逐条解析存档文件（顶层为对象数组），内存占用只与“当前一条记录 + 读取缓冲”
+# 以及每个文件出现过的日期数量有关，与文件大小无关。检查项：
+# - date >= since 的记录缺少必需字段、日期重复（与 repair_archive_data.validate 相同）；
+# - 年份目录中日期不属于该年份的记录；
+# - 不是对象的数组元素 (invalid_items) 和无法解析的 date (invalid_dates)，记为问题而不中断检查；
+# - 语法损坏的元素 (malformed，记录字符偏移)：跳到下一个元素继续，缓冲区不会因为损坏的部分无限增长；
+# - 文件最早和最晚日期之间缺失的日期（连续缺失合并为一个区间）。
+#
+# 用法（在仓库根目录执行）:
+#   python python/stream_validate.py                      # 检查 repair_archive_data 处理的所有文件
+#   python python/stream_validate.py bing/old-2408/*.json --out report.json
+CHUNK_SIZE = 1 << 16
+MAX_ITEM_SIZE = 1 << 20  # 一条记录最多这么多个字符；超过后仍无法解析时视为损坏，不再继续读入缓冲区
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE, errors=None, max_item_size=MAX_ITEM_SIZE):
+    """
+    逐个产生 JSON 数组中的元素，每次只读取 chunk_size 个字符。
+    给出 errors 列表时，无法解析的元素记为 {"offset": 字符偏移, "error": 原因} 并跳到下一个元素继续，
+    否则抛出 JSONDecodeError；缓冲区中超过 max_item_size 个字符仍无法解析出元素时同样按损坏处理
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        consumed = 0  # 已从缓冲区丢弃的字符数，consumed + pos 即文件中的字符偏移
+        eof = False
+
+        def refill():
+            nonlocal buf, pos, consumed, eof
+            chunk = f.read(chunk_size)
+            consumed += pos
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+
+        def peek():
+            # 跳过空白并返回下一个字符；需要时继续读取文件，文件结束时返回 ""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                refill()
+
+        def skip_item():
+            """
+            跳过损坏的元素：按引号和括号层级扫描到元素结束的 "}"/"]"，或者数组这一层的 "," / "]"。
+            已扫描的部分随时丢弃，内存占用不随损坏部分的长度增长；文件结束时返回 False
+            """
+            nonlocal pos
+            depth = 0
+            in_string = escape = False
+            while True:
+                if pos >= len(buf):
+                    refill()
+                    if eof and pos >= len(buf):
+                        return False
+                ch = buf[pos]
+                if in_string:
+                    if escape:
+                        escape = False
+                    elif ch == "\\":
+                        escape = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '"':
+                    in_string = True
+                elif ch in "{[":
+                    depth += 1
+                elif ch in "}]":
+                    depth -= 1
+                    if depth == 0:
+                        pos += 1
+                        return True
+                    if depth < 0:
+                        return True
+                elif ch == "," and depth == 0:
+                    return True
+                pos += 1
+
+        def corrupt(error):
+            # 无法继续解析：没有 errors 时抛出，否则记录并跳过这个元素
+            if errors is None:
+                raise error
+            errors.append({"offset": consumed + pos, "error": error.msg})
+            return skip_item()
+
+        if peek() != "[":
+            raise json.JSONDecodeError("Expecting '['", buf, pos)
+        pos += 1
+        if peek() == "]":
+            return
+        while True:
+            if peek() == "":
+                if not corrupt(json.JSONDecodeError("Unexpected end of file", buf, pos)):
+                    return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # 数字等元素可能恰好被缓冲区截断，读到末尾时补充数据后重新解析；
+                # 数字截断在 "1." / "1e" 处时 raw_decode 只解析出前面的 "1"，
+                # 所以数字之后直到缓冲区末尾都是数字字符时也要补充数据
+                complete = end < len(buf) or eof
+                if complete and not eof and type(item) in (int, float):
+                    complete = buf[end:].lstrip(_NUMBER_CHARS) != ""
+            except json.JSONDecodeError as e:
+                if not eof and len(buf) - pos <= max_item_size:
+                    refill()
+                    continue
+                if not corrupt(e):
+                    return
+            else:
+                if not complete:
+                    refill()
+                    continue
+                yield item
+                pos = end
+            while True:
+                separator = peek()
+                if separator == "]":
+                    return
+                if separator == ",":
+                    break
+                if not corrupt(json.JSONDecodeError("Expecting ',' or ']'", buf, pos)):
+                    return
+            pos += 1
+            if pos > chunk_size:
+                consumed += pos
+                buf, pos = buf[pos:], 0
+
+
+def date_ordinal(value):
+    """YYYYMMDD -> 天数序号；格式不正确时返回 None"""
+    try:
+        return Date(int(value[:4]), int(value[4:6]), int(value[6:8])).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def gap_ranges(ordinals):
+    """排好序的天数序号之间缺失的区间 [(开始, 结束, 天数)]"""
+    gaps = []
+    for previous, current in zip(ordinals, ordinals[1:]):
+        if current - previous > 1:
+            start = Date.fromordinal(previous + 1).strftime("%Y%m%d")
+            end = Date.fromordinal(current - 1).strftime("%Y%m%d")
+            gaps.append({"start": start, "end": end, "days": current - previous - 1})
+    return gaps
+
+
+def validate_file(path, since=POST_2408_CUTOFF, chunk_size=CHUNK_SIZE):
+    path = Path(path)
+    region = region_from_path(path)
+    parent = path.parent.name
+    year_file = parent.isdigit()
+
+    records = 0
+    missing_required = []
+    wrong_year = []
+    invalid_dates = []
+    invalid_items = []
+    malformed = []
+    date_counts = {}
+    for index, item in enumerate(iter_json_array(path, chunk_size, errors=malformed)):
+        records += 1
+        if not isinstance(item, dict):
+            invalid_items.append({"file": str(path), "index": index, "type": type(item).__name__})
+            continue
+        date = item.get("date") or ""
+        if not isinstance(date, str):
+            invalid_dates.append({"file": str(path), "index": index, "date": date})
+            date = ""
+        if date:
+            date_counts[date] = date_counts.get(date, 0) + 1
+            if date_ordinal(date) is None:
+                invalid_dates.append({"file": str(path), "index": index, "date": date})
+
+        if date >= since:
+            missing = [field for field in REQUIRED_FIELDS if not item.get(field)]
+            if missing:
+                missing_required.append(
+                    {
+                        "file": str(path),
+                        "index": index,
+                        "date": date,
+                        "region": region,
+                        "missing": missing,
+                        "copyright": item.get("copyright"),
+                        "urlbase": item.get("urlbase"),
+                    }
+                )
+
+        if year_file and date and not date.startswith(parent):
+            wrong_year.append({"file": str(path), "index": index, "date": date, "region": region})
+
+    duplicate_dates = [
+        {"file": str(path), "region": region, "date": date, "count": count}
+        for date, count in date_counts.items()
+        if date >= since and count > 1
+    ]
+    ordinals = sorted(o for o in map(date_ordinal, date_counts) if o is not None)
+    return {
+        "file": str(path),
+        "records": records,
+        "first_date": Date.fromordinal(ordinals[0]).strftime("%Y%m%d") if ordinals else None,
+        "last_date": Date.fromordinal(ordinals[-1]).strftime("%Y%m%d") if ordinals else None,
+        "missing_required": missing_required,
+        "duplicate_dates": duplicate_dates,
+        "wrong_year": wrong_year,
+        "invalid_dates": invalid_dates,
+        "invalid_items": invalid_items,
+        "malformed": [{"file": str(path), **error} for error in malformed],
+        "gaps": gap_ranges(ordinals),
+    }
+
+
+def validate_paths(paths, since=POST_2408_CUTOFF, chunk_size=CHUNK_SIZE):
+    report = {"files": [], "errors": []}
+    for path in paths:
+        try:
+            report["files"].append(validate_file(path, since, chunk_size))
+        except (OSError, ValueError) as e:
+            report["errors"].append({"file": str(path), "error": str(e)})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate archive JSON files record by record.")
+    parser.add_argument("paths", nargs="*", help=f"files to check (default: every archive file under {BASE_DIR})")
+    parser.add_argument("--since", default=POST_2408_CUTOFF,
+                        help="check required fields and duplicate dates from this date on (YYYYMMDD)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--out", help="write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.paths] or archive_paths()
+    report = validate_paths(paths, args.since, args.chunk_size)
+
+    problems = 0
+    for result in report["files"]:
+        counts = {
+            key: len(result[key])
+            for key in ("missing_required", "duplicate_dates", "wrong_year", "invalid_dates", "invalid_items", "malformed", "gaps")
+            if result[key]
+        }
+        problems += sum(
+            len(result[key])
+            for key in ("missing_required", "duplicate_dates", "wrong_year", "invalid_dates", "invalid_items", "malformed")
+        )
+        status = ", ".join(f"{key}: {count}" for key, count in counts.items()) or "ok"
+        print(f"{result['file']} ({result['records']} records, {result['first_date']}-{result['last_date']}): {status}")
+    for error in report["errors"]:
+        print(f"{error['file']}: ERROR {error['error']}")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Report written to {args.out}")
+    # 日期缺口只作提示（部分地区本来就有缺失的日期），其它问题返回非零
+    return 1 if problems or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# python/ 下的脚本按文件名互相导入（在仓库根目录执行 python python/xxx.py），测试中同样把它加入 sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
@@ -0,0 +1,59 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import archive_io
+
+RECORDS = [
+    {"date": "20250102", "copyright": "Lac de Sainte-Croix (© Example)", "title": "湖"},
+    {"date": "20250101", "copyright": "Peak District, England (© Example)"},
+]
+
+
+@pytest.mark.parametrize("newline", [True, False])
+@pytest.mark.parametrize("parallel", [False, True])
+def test_round_trip_keeps_trailing_newline(tmp_path, newline, parallel):
+    path = tmp_path / "bing_en-GB.json"
+    text = json.dumps(RECORDS, ensure_ascii=False, indent=4) + ("\n" if newline else "")
+    path.write_text(text, encoding="utf-8")
+
+    files = archive_io.ArchiveFiles()
+    files.mark_dirty(path, files.load(path))
+    if parallel:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert files.flush(executor) == [path]
+    else:
+        assert files.flush() == [path]
+    assert path.read_text(encoding="utf-8") == text
+    assert not files.is_dirty(path)
+
+
+def test_new_file_has_no_trailing_newline(tmp_path):
+    path = tmp_path / "2025" / "bing_en-US.json"
+    files = archive_io.ArchiveFiles()
+    data = files.load(path)
+    data.extend(RECORDS)
+    files.mark_dirty(path)
+    files.flush()
+    assert path.read_text(encoding="utf-8") == json.dumps(RECORDS, ensure_ascii=False, indent=4)
+
+
+def test_flush_only_given_paths(tmp_path):
+    first, second = tmp_path / "bing_a.json", tmp_path / "bing_b.json"
+    files = archive_io.ArchiveFiles()
+    files.mark_dirty(first, RECORDS)
+    files.mark_dirty(second, RECORDS[:1])
+    assert files.flush(paths=[second]) == [second]
+    assert not first.exists()
+    assert files.is_dirty(first)
+    assert files.flush() == [first]
+
+
+def test_compact_mirror(tmp_path):
+    src, dst = tmp_path / "bing", tmp_path / "dist"
+    path = src / "bing_ja-JP.json"
+    files = archive_io.ArchiveFiles(compact_mirror=(src, dst))
+    files.write(path, RECORDS)
+    assert json.loads((dst / "bing_ja-JP.json").read_text(encoding="utf-8")) == RECORDS
+    assert files.load(path) is RECORDS
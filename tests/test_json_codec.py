@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import json_codec
+
+RECORDS = [
+    {
+        "startdate": "20250102",
+        "fullstartdate": "202501020800",
+        "url": "/th?id=OHR.Example_EN-US123_1920x1080.jpg&rf=LaDigue_1920x1080.jpg&pid=hp",
+        "copyright": "Schloss Neuschwanstein, Bayern (© Example/Getty Images)",
+        "title": "冬日的城堡 \"引号\" \\ 反斜杠\n换行\t制表符",
+        "hs": [],
+    },
+    {"date": "20250101", "wp": True, "drk": 1, "top": None, "emoji": "🏔️   \x7f"},
+    {"date": "20241231", "ratio": 1.5, "small": 1e-05, "big": 10 ** 30},
+]
+
+CASES = [
+    [],
+    [{}],
+    [{"a": 1}, {}],
+    RECORDS,
+    RECORDS[:1],
+    [record for record in RECORDS if "hs" not in record],
+    {"version": 3, "regions": {"en-US": [1, 2, 3]}},
+    [[1, 2], {"nested": {"a": [1]}}],
+    [1, "two", None],
+    "字符串",
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(json_codec, "orjson", None)
+    elif json_codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("data", CASES)
+@pytest.mark.parametrize("indent", [4, 2])
+def test_dumps_pretty_matches_json_dumps(backend, data, indent):
+    assert json_codec.dumps_pretty(data, indent=indent) == json.dumps(data, ensure_ascii=False, indent=indent)
+
+
+@pytest.mark.parametrize("data", CASES)
+def test_dumps_compact_round_trip(backend, data):
+    text = json_codec.dumps_compact(data)
+    assert json.loads(text) == data
+
+
+@pytest.mark.parametrize("data", CASES)
+def test_loads_matches_json_loads(backend, data):
+    text = json.dumps(data, ensure_ascii=False, indent=4)
+    if backend == "orjson" and "10000000000000000000" in text:
+        pytest.skip("orjson parses integers beyond 64 bits as floats")
+    assert json_codec.loads(text) == json.loads(text)
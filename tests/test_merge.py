@@ -0,0 +1,71 @@
+import copy
+
+from bing_260204 import update_and_merge_images
+
+
+def record(date, fullstartdate=None, name="Image"):
+    item = {"date": date, "copyright": f"{name} {date}"}
+    if fullstartdate is not None:
+        item["fullstartdate"] = fullstartdate
+    return item
+
+
+EXISTING = [
+    record("20250105", "202501050800"),
+    record("20250103", "202501030800"),
+    record("20250101", "202501010800"),
+]
+
+
+def test_returns_tuple_and_keeps_list_when_nothing_added():
+    existing = copy.deepcopy(EXISTING)
+    images, added = update_and_merge_images(existing, copy.deepcopy(EXISTING))
+    assert added == 0
+    assert images is existing
+    assert images == EXISTING
+
+
+def test_inserts_in_descending_date_order():
+    existing = copy.deepcopy(EXISTING)
+    new = [record("20250106", "202501060800"), record("20250102", "202501020800"), record("20241231", "202412310800")]
+    images, added = update_and_merge_images(existing, new)
+    assert added == 3
+    assert images is existing
+    assert [image["date"] for image in images] == ["20250106", "20250105", "20250103", "20250102", "20250101", "20241231"]
+
+
+def test_same_date_is_inserted_after_existing_records():
+    existing = copy.deepcopy(EXISTING)
+    images, added = update_and_merge_images(existing, [record("20250103", "202501030700", name="Second")])
+    assert added == 1
+    assert [image["copyright"] for image in images[1:3]] == ["Image 20250103", "Second 20250103"]
+
+
+def test_existing_records_are_not_updated():
+    existing = copy.deepcopy(EXISTING)
+    changed = dict(EXISTING[0], copyright="changed", description="new description")
+    images, added = update_and_merge_images(existing, [changed])
+    assert added == 0
+    assert images == EXISTING
+
+
+def test_duplicates_within_new_images_are_added_once():
+    existing = copy.deepcopy(EXISTING)
+    new = record("20250104", "202501040800")
+    images, added = update_and_merge_images(existing, [new, dict(new)])
+    assert added == 1
+    assert len(images) == 4
+
+
+def test_falls_back_to_date_without_unique_field():
+    existing = [record("20250102"), record("20250101")]
+    images, added = update_and_merge_images(existing, [record("20250102"), record("20250103"), {"copyright": "no date"}])
+    assert added == 1
+    assert [image["date"] for image in images] == ["20250103", "20250102", "20250101"]
+
+
+def test_unsorted_list_is_sorted_after_merge():
+    existing = [record("20250101", "202501010800"), record("20250105", "202501050800")]
+    images, added = update_and_merge_images(existing, [record("20250103", "202501030800")])
+    assert added == 1
+    assert [image["date"] for image in images] == ["20250105", "20250103", "20250101"]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from stream_validate import iter_json_array
+
+ARRAYS = [
+    [],
+    [1],
+    [{"date": "20250101", "copyright": "Mont-Saint-Michel, France (© Example)"}] * 5,
+    [{"title": "長い説明 " * 50, "nested": {"a": [1, 2, {"b": None}]}}, [], {}, "]", "\\\"", True, None],
+    [0, -1, 1.5, -0.25, 1e-05, 123456789012, 3.14159e100],
+]
+
+
+def write(tmp_path, text):
+    path = tmp_path / "bing_test.json"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("data", ARRAYS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_matches_json_load(tmp_path, data, chunk_size, indent):
+    path = write(tmp_path, json.dumps(data, ensure_ascii=False, indent=indent) + "\n")
+    with path.open(encoding="utf-8") as f:
+        expected = json.load(f)
+    assert list(iter_json_array(path, chunk_size)) == expected
+
+
+def test_rejects_non_array(tmp_path):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(write(tmp_path, '{"a": 1}')))
+
+
+def test_malformed_item_raises_without_errors(tmp_path):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(write(tmp_path, '[{"a": 1}, {"b": tru}, {"c": 3}]'), chunk_size=4))
+
+
+def test_malformed_item_is_skipped_with_errors(tmp_path):
+    errors = []
+    path = write(tmp_path, '[{"a": 1}, {"b": tru, "x": "}"}, {"c": 3}]')
+    assert list(iter_json_array(path, chunk_size=4, errors=errors)) == [{"a": 1}, {"c": 3}]
+    assert len(errors) == 1
+    assert errors[0]["offset"] == len('[{"a": 1}, ')
+
+
+def test_unterminated_item_is_bounded(tmp_path):
+    errors = []
+    path = write(tmp_path, '[{"a": 1}, {"b": "' + "x" * 1000)
+    assert list(iter_json_array(path, chunk_size=16, errors=errors, max_item_size=100)) == [{"a": 1}]
+    assert len(errors) == 1